@@ -0,0 +1,70 @@
+"""
+Wall-time benchmark for map-reduce review analysis.
+
+Builds synthetic review corpora of increasing size and runs
+LLMService.analyze_content against a simulated Gemini backend whose latency
+grows with prompt size. Reports chunks, review coverage and wall time per
+corpus so the effect of ANALYSIS_CHUNK_TOKENS / ANALYSIS_PARALLEL_CHUNKS can
+be compared.
+
+Usage:
+    python -m benchmarks.bench_analysis_mapreduce --sizes 50,200,1000,3000
+"""
+import argparse
+import asyncio
+import json
+import random
+import time
+
+from benchmarks.simulated_gemini import simulated_service
+from src.services.review_text import REVIEW_SEPARATOR, estimate_tokens
+
+SAMPLE_REVIEWS = [
+    "披薩餅皮很酥脆，窯烤香氣十足，服務人員也很親切。",
+    "假日等了快一個小時才上菜，出餐速度真的太慢了。",
+    "附近很難停車，繞了好幾圈才找到位置。",
+    "價格偏高，但食材新鮮，環境也很舒適。",
+    "Great wood-fired pizza, friendly staff, but the wait was long.",
+]
+
+
+# Serves as both the map-step and the synonym-grouping reply
+ANALYSIS_REPLY = json.dumps({
+    "platform": "Google Maps",
+    "good": [{"label": "餐點美味", "count": 5, "members": ["餐點美味"]}],
+    "bad": [{"label": "出餐速度慢", "count": 3, "members": ["出餐速度慢"]}],
+}, ensure_ascii=False)
+
+
+def build_corpus(size: int) -> str:
+    rng = random.Random(size)
+    return REVIEW_SEPARATOR.join(f"{rng.choice(SAMPLE_REVIEWS)} (#{i})" for i in range(size))
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", default="50,200,1000,3000")
+    parser.add_argument("--base-latency", type=float, default=0.8)
+    parser.add_argument("--per-1k-tokens", type=float, default=0.4)
+    args = parser.parse_args()
+
+    print("=" * 60)
+    print("MAP-REDUCE ANALYSIS BENCHMARK")
+    print("=" * 60)
+    print(f"{'reviews':>8} {'tokens':>8} {'chunks':>7} {'covered':>8} {'wall (s)':>9}")
+
+    for size in (int(x) for x in args.sizes.split(",")):
+        # Latency grows with prompt size, mimicking a real completion
+        llm = simulated_service(args.base_latency, args.per_1k_tokens, reply=lambda model, contents: ANALYSIS_REPLY)
+
+        corpus = build_corpus(size)
+        start = time.perf_counter()
+        result = await llm.analyze_content(corpus)
+        elapsed = time.perf_counter() - start
+
+        print(f"{size:>8} {estimate_tokens(corpus):>8} {result.get('chunks', 0):>7} "
+              f"{result.get('reviews_covered', 0):>8} {elapsed:>9.2f}")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
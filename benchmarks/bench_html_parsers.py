@@ -0,0 +1,91 @@
+"""
+HTML text-extraction benchmark for the generic scrape path.
+
+Runs every installed backend of src.services.html_text over saved HTML
+pages and reports the median parse time per page and the number of lines
+extracted (which should roughly agree between backends).
+
+Pages are the *.html files in --fixtures (default benchmarks/fixtures/html)
+plus every HTML document inside the recorded scrapes in --scrapes (default
+benchmarks/fixtures/scrapes, see src/devtools/scrape_fixtures.py). Without
+any, a synthetic page with heavy inline scripts and styles is generated.
+
+Usage:
+    python -m benchmarks.bench_html_parsers --repeat 20
+    python -m benchmarks.bench_html_parsers --fixtures ~/saved_pages --max-lines 2000
+"""
+import argparse
+import base64
+import random
+import statistics
+import time
+from pathlib import Path
+
+from src.devtools.scrape_fixtures import ScrapeFixture
+from src.services.html_text import BACKENDS, available_backends
+
+DEFAULT_FIXTURES = Path(__file__).parent / "fixtures" / "html"
+DEFAULT_SCRAPES = Path(__file__).parent / "fixtures" / "scrapes"
+
+
+def synthetic_page(sections: int = 2000, seed: int = 7) -> str:
+    rng = random.Random(seed)
+    words = ["服務", "餐點", "環境", "價格", "service", "food", "clean", "slow", "friendly", "parking"]
+    parts = ["<html><head><style>", ".x{color:red}" * 2000, "</style></head><body>"]
+    for i in range(sections):
+        sentence = " ".join(rng.choice(words) for _ in range(rng.randint(5, 30)))
+        parts.append(f'<div class="c{i}"><span>{sentence}</span><a href="#{i}">link {i}</a></div>')
+        if i % 50 == 0:
+            parts.append("<script>var d = " + "[1,2,3]," * 500 + "0;</script>")
+    parts.append("</body></html>")
+    return "".join(parts)
+
+
+def scrape_pages(directory: Path):
+    """HTML documents served during recorded scrapes."""
+    pages = {}
+    for path in sorted(directory.glob("*.json.gz")):
+        fixture = ScrapeFixture.load(path)
+        for index, entry in enumerate(fixture.entries):
+            content_type = next((v for k, v in entry["headers"].items() if k.lower() == "content-type"), "")
+            if "text/html" in content_type:
+                name = f"{path.name.removesuffix('.json.gz')}#{index}"
+                pages[name] = base64.b64decode(entry["body"]).decode("utf-8", errors="replace")
+    return pages
+
+
+def load_fixtures(directory: Path, scrapes: Path):
+    pages = {path.name: path.read_text(encoding="utf-8", errors="replace") for path in sorted(directory.glob("*.html"))}
+    pages.update(scrape_pages(scrapes))
+    return pages or {"synthetic.html": synthetic_page()}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--fixtures", type=Path, default=DEFAULT_FIXTURES)
+    parser.add_argument("--scrapes", type=Path, default=DEFAULT_SCRAPES)
+    parser.add_argument("--repeat", type=int, default=10)
+    parser.add_argument("--max-lines", type=int, default=500)
+    args = parser.parse_args()
+
+    pages = load_fixtures(args.fixtures, args.scrapes)
+    backends = available_backends()
+
+    print("=" * 60)
+    print(f"HTML PARSER BENCHMARK: {len(pages)} page(s), backends: {', '.join(backends)}")
+    print("=" * 60)
+    print(f"{'page':>24} {'backend':>11} {'size (KB)':>10} {'median (ms)':>12} {'lines':>6}")
+    for name, html in pages.items():
+        for backend in backends:
+            extract = BACKENDS[backend]
+            timings = []
+            for _ in range(args.repeat):
+                start = time.perf_counter()
+                lines = extract(html, args.max_lines)
+                timings.append(time.perf_counter() - start)
+            print(f"{name[:24]:>24} {backend:>11} {len(html) / 1024:>10.0f} "
+                  f"{statistics.median(timings) * 1000:>12.2f} {len(lines):>6}")
+
+
+if __name__ == "__main__":
+    main()
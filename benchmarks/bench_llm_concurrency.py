@@ -0,0 +1,60 @@
+"""
+Load benchmark for LLMService concurrency.
+
+Fires a burst of generate_content calls against a simulated Gemini backend
+with fixed per-call latency and reports throughput for each LLM_MAX_CONCURRENCY
+setting. With a non-blocking client, throughput should grow roughly linearly
+with the concurrency limit until the burst size is reached.
+
+With --base-url the real google-genai client is used against a stand-in
+server instead of the in-process simulation.
+
+Usage:
+    python -m benchmarks.bench_llm_concurrency --requests 64 --latency 0.5
+
+    python -m src.devtools.fake_gemini --port 8100 --latency fixed:0.5 &
+    python -m benchmarks.bench_llm_concurrency --base-url http://127.0.0.1:8100
+"""
+import argparse
+import asyncio
+import time
+
+from benchmarks.simulated_gemini import simulated_service
+from src.services.llm_scheduler import LLMScheduler
+
+
+async def run_burst(concurrency: int, total: int, latency: float, base_url: str | None = None):
+    llm = simulated_service(latency, base_url=base_url)
+    llm.scheduler = LLMScheduler(max_in_flight=concurrency, interactive_reserved=0)
+
+    start = time.perf_counter()
+    await asyncio.gather(*(llm.generate_content(f"prompt {concurrency}-{i}") for i in range(total)))
+    elapsed = time.perf_counter() - start
+    return elapsed, total / elapsed
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=64)
+    parser.add_argument("--latency", type=float, default=0.5, help="Simulated seconds per Gemini call")
+    parser.add_argument("--levels", default="1,2,4,8,16,32")
+    parser.add_argument("--base-url", default=None, help="Stand-in Gemini server; latency then comes from the server")
+    args = parser.parse_args()
+
+    levels = [int(x) for x in args.levels.split(",")]
+
+    print("=" * 60)
+    backend = args.base_url or f"simulated {args.latency}s latency"
+    print(f"LLM CONCURRENCY BENCHMARK: {args.requests} calls, {backend}")
+    print("=" * 60)
+    print(f"{'concurrency':>12} {'wall (s)':>10} {'req/s':>10} {'speed-up':>10}")
+
+    baseline = None
+    for level in levels:
+        elapsed, throughput = await run_burst(level, args.requests, args.latency, args.base_url)
+        baseline = baseline or throughput
+        print(f"{level:>12} {elapsed:>10.2f} {throughput:>10.2f} {throughput / baseline:>9.1f}x")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,72 @@
+"""
+Priority-lane benchmark for the LLM scheduler.
+
+Floods LLMService with bulk analysis calls while a trickle of interactive
+chat calls arrives, then reports interactive latency with priority lanes
+enabled and with every call in the same lane. With lanes, interactive p95
+should stay close to the raw call latency however deep the bulk queue is.
+
+Usage:
+    python -m benchmarks.bench_llm_priority --bulk 200 --interactive 20 --concurrency 8
+
+    # exercise 429 backoff through the real client
+    python -m src.devtools.fake_gemini --port 8100 --latency fixed:0.3 --error-429 0.1 --retry-after 1 &
+    python -m benchmarks.bench_llm_priority --base-url http://127.0.0.1:8100
+"""
+import argparse
+import asyncio
+import statistics
+import time
+
+from benchmarks.simulated_gemini import simulated_service
+from src.services.llm_scheduler import LLMScheduler, PRIORITY_INTERACTIVE, PRIORITY_BULK
+
+
+async def run(args, use_lanes: bool):
+    llm = simulated_service(args.latency, base_url=args.base_url)
+    llm.scheduler = LLMScheduler(max_in_flight=args.concurrency, rpm=args.rpm,
+                                 interactive_reserved=1 if use_lanes else 0)
+    interactive_priority = PRIORITY_INTERACTIVE if use_lanes else PRIORITY_BULK
+
+    latencies = []
+
+    async def interactive(i):
+        await asyncio.sleep(i * args.interval)
+        start = time.perf_counter()
+        await llm.generate_content(f"chat {use_lanes} {i}", priority=interactive_priority)
+        latencies.append(time.perf_counter() - start)
+
+    start = time.perf_counter()
+    bulk = [llm.generate_content(f"bulk {use_lanes} {i}", priority=PRIORITY_BULK) for i in range(args.bulk)]
+    chats = [interactive(i) for i in range(args.interactive)]
+    await asyncio.gather(*bulk, *chats)
+    elapsed = time.perf_counter() - start
+
+    latencies.sort()
+    p95 = latencies[min(len(latencies) - 1, int(0.95 * len(latencies)))]
+    return statistics.median(latencies), p95, elapsed, llm.scheduler.stats()
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--bulk", type=int, default=200)
+    parser.add_argument("--interactive", type=int, default=20)
+    parser.add_argument("--interval", type=float, default=0.25, help="Seconds between interactive calls")
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--rpm", type=float, default=0)
+    parser.add_argument("--latency", type=float, default=0.3)
+    parser.add_argument("--base-url", default=None)
+    args = parser.parse_args()
+
+    print("=" * 60)
+    print(f"LLM PRIORITY BENCHMARK: {args.bulk} bulk + {args.interactive} interactive calls")
+    print("=" * 60)
+    print(f"{'mode':>10} {'chat p50 (s)':>13} {'chat p95 (s)':>13} {'total (s)':>10} {'retries':>8}")
+    for use_lanes in (False, True):
+        p50, p95, elapsed, stats = await run(args, use_lanes)
+        mode = "lanes" if use_lanes else "fifo"
+        print(f"{mode:>10} {p50:>13.2f} {p95:>13.2f} {elapsed:>10.2f} {stats['retries']:>8}")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,212 @@
+"""
+Offline scraper benchmark over recorded fixtures.
+
+Replays every fixture in --fixtures (see src/devtools/scrape_fixtures.py)
+through ScraperService --repeat times and reports, per fixture, the median
+wall time, reviews extracted, in-page extraction / HTML parse time and the
+peak RSS of this process plus its browser processes.
+
+With --baseline, results are compared to a saved baseline and the run
+exits with status 1 when a fixture regresses past the thresholds (wall
+time, peak RSS or parse time growing, fewer reviews extracted, more failed
+runs), when a baselined fixture is missing, or when there are no fixtures
+at all. Metrics absent from the baseline are not checked.
+--update-baseline writes the current numbers as the new baseline. Timings
+are machine-specific, and the first run in a process is cold, so compare
+with --repeat 3 or more on the machine that wrote the baseline.
+
+benchmarks/fixtures/scrapes/synthetic_maps_place.json.gz is generated by
+src/devtools/synthetic_maps_fixture.py from maps_rpc.REVIEW_PATHS and the
+scraper's own selectors, so it only tests the code against itself: it
+catches scraper slowdowns and extraction regressions, not Maps layout or
+RPC drift. Record real places for that.
+
+Usage:
+    python -m src.devtools.scrape_fixtures record "<maps url>" --name pizza_shalom
+    python -m benchmarks.bench_scraper_replay --repeat 3 --update-baseline
+    python -m benchmarks.bench_scraper_replay --repeat 3 --baseline benchmarks/scraper_baseline.json
+"""
+import argparse
+import asyncio
+import json
+import os
+import resource
+import statistics
+import sys
+import time
+from pathlib import Path
+
+from src.devtools.scrape_fixtures import DEFAULT_DIR, FixtureReplayer, ScrapeFixture
+from src.services.review_text import REVIEW_SEPARATOR
+from src.services.scraper_service import ScraperService
+
+DEFAULT_BASELINE = Path(__file__).parent / "scraper_baseline.json"
+
+# Allowed change relative to the baseline before a fixture counts as regressed
+THRESHOLDS = {
+    "wall_s": 1.25,
+    "peak_rss_mb": 1.25,
+    "parse_ms": 1.50,
+    "reviews": 0.90,
+}
+
+
+def _rss_kb(pid: int) -> int:
+    try:
+        with open(f"/proc/{pid}/status") as f:
+            for line in f:
+                if line.startswith("VmRSS:"):
+                    return int(line.split()[1])
+    except OSError:
+        pass
+    return 0
+
+
+def _children(pid: int) -> list[int]:
+    pids = []
+    try:
+        for tid in os.listdir(f"/proc/{pid}/task"):
+            with open(f"/proc/{pid}/task/{tid}/children") as f:
+                pids.extend(int(p) for p in f.read().split())
+    except OSError:
+        pass
+    return pids
+
+
+def tree_rss_mb() -> float:
+    """RSS of this process and all descendants (Chromium), Linux only."""
+    total, stack = 0, [os.getpid()]
+    while stack:
+        pid = stack.pop()
+        total += _rss_kb(pid)
+        stack.extend(_children(pid))
+    return total / 1024
+
+
+class PeakRss:
+    """Samples process-tree RSS in the background and keeps the maximum."""
+
+    def __init__(self, interval: float = 0.05):
+        self.interval = interval
+        self.peak_mb = 0.0
+        self._task = None
+
+    async def _sample(self):
+        while True:
+            self.peak_mb = max(self.peak_mb, tree_rss_mb())
+            await asyncio.sleep(self.interval)
+
+    def __enter__(self):
+        self._task = asyncio.ensure_future(self._sample())
+        return self
+
+    def __exit__(self, *exc):
+        self._task.cancel()
+        if not self.peak_mb:
+            # No /proc: fall back to this process's lifetime peak
+            self.peak_mb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def parse_ms(metrics: dict) -> float:
+    metrics = metrics or {}
+    if "extraction" in metrics:
+        return metrics["extraction"].get("extract_ms") or 0.0
+    if "parse" in metrics:
+        return metrics["parse"].get("parse_ms") or 0.0
+    return 0.0
+
+
+async def bench_fixture(service: ScraperService, fixture: ScrapeFixture, repeat: int):
+    runs = []
+    for _ in range(repeat):
+        replayer = FixtureReplayer(fixture)
+        with PeakRss() as rss:
+            start = time.perf_counter()
+            result = await service.scrape_url(fixture.url, fixture=replayer)
+            wall = time.perf_counter() - start
+        reviews = len(result.get("reviews") or []) or len([p for p in (result.get("raw_text") or "").split(REVIEW_SEPARATOR) if p.strip()])
+        runs.append({
+            "wall_s": wall,
+            "reviews": reviews,
+            "parse_ms": parse_ms(result.get("metrics")),
+            "peak_rss_mb": rss.peak_mb,
+            "status": result.get("status"),
+            "missing": replayer.counters["missing"],
+        })
+    return {
+        "wall_s": round(statistics.median(r["wall_s"] for r in runs), 3),
+        "reviews": min(r["reviews"] for r in runs),
+        "parse_ms": round(statistics.median(r["parse_ms"] for r in runs), 1),
+        "peak_rss_mb": round(max(r["peak_rss_mb"] for r in runs), 1),
+        "failures": sum(1 for r in runs if r["status"] != "success"),
+        "unrecorded_requests": max(r["missing"] for r in runs),
+    }
+
+
+def regressions(name: str, current: dict, baseline: dict) -> list[str]:
+    problems = []
+    for metric, limit in THRESHOLDS.items():
+        before, now = baseline.get(metric), current.get(metric)
+        if not before or now is None:
+            continue
+        ratio = now / before
+        if (metric == "reviews" and ratio < limit) or (metric != "reviews" and ratio > limit):
+            problems.append(f"{name}: {metric} {before} -> {now} ({ratio:.2f}x, limit {limit}x)")
+    if current.get("failures", 0) > baseline.get("failures", 0):
+        problems.append(f"{name}: {current['failures']} failed run(s)")
+    return problems
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--fixtures", type=Path, default=DEFAULT_DIR)
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--baseline", type=Path, default=None)
+    parser.add_argument("--update-baseline", action="store_true")
+    args = parser.parse_args()
+
+    paths = sorted(args.fixtures.glob("*.json.gz"))
+    if not paths:
+        print(f"No fixtures in {args.fixtures}; record one with `python -m src.devtools.scrape_fixtures record`.")
+        # An empty run must not pass the regression gate
+        return 1 if args.baseline else 0
+
+    service = ScraperService()
+    results = {}
+    try:
+        await service.start()
+        print("=" * 78)
+        print(f"SCRAPER REPLAY BENCHMARK: {len(paths)} fixture(s), {args.repeat} run(s) each")
+        print("=" * 78)
+        print(f"{'fixture':>24} {'wall (s)':>9} {'reviews':>8} {'parse (ms)':>11} {'peak RSS (MB)':>14} {'fail':>5}")
+        for path in paths:
+            name = path.name.removesuffix(".json.gz")
+            result = await bench_fixture(service, ScrapeFixture.load(path), args.repeat)
+            results[name] = result
+            print(f"{name[:24]:>24} {result['wall_s']:>9.2f} {result['reviews']:>8} "
+                  f"{result['parse_ms']:>11.1f} {result['peak_rss_mb']:>14.1f} {result['failures']:>5}")
+    finally:
+        await service.stop()
+
+    if args.update_baseline:
+        target = args.baseline or DEFAULT_BASELINE
+        target.write_text(json.dumps(results, indent=2) + "\n", encoding="utf-8")
+        print(f"Baseline written to {target}")
+        return 0
+
+    if args.baseline:
+        baseline = json.loads(args.baseline.read_text(encoding="utf-8"))
+        problems = [p for name, result in results.items() if name in baseline
+                    for p in regressions(name, result, baseline[name])]
+        problems += [f"{name}: fixture missing" for name in baseline if name not in results]
+        if problems:
+            print("\nREGRESSIONS:")
+            for problem in problems:
+                print(f"  {problem}")
+            return 1
+        print("\nNo regressions against baseline.")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(asyncio.run(main()))
@@ -0,0 +1,39 @@
+"""
+In-process Gemini stand-in shared by the LLM benchmarks.
+
+For load tests through the real google-genai client use
+src/devtools/fake_gemini.py and pass its URL as base_url instead.
+"""
+import asyncio
+from types import SimpleNamespace
+
+from src.services.llm_cache import LLMCache
+from src.services.llm_service import LLMService
+from src.services.review_text import estimate_tokens
+
+
+class SimulatedModels:
+    """
+    Stand-in for client.aio.models that sleeps instead of calling Gemini.
+    Latency is `latency` seconds plus `per_1k_tokens` per 1000 prompt tokens;
+    reply(model, contents) gives the response text.
+    """
+
+    def __init__(self, latency: float, per_1k_tokens: float = 0.0, reply=None):
+        self.latency = latency
+        self.per_1k_tokens = per_1k_tokens
+        self.reply = reply or (lambda model, contents: f"[{model}] {len(contents)} chars")
+
+    async def generate_content(self, model, contents, config=None):
+        await asyncio.sleep(self.latency + estimate_tokens(contents) / 1000 * self.per_1k_tokens)
+        return SimpleNamespace(text=self.reply(model, contents), usage_metadata=None)
+
+
+def simulated_service(latency: float, per_1k_tokens: float = 0.0, reply=None,
+                      base_url: str | None = None) -> LLMService:
+    """LLMService on SimulatedModels (or on base_url when given) with caching off."""
+    llm = LLMService(base_url=base_url)
+    if not base_url:
+        llm.model = SimulatedModels(latency, per_1k_tokens, reply)
+    llm.cache = LLMCache(path=None, memory_entries=0)  # measure the backend, not the cache
+    return llm
@@ -1,19 +1,47 @@
 from fastapi import APIRouter, HTTPException
+from fastapi.responses import Response, StreamingResponse
 from pydantic import BaseModel
 from src.services.scraper_service import ScraperService
-from src.services.llm_service import LLMService
+from src.services.llm_service import LLMService, PRIORITY_OVERRIDE
+from src.services.llm_scheduler import PRIORITY_BULK
+from src.services.job_queue import JobQueue, QueueFullError
+from src.services.review_store import ReviewStore
+from src.services.review import iter_ndjson, reviews_to_json
+from src.services.maps_url import CanonicalPlace
+from src.services.batch_scraper import BatchScraper
 from src.config.mock_responses import get_mock_response
+import os
 import json
+import time
+import asyncio
 
 router = APIRouter()
 scraper = ScraperService()
 llm = LLMService()
+review_store = ReviewStore.from_env()
+batch_scraper = BatchScraper.from_env()
 
 # Use mock responses for demo (since Gemini API quota is exceeded)
 USE_MOCK_RESPONSES = False
 
+# /api/analyze 預設回傳 Mock 分析；ANALYZE_USE_MOCK=0 改走真實爬蟲 + 快取 + AI 分析
+USE_MOCK_ANALYSIS = os.getenv("ANALYZE_USE_MOCK", "1") != "0"
+
+# Per-generator timeout (seconds) for /api/action-kit
+ACTION_KIT_TIMEOUT = float(os.getenv("ACTION_KIT_TIMEOUT", "45"))
+
+# Max locations per /api/batch request
+BATCH_MAX_LOCATIONS = int(os.getenv("BATCH_MAX_LOCATIONS", "100"))
+
+# Max stored reviews (newest first) fed into one analysis job
+REVIEW_STORE_ANALYSIS_LIMIT = int(os.getenv("REVIEW_STORE_ANALYSIS_LIMIT", "1000"))
+
 class AnalyzeRequest(BaseModel):
     url: str
+    # 忽略爬蟲快取，強制重新爬取
+    force_refresh: bool = False
+    # 保存除錯截圖；未指定時依 SCRAPER_DEBUG_SAMPLE_RATE 抽樣
+    debug: bool | None = None
 
 class ReplyRequest(BaseModel):
     topic: str
@@ -34,11 +62,193 @@ class InternalEmailRequest(BaseModel):
 class ChatRequest(BaseModel):
     message: str
 
+class TopicScore(BaseModel):
+    label: str
+    value: float = 0
+
+class JobRequest(BaseModel):
+    url: str
+    force_refresh: bool = False
+    # 保存除錯截圖；未指定時依 SCRAPER_DEBUG_SAMPLE_RATE 抽樣
+    debug: bool | None = None
+
+class BatchRequest(BaseModel):
+    urls: list[str]
+    # False: 只爬取評論，不做 AI 分析
+    analyze: bool = True
+    force_refresh: bool = False
+
+class ActionKitRequest(BaseModel):
+    # Same shape as the /api/analyze result; extra fields are ignored
+    good: list[TopicScore] = []
+    bad: list[TopicScore] = []
+    timeout: float | None = None
+    # 背景預取：以 bulk 優先權排程，不與使用者點擊的請求競爭
+    prefetch: bool = False
+
+async def analyze_place(place, force_refresh: bool = False, on_stage=None,
+                        debug: bool | None = None, artifact_id: str | None = None, throttle=None):
+    """爬取評論（經快取）→ 合併歷史評論 → AI 分析"""
+    def stage(name):
+        if on_stage is not None:
+            on_stage(name)
+
+    stage("scraping")
+    known_ids = await review_store.known_ids(place.key)
+    scraped = await scraper.scrape_place(place, force_refresh=force_refresh, known_review_ids=known_ids,
+                                         debug=debug, artifact_id=artifact_id, throttle=throttle)
+    scraped_reviews = scraped.get("reviews") or []
+
+    stage("merging")
+    new_reviews = await review_store.upsert(place.key, scraped_reviews)
+    stored = await review_store.reviews(place.key, limit=REVIEW_STORE_ANALYSIS_LIMIT) if scraped_reviews or known_ids else []
+    if stored:
+        # 本次新爬到的評論 + 先前已存的評論一起分析
+        content = stored
+    elif scraped["status"] == "success" and (scraped_reviews or scraped.get("raw_text")):
+        content = scraped_reviews or scraped["raw_text"]
+    else:
+        raise RuntimeError(f"爬取失敗: {scraped.get('error') or '沒有取得評論內容'}")
+
+    stage("analyzing")
+    analysis = await llm.analyze_content(content)
+    if "error" in analysis:
+        raise RuntimeError(f"分析失敗: {analysis['error']}")
+
+    return {
+        "analysis": analysis,
+        "reviews": {
+            "place_id": place.key,
+            "scraped": len(scraped_reviews),
+            "new": new_reviews,
+            "analyzed_from_store": len(stored),
+        },
+        "scrape_cache": scraped.get("cache"),
+        "scrape_metrics": scraped.get("metrics"),
+        "debug": scraped.get("debug"),
+    }
+
+async def run_analysis_job(job):
+    """背景工作：與 /api/analyze 相同流程，進度寫入 job.stage"""
+    place = CanonicalPlace(job.payload["place_key"], job.payload["url"])
+    return await analyze_place(
+        place,
+        force_refresh=job.payload.get("force_refresh", False),
+        on_stage=job.set_stage,
+        debug=job.payload.get("debug"),
+        artifact_id=job.id,
+    )
+
+jobs = JobQueue.from_env(run_analysis_job)
+
+@router.get("/metrics")
+async def metrics():
+    """服務效能指標"""
+    return {"llm": llm.stats(), "scraper": scraper.stats(), "jobs": jobs.stats(), "review_store": review_store.stats(), "batch": batch_scraper.stats()}
+
+@router.post("/jobs", status_code=202)
+async def create_job(request: JobRequest):
+    """建立背景分析工作，立即回傳 job id，之後以 GET /api/jobs/{id} 查詢進度"""
+    place = await scraper.canonicalize(request.url)
+    try:
+        # 同一地點已在排隊或執行中的工作直接共用
+        job = jobs.submit(
+            {"url": place.url, "place_key": place.key,
+             "force_refresh": request.force_refresh, "debug": request.debug},
+            key=place.key,
+        )
+    except QueueFullError as e:
+        raise HTTPException(status_code=503, detail=f"工作佇列已滿: {e}")
+    return job.to_dict()
+
+@router.post("/batch")
+async def batch_analyze(request: BatchRequest):
+    """多分店批次分析：每完成一個地點就以 SSE 推送該地點結果，最後推送吞吐量"""
+    if not request.urls:
+        raise HTTPException(status_code=400, detail="請提供至少一個網址")
+    if len(request.urls) > BATCH_MAX_LOCATIONS:
+        raise HTTPException(status_code=400, detail=f"一次最多 {BATCH_MAX_LOCATIONS} 個地點")
+
+    # 同一地點的不同網址只處理一次
+    places = await asyncio.gather(*(scraper.canonicalize(url) for url in request.urls))
+    urls_by_key = {}
+    unique = []
+    for url, place in zip(request.urls, places):
+        if place.key not in urls_by_key:
+            urls_by_key[place.key] = []
+            unique.append(place)
+        urls_by_key[place.key].append(url)
+
+    async def work(place, throttle):
+        # 只有實際爬取（快取未命中）才套用同網域禮貌延遲
+        if request.analyze:
+            return await analyze_place(place, force_refresh=request.force_refresh, throttle=throttle)
+        scraped = await scraper.scrape_place(place, force_refresh=request.force_refresh, throttle=throttle)
+        if scraped["status"] != "success":
+            raise RuntimeError(f"爬取失敗: {scraped.get('error') or '沒有取得評論內容'}")
+        return {
+            "reviews": len(scraped.get("reviews") or []),
+            "scrape_cache": scraped.get("cache"),
+            "scrape_metrics": scraped.get("metrics"),
+        }
+
+    async def event_stream():
+        try:
+            async for outcome in batch_scraper.run(unique, work):
+                place = outcome["item"]
+                yield _sse_event({
+                    "index": outcome["index"],
+                    "place_key": place.key,
+                    "urls": urls_by_key[place.key],
+                    "result": outcome.get("result"),
+                    "error": outcome.get("error"),
+                    "elapsed_ms": outcome["elapsed_ms"],
+                }, event="result")
+            yield _sse_event(batch_scraper.last_batch, event="done")
+        except Exception as e:
+            print(f"[ERROR] 批次分析失敗: {e}")
+            yield _sse_event({"error": str(e)}, event="error")
+
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+@router.get("/reviews")
+async def get_reviews(url: str, limit: int = REVIEW_STORE_ANALYSIS_LIMIT, format: str = "ndjson"):
+    """已儲存的評論（新到舊）；format=ndjson 逐行串流，format=json 回傳陣列"""
+    if format not in ("ndjson", "json"):
+        raise HTTPException(status_code=400, detail="format 必須是 ndjson 或 json")
+    place = await scraper.canonicalize(url)
+    reviews = await review_store.reviews(place.key, limit=limit)
+    headers = {"X-Place-Key": place.key}
+    if format == "json":
+        return Response(reviews_to_json(reviews), media_type="application/json", headers=headers)
+    return StreamingResponse(iter_ndjson(reviews), media_type="application/x-ndjson", headers=headers)
+
+@router.get("/jobs/{job_id}")
+async def get_job(job_id: str):
+    """查詢背景工作進度與結果"""
+    job = jobs.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="找不到此工作")
+    return job.to_dict()
+
 @router.post("/analyze")
 async def analyze(request: AnalyzeRequest):
     try:
         print(f"[INFO] 收到分析請求: {request.url}")
         
+        if not USE_MOCK_ANALYSIS:
+            place = await scraper.canonicalize(request.url)
+            try:
+                result = await analyze_place(place, force_refresh=request.force_refresh, debug=request.debug)
+            except RuntimeError as e:
+                raise HTTPException(status_code=502, detail=str(e))
+            print(f"[SUCCESS] 分析完成 (爬蟲快取: {result['scrape_cache']['status']})")
+            return {**result["analysis"], "scrape_cache": result["scrape_cache"]}
+        
         # TODO: 暫時跳過真實爬蟲，直接返回 Mock 數據
         # 原因：爬蟲可能太慢或有其他問題導致 500 錯誤
         print("[INFO] 使用 Mock 數據（跳過爬蟲步驟）")
@@ -126,16 +336,75 @@ async def generate_internal_email(request: InternalEmailRequest):
         email = await llm.generate_internal_email(request.strengths, request.weaknesses)
     return {"email": email}
 
-@router.post("/chat")
-async def chat(request: ChatRequest):
-    """AI 聊天助手"""
+@router.post("/action-kit")
+async def generate_action_kit(request: ActionKitRequest):
+    """一次平行生成所有 AI 工具內容（回覆、根源分析、行銷、週計畫、培訓劇本、內部信）"""
+    strengths = "、".join(t.label for t in request.good)
+    weaknesses = "、".join(t.label for t in request.bad)
+    main_issue = request.bad[0].label if request.bad else None
+    timeout = request.timeout or ACTION_KIT_TIMEOUT
+
+    # 直接重用各單一端點，回傳欄位與個別 API 相同
+    tasks = {}
+    if main_issue:
+        tasks["reply"] = lambda: generate_reply(ReplyRequest(topic=main_issue))
+        tasks["analyze-issue"] = lambda: analyze_issue(ReplyRequest(topic=main_issue))
+        tasks["training-script"] = lambda: generate_training_script(TrainingScriptRequest(issue=main_issue))
+        tasks["weekly-plan"] = lambda: generate_weekly_plan(WeeklyPlanRequest(weaknesses=weaknesses))
+    if strengths:
+        tasks["marketing"] = lambda: generate_marketing(MarketingRequest(strengths=strengths))
+    if strengths or weaknesses:
+        tasks["internal-email"] = lambda: generate_internal_email(
+            InternalEmailRequest(strengths=strengths, weaknesses=weaknesses))
+    if not tasks:
+        raise HTTPException(status_code=400, detail="分析結果中沒有優點或缺點可供生成")
+
+    async def run(name, factory):
+        started = time.perf_counter()
+        try:
+            return await asyncio.wait_for(factory(), timeout)
+        finally:
+            timings[name] = round((time.perf_counter() - started) * 1000)
+
+    timings = {}
+    started = time.perf_counter()
+    # gather() copies the context, so every generator inherits the override;
+    # reset it afterwards so it does not outlive the prefetch
+    override = PRIORITY_OVERRIDE.set(PRIORITY_BULK) if request.prefetch else None
     try:
-        if USE_MOCK_RESPONSES:
-            # 智能 Mock 回應（根據問題內容）
-            message = request.message.lower()
-            
-            if any(word in message for word in ['出餐', '速度', '慢', '等待']):
-                reply = """根據分析報告，**出餐速度慢**是主要痛點（40%）。
+        outcomes = await asyncio.gather(
+            *(run(name, factory) for name, factory in tasks.items()),
+            return_exceptions=True
+        )
+    finally:
+        if override is not None:
+            PRIORITY_OVERRIDE.reset(override)
+
+    results, errors = {}, {}
+    for name, outcome in zip(tasks, outcomes):
+        if isinstance(outcome, asyncio.TimeoutError):
+            errors[name] = f"timeout after {timeout:g}s"
+        elif isinstance(outcome, Exception):
+            print(f"[ERROR] action-kit {name} 失敗: {outcome}")
+            errors[name] = str(outcome)
+        else:
+            results.update(outcome)
+
+    return {
+        **results,
+        "errors": errors,
+        "timings_ms": timings,
+        "elapsed_ms": round((time.perf_counter() - started) * 1000),
+    }
+
+def _mock_chat_reply(message: str):
+    """智能 Mock 回應（根據問題內容）"""
+    original = message
+    message = message.lower()
+
+
+    if any(word in message for word in ['出餐', '速度', '慢', '等待']):
+        reply = """根據分析報告，**出餐速度慢**是主要痛點（40%）。
 
 建議改善方案：
 1. **短期**：增加尖峰時段人手
@@ -143,26 +412,26 @@ async def chat(request: ChatRequest):
 3. **長期**：引入廚房管理系統
 
 參考週行動計畫中的「流程優化Week」進行改善。"""
-                
-            elif any(word in message for word in ['停車', '車位', '不方便']):
-                reply = """針對**停車不方便**問題（18%），建議：
+        
+    elif any(word in message for word in ['停車', '車位', '不方便']):
+        reply = """針對**停車不方便**問題（18%），建議：
 
 ✅ 與鄰近停車場洽談合作
 ✅ 提供代客泊車服務
 ✅ 在 Google Maps 標註附近停車資訊
 ✅ 推廣外送服務作為替代方案"""
-                
-            elif any(word in message for word in ['價格', '貴', '便宜', '划算']):
-                reply = """**價格偏高**（12%）的策略建議：
+        
+    elif any(word in message for word in ['價格', '貴', '便宜', '划算']):
+        reply = """**價格偏高**（12%）的策略建議：
 
 💡 不建議直接降價，而是：
 - 推出「超值套餐」增加CP值感受
 - 強化餐點質感與服務體驗
 - 會員制度提供專屬優惠
 - 透過行銷突出「物有所值」"""
-                
-            elif any(word in message for word in ['行銷', '宣傳', '推廣', '社群']):
-                reply = """社群行銷建議：
+        
+    elif any(word in message for word in ['行銷', '宣傳', '推廣', '社群']):
+        reply = """社群行銷建議：
 
 📱 **Facebook/Instagram**：
 - 利用「餐點美味」優勢（32%好評）
@@ -171,9 +440,9 @@ async def chat(request: ChatRequest):
 - 限時優惠活動
 
 參考「利用優點生成FB/IG行銷貼文」功能生成內容！"""
-                
-            elif any(word in message for word in ['員工', '培訓', '訓練', '服務']):
-                reply = """員工培訓重點：
+        
+    elif any(word in message for word in ['員工', '培訓', '訓練', '服務']):
+        reply = """員工培訓重點：
 
 👥 **服務親切**已獲20%好評，請繼續保持！
 
@@ -181,11 +450,11 @@ async def chat(request: ChatRequest):
 - 學習正確應對話術
 - 避免 NG 回應
 - 提升顧客滿意度"""
-                
-            else:
-                reply = f"""您好！我是 AI 策略顧問 🤖
+        
+    else:
+        reply = f"""您好！我是 AI 策略顧問 🤖
 
-您詢問：「{request.message}」
+您詢問：「{original}」
 
 我可以協助您：
 ✅ 分析顧客回饋數據
@@ -194,9 +463,98 @@ async def chat(request: ChatRequest):
 ✅ 員工培訓方案
 
 請參考分析報告中的詳細數據，或使用頁面上的各項 AI 工具！"""
+    return reply
+
+@router.post("/chat")
+async def chat(request: ChatRequest):
+    """AI 聊天助手"""
+    try:
+        if USE_MOCK_RESPONSES:
+            reply = _mock_chat_reply(request.message)
         else:
             reply = await llm.chat(request.message)
         return {"reply": reply}
     except Exception as e:
         return {"reply": "抱歉，AI 助手暫時無法回應。請稍後再試。"}
 
+# --- 串流版本 (Server-Sent Events) ---
+# 每個 event 的 data 為 {"text": "..."}，結束時送出 "done"，錯誤時送出 "error"。
+
+MOCK_STREAM_CHUNK_SIZE = 24
+
+async def _mock_stream(text: str):
+    for i in range(0, len(text), MOCK_STREAM_CHUNK_SIZE):
+        yield text[i:i + MOCK_STREAM_CHUNK_SIZE]
+        await asyncio.sleep(0)
+
+def _sse_event(data: dict, event: str | None = None):
+    payload = f"data: {json.dumps(data, ensure_ascii=False)}\n\n"
+    return f"event: {event}\n{payload}" if event else payload
+
+def _sse_response(chunks):
+    async def event_stream():
+        try:
+            async for text in chunks:
+                yield _sse_event({"text": text})
+            yield _sse_event({}, event="done")
+        except Exception as e:
+            print(f"[ERROR] 串流生成失敗: {e}")
+            yield _sse_event({"error": str(e)}, event="error")
+
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+@router.post("/reply/stream")
+async def stream_reply(request: ReplyRequest):
+    """串流生成對負面評論的回覆"""
+    if USE_MOCK_RESPONSES:
+        return _sse_response(_mock_stream(get_mock_response("reply_to_complaint", topic=request.topic)))
+    return _sse_response(llm.stream_content(llm.build_reply_prompt(request.topic), task="reply"))
+
+@router.post("/analyze-issue/stream")
+async def stream_analyze_issue(request: ReplyRequest):
+    """串流根源問題分析"""
+    if USE_MOCK_RESPONSES:
+        return _sse_response(_mock_stream(get_mock_response("root_cause_analysis", topic=request.topic)))
+    return _sse_response(llm.stream_content(llm.build_root_cause_prompt(request.topic), task="root_cause"))
+
+@router.post("/marketing/stream")
+async def stream_marketing(request: MarketingRequest):
+    """串流生成 FB/IG 行銷貼文"""
+    if USE_MOCK_RESPONSES:
+        return _sse_response(_mock_stream(get_mock_response("marketing_copy", strengths=request.strengths)))
+    return _sse_response(llm.stream_content(llm.build_marketing_prompt(request.strengths), task="marketing"))
+
+@router.post("/weekly-plan/stream")
+async def stream_weekly_plan(request: WeeklyPlanRequest):
+    """串流生成週行動計畫"""
+    if USE_MOCK_RESPONSES:
+        return _sse_response(_mock_stream(get_mock_response("weekly_plan", weaknesses=request.weaknesses)))
+    return _sse_response(llm.stream_content(llm.build_weekly_plan_prompt(request.weaknesses), task="weekly_plan"))
+
+@router.post("/training-script/stream")
+async def stream_training_script(request: TrainingScriptRequest):
+    """串流生成員工培訓劇本"""
+    if USE_MOCK_RESPONSES:
+        return _sse_response(_mock_stream(get_mock_response("training_script", issue=request.issue)))
+    return _sse_response(llm.stream_content(llm.build_training_script_prompt(request.issue), task="training_script"))
+
+@router.post("/internal-email/stream")
+async def stream_internal_email(request: InternalEmailRequest):
+    """串流生成內部公告信"""
+    if USE_MOCK_RESPONSES:
+        return _sse_response(_mock_stream(get_mock_response("internal_email",
+                                                            strengths=request.strengths,
+                                                            weaknesses=request.weaknesses)))
+    return _sse_response(llm.stream_content(
+        llm.build_internal_email_prompt(request.strengths, request.weaknesses), task="internal_email"))
+
+@router.post("/chat/stream")
+async def stream_chat(request: ChatRequest):
+    """串流 AI 聊天助手"""
+    if USE_MOCK_RESPONSES:
+        return _sse_response(_mock_stream(_mock_chat_reply(request.message)))
+    return _sse_response(llm.stream_content(llm.build_chat_prompt(request.message), task="chat"))
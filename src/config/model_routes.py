@@ -0,0 +1,65 @@
+# Model routing table for LLMService
+# 每種任務對應的模型層級：models 為依序嘗試的 fallback 鏈（第一個為主要模型）
+# hedge: 主要請求超過該路由的 p95 延遲仍未回應時，再送出一個備援請求，取先回來的結果
+# priority: 排程優先等級 (interactive / standard / bulk)
+#
+# 可用環境變數覆寫單一路由的模型鏈，例如：
+#   LLM_ROUTE_ANALYSIS="gemini-2.5-flash,gemini-2.5-flash-lite"
+
+model_routes = {
+    # 短回覆：輕量模型，延遲敏感
+    "chat": {
+        "models": ["gemini-2.5-flash-lite", "gemini-2.5-flash"],
+        "hedge": True,
+        "priority": "interactive",
+    },
+    "reply": {
+        "models": ["gemini-2.5-flash-lite", "gemini-2.5-flash"],
+        "hedge": True,
+        "priority": "standard",
+    },
+
+    # 長篇生成：一般模型
+    "root_cause": {
+        "models": ["gemini-2.5-flash", "gemini-2.5-flash-lite"],
+        "priority": "standard",
+    },
+    "marketing": {
+        "models": ["gemini-2.5-flash", "gemini-2.5-flash-lite"],
+        "priority": "standard",
+    },
+    "weekly_plan": {
+        "models": ["gemini-2.5-flash", "gemini-2.5-flash-lite"],
+        "priority": "standard",
+    },
+    "training_script": {
+        "models": ["gemini-2.5-flash", "gemini-2.5-flash-lite"],
+        "priority": "standard",
+    },
+    "internal_email": {
+        "models": ["gemini-2.5-flash", "gemini-2.5-flash-lite"],
+        "priority": "standard",
+    },
+
+    # 評論分析：較強模型，背景批次
+    "analysis": {
+        "models": ["gemini-2.5-pro", "gemini-2.5-flash"],
+        "priority": "bulk",
+    },
+    "analysis_merge": {
+        "models": ["gemini-2.5-flash", "gemini-2.5-flash-lite"],
+        "priority": "bulk",
+    },
+
+    "default": {
+        "models": ["gemini-2.5-flash"],
+        "priority": "standard",
+    },
+}
+
+# 參考牌價 (USD / 1M tokens)：input, output。價格調整時請一併更新。
+model_prices = {
+    "gemini-2.5-flash-lite": (0.10, 0.40),
+    "gemini-2.5-flash": (0.30, 2.50),
+    "gemini-2.5-pro": (1.25, 10.00),
+}
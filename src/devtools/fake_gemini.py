@@ -0,0 +1,225 @@
+"""
+Local stand-in for the Gemini REST API, for load-testing LLMService offline.
+
+Speaks the generateContent and streamGenerateContent (?alt=sse) shapes used by
+google-genai, with configurable latency, token rate and 429/500 injection.
+
+Usage:
+    python -m src.devtools.fake_gemini --port 8100 --latency lognormal:0.8,0.5 \\
+        --error-429 0.05 --error-500 0.01 --tokens-per-second 120
+
+Then point LLMService at it:
+    GEMINI_BASE_URL=http://127.0.0.1:8100 uvicorn src.main:app
+"""
+import argparse
+import asyncio
+import json
+import math
+import random
+import time
+
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse, StreamingResponse
+import uvicorn
+
+FILLER = "感謝您的寶貴意見，我們會持續改善餐點品質與服務流程，期待再次為您服務。"
+
+
+class FakeGeminiSettings:
+    def __init__(self, latency="fixed:0.5", error_429=0.0, error_500=0.0,
+                 tokens_per_second=0.0, reply_tokens=200, stream_chunk_tokens=20,
+                 retry_after=2, seed=None):
+        self.latency = parse_latency(latency)
+        self.error_429 = error_429
+        self.error_500 = error_500
+        self.tokens_per_second = tokens_per_second
+        self.reply_tokens = reply_tokens
+        self.stream_chunk_tokens = stream_chunk_tokens
+        self.retry_after = retry_after
+        self.rng = random.Random(seed)
+
+    def sample_latency(self) -> float:
+        kind, params = self.latency
+        if kind == "fixed":
+            value = params[0]
+        elif kind == "uniform":
+            value = self.rng.uniform(params[0], params[1])
+        elif kind == "normal":
+            value = self.rng.gauss(params[0], params[1])
+        elif kind == "lognormal":
+            # params: median seconds, sigma of the underlying normal
+            value = self.rng.lognormvariate(math.log(params[0]), params[1])
+        else:  # exponential, params: mean seconds
+            value = self.rng.expovariate(1 / params[0])
+        return max(0.0, value)
+
+
+def parse_latency(spec: str):
+    """'fixed:0.5', 'uniform:0.2,1.5', 'normal:0.8,0.2', 'lognormal:0.8,0.5', 'exponential:0.8'"""
+    kind, _, raw = spec.partition(":")
+    params = [float(x) for x in raw.split(",") if x]
+    expected = {"fixed": 1, "uniform": 2, "normal": 2, "lognormal": 2, "exponential": 1}
+    if kind not in expected or len(params) != expected[kind]:
+        raise ValueError(f"Invalid latency spec: {spec!r}")
+    return kind, params
+
+
+def create_app(settings: FakeGeminiSettings) -> FastAPI:
+    app = FastAPI(title="Fake Gemini")
+    stats = {"requests": 0, "streams": 0, "errors_429": 0, "errors_500": 0,
+             "in_flight": 0, "max_in_flight": 0}
+
+    @app.get("/stats")
+    async def get_stats():
+        return stats
+
+    @app.post("/{api_version}/models/{model_action}")
+    async def models(api_version: str, model_action: str, request: Request):
+        model, _, action = model_action.partition(":")
+        body = await request.json()
+        prompt = _prompt_text(body)
+        wants_json = (body.get("generationConfig") or {}).get("responseMimeType") == "application/json"
+
+        stats["requests"] += 1
+        roll = settings.rng.random()
+        if roll < settings.error_429:
+            stats["errors_429"] += 1
+            return _error(429, "RESOURCE_EXHAUSTED", "Resource has been exhausted (e.g. check quota).",
+                          retry_after=settings.retry_after)
+        if roll < settings.error_429 + settings.error_500:
+            stats["errors_500"] += 1
+            return _error(500, "INTERNAL", "An internal error has occurred.")
+
+        text = _reply_text(prompt, wants_json, settings.reply_tokens)
+
+        if action == "streamGenerateContent":
+            stats["streams"] += 1
+            return StreamingResponse(_stream(settings, stats, model, prompt, text),
+                                     media_type="text/event-stream")
+        if action != "generateContent":
+            return _error(404, "NOT_FOUND", f"Unsupported action: {action}")
+
+        stats["in_flight"] += 1
+        stats["max_in_flight"] = max(stats["max_in_flight"], stats["in_flight"])
+        try:
+            delay = settings.sample_latency()
+            if settings.tokens_per_second:
+                delay += _tokens(text) / settings.tokens_per_second
+            await asyncio.sleep(delay)
+        finally:
+            stats["in_flight"] -= 1
+        return _response(model, prompt, text, finish=True)
+
+    return app
+
+
+async def _stream(settings, stats, model, prompt, text):
+    stats["in_flight"] += 1
+    stats["max_in_flight"] = max(stats["max_in_flight"], stats["in_flight"])
+    try:
+        # Time to first token, then chunks at the configured token rate
+        await asyncio.sleep(settings.sample_latency())
+        step = max(1, settings.stream_chunk_tokens)
+        for start in range(0, len(text), step):
+            piece = text[start:start + step]
+            last = start + step >= len(text)
+            yield f"data: {json.dumps(_response_body(model, prompt, piece, finish=last), ensure_ascii=False)}\r\n\r\n"
+            if settings.tokens_per_second and not last:
+                await asyncio.sleep(_tokens(piece) / settings.tokens_per_second)
+    finally:
+        stats["in_flight"] -= 1
+
+
+def _prompt_text(body) -> str:
+    parts = []
+    for content in body.get("contents") or []:
+        for part in content.get("parts") or []:
+            parts.append(part.get("text") or "")
+    return "\n".join(parts)
+
+
+def _tokens(text: str) -> int:
+    # One token per character is close enough for the mostly-CJK replies
+    return len(text)
+
+
+def _reply_text(prompt: str, wants_json: bool, reply_tokens: int) -> str:
+    if wants_json:
+        # Valid for both the per-chunk analysis and the synonym-grouping prompts
+        return json.dumps({
+            "platform": "Google Maps",
+            "good": [
+                {"label": "餐點美味", "count": 6, "members": ["餐點美味"]},
+                {"label": "環境舒適", "count": 4, "members": ["環境舒適"]},
+            ],
+            "bad": [
+                {"label": "出餐速度慢", "count": 5, "members": ["出餐速度慢"]},
+                {"label": "停車不方便", "count": 2, "members": ["停車不方便"]},
+            ],
+        }, ensure_ascii=False)
+    repeats = reply_tokens // len(FILLER) + 1
+    return (FILLER * repeats)[:reply_tokens]
+
+
+def _response_body(model, prompt, text, finish):
+    candidate = {"content": {"role": "model", "parts": [{"text": text}]}, "index": 0}
+    if finish:
+        candidate["finishReason"] = "STOP"
+    return {
+        "candidates": [candidate],
+        "usageMetadata": {
+            "promptTokenCount": _tokens(prompt),
+            "candidatesTokenCount": _tokens(text),
+            "totalTokenCount": _tokens(prompt) + _tokens(text),
+        },
+        "modelVersion": model,
+        "responseId": f"fake-{time.monotonic_ns()}",
+    }
+
+
+def _response(model, prompt, text, finish):
+    return JSONResponse(_response_body(model, prompt, text, finish))
+
+
+def _error(code, status, message, retry_after=None):
+    error = {"code": code, "message": message, "status": status}
+    headers = {}
+    if retry_after is not None:
+        error["details"] = [{
+            "@type": "type.googleapis.com/google.rpc.RetryInfo",
+            "retryDelay": f"{retry_after}s",
+        }]
+        headers["Retry-After"] = str(retry_after)
+    return JSONResponse({"error": error}, status_code=code, headers=headers)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8100)
+    parser.add_argument("--latency", default="fixed:0.5",
+                        help="fixed:S | uniform:A,B | normal:MU,SIGMA | lognormal:MEDIAN,SIGMA | exponential:MEAN")
+    parser.add_argument("--error-429", type=float, default=0.0, help="Fraction of requests answered with 429")
+    parser.add_argument("--error-500", type=float, default=0.0, help="Fraction of requests answered with 500")
+    parser.add_argument("--retry-after", type=int, default=2, help="Seconds advertised on 429 responses")
+    parser.add_argument("--tokens-per-second", type=float, default=0.0, help="Simulated output rate (0 = instant)")
+    parser.add_argument("--reply-tokens", type=int, default=200)
+    parser.add_argument("--stream-chunk-tokens", type=int, default=20)
+    parser.add_argument("--seed", type=int, default=None)
+    args = parser.parse_args()
+
+    settings = FakeGeminiSettings(
+        latency=args.latency,
+        error_429=args.error_429,
+        error_500=args.error_500,
+        tokens_per_second=args.tokens_per_second,
+        reply_tokens=args.reply_tokens,
+        stream_chunk_tokens=args.stream_chunk_tokens,
+        retry_after=args.retry_after,
+        seed=args.seed,
+    )
+    uvicorn.run(create_app(settings), host=args.host, port=args.port, log_level="warning")
+
+
+if __name__ == "__main__":
+    main()
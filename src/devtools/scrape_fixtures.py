@@ -0,0 +1,203 @@
+"""
+Record live scrapes as offline fixtures and replay them through Playwright.
+
+A fixture is every response a scrape received (URL, status, headers, body),
+saved as gzipped JSON. Replay serves those responses with route.fulfill and
+aborts anything that was not recorded, so ScraperService runs the full
+Maps/generic code path without touching the network.
+
+Usage:
+    # record (network required)
+    python -m src.devtools.scrape_fixtures record "https://www.google.com/maps/place/..." --name pizza_shalom
+
+    # replay and print what the scraper extracted
+    python -m src.devtools.scrape_fixtures replay benchmarks/fixtures/scrapes/pizza_shalom.json.gz
+"""
+import argparse
+import asyncio
+import base64
+import gzip
+import json
+import logging
+import time
+from collections import defaultdict, deque
+from pathlib import Path
+from urllib.parse import urlsplit
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_DIR = Path("benchmarks") / "fixtures" / "scrapes"
+
+# Headers that describe the original transfer, not the body being replayed
+DROPPED_HEADERS = {"content-encoding", "content-length", "transfer-encoding", "connection"}
+
+
+class ScrapeFixture:
+    """Recorded responses of one scrape."""
+
+    def __init__(self, url: str, entries: list[dict] | None = None, recorded_at: float | None = None):
+        self.url = url
+        self.entries = entries or []
+        self.recorded_at = recorded_at or time.time()
+
+    @classmethod
+    def load(cls, path) -> "ScrapeFixture":
+        with gzip.open(path, "rt", encoding="utf-8") as f:
+            data = json.load(f)
+        return cls(data["url"], data["entries"], data.get("recorded_at"))
+
+    def save(self, path):
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        with gzip.open(path, "wt", encoding="utf-8") as f:
+            json.dump({"url": self.url, "recorded_at": self.recorded_at, "entries": self.entries}, f)
+
+    def stats(self):
+        return {
+            "responses": len(self.entries),
+            "bytes": sum(len(base64.b64decode(e["body"])) for e in self.entries),
+        }
+
+
+class FixtureRecorder:
+    """
+    Network fixture for ScraperService.scrape_url(fixture=...) that saves
+    every response of the scrape into a ScrapeFixture.
+    """
+
+    def __init__(self, url: str):
+        self.fixture = ScrapeFixture(url)
+        self._tasks = set()
+
+    async def attach(self, context, page):
+        context.on("response", self._on_response)
+
+    def _on_response(self, response):
+        task = asyncio.ensure_future(self._read(response))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def _read(self, response):
+        try:
+            body = await response.body()
+        except Exception:
+            # Redirects and aborted requests have no body
+            return
+        request = response.request
+        self.fixture.entries.append({
+            "method": request.method,
+            "url": response.url,
+            "status": response.status,
+            "headers": {k: v for k, v in response.headers.items() if k.lower() not in DROPPED_HEADERS},
+            "body": base64.b64encode(body).decode("ascii"),
+        })
+
+    async def finish(self):
+        if self._tasks:
+            await asyncio.gather(*self._tasks, return_exceptions=True)
+
+
+class FixtureReplayer:
+    """
+    Network fixture for ScraperService.scrape_url(fixture=...) that answers
+    every request from a ScrapeFixture via route.fulfill. Requests match on
+    method + exact URL first, then on method + path in recorded order (RPC
+    URLs carry per-session tokens); anything else is aborted.
+    """
+
+    def __init__(self, fixture: ScrapeFixture):
+        self.fixture = fixture
+        self._exact = defaultdict(deque)
+        self._by_path = defaultdict(deque)
+        for entry in fixture.entries:
+            self._exact[(entry["method"], entry["url"])].append(entry)
+            self._by_path[(entry["method"], self._path(entry["url"]))].append(entry)
+        self.counters = {"fulfilled": 0, "path_matches": 0, "missing": 0}
+
+    @staticmethod
+    def _path(url):
+        parts = urlsplit(url)
+        return f"{parts.netloc}{parts.path}"
+
+    def _match(self, method, url):
+        exact = self._exact.get((method, url))
+        if exact:
+            # Reuse the last response once a URL is requested more often than recorded
+            return exact.popleft() if len(exact) > 1 else exact[0]
+        by_path = self._by_path.get((method, self._path(url)))
+        if by_path:
+            self.counters["path_matches"] += 1
+            return by_path.popleft() if len(by_path) > 1 else by_path[0]
+        return None
+
+    async def attach(self, context, page):
+        # Registered after RequestPolicy, so this handler runs first
+        await context.route("**/*", self._handle)
+
+    async def _handle(self, route):
+        request = route.request
+        entry = self._match(request.method, request.url)
+        if entry is None:
+            self.counters["missing"] += 1
+            await route.abort("internetdisconnected")
+            return
+        self.counters["fulfilled"] += 1
+        await route.fulfill(
+            status=entry["status"],
+            headers=entry["headers"],
+            body=base64.b64decode(entry["body"]),
+        )
+
+    async def finish(self):
+        pass
+
+
+async def record(url: str, path: Path):
+    from src.services.scraper_service import ScraperService
+
+    service = ScraperService()
+    recorder = FixtureRecorder(url)
+    try:
+        result = await service.scrape_url(url, fixture=recorder)
+    finally:
+        await service.stop()
+    recorder.fixture.save(path)
+    print(f"Saved {path}: {recorder.fixture.stats()} (scrape status: {result.get('status')})")
+
+
+async def replay(path: Path):
+    from src.services.scraper_service import ScraperService
+
+    fixture = ScrapeFixture.load(path)
+    service = ScraperService()
+    replayer = FixtureReplayer(fixture)
+    try:
+        result = await service.scrape_url(fixture.url, fixture=replayer)
+    finally:
+        await service.stop()
+    print(f"Status: {result.get('status')}, reviews: {len(result.get('reviews') or [])}, "
+          f"text: {len(result.get('raw_text') or '')} chars")
+    print(f"Replay: {replayer.counters}")
+    print(json.dumps(result.get("metrics"), ensure_ascii=False, indent=2))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    sub = parser.add_subparsers(dest="command", required=True)
+    rec = sub.add_parser("record")
+    rec.add_argument("url")
+    rec.add_argument("--name", required=True)
+    rec.add_argument("--dir", type=Path, default=DEFAULT_DIR)
+    rep = sub.add_parser("replay")
+    rep.add_argument("path", type=Path)
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+    if args.command == "record":
+        asyncio.run(record(args.url, args.dir / f"{args.name}.json.gz"))
+    else:
+        asyncio.run(replay(args.path))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,151 @@
+"""
+Build a deterministic, synthetic Google Maps scrape fixture.
+
+The fixture (same format as src/devtools/scrape_fixtures.py records) serves
+a minimal place page that uses the selectors and RPC shapes ScraperService
+reads: a "評論" tab, a scrollable div[role="feed"] with the first page of
+[data-review-id] elements inline, and further pages loaded on scroll from a
+listugcposts RPC (XSSI-prefixed, laid out as maps_rpc.REVIEW_PATHS expects).
+Every review is therefore seen once via the DOM collector and, except the
+first page, once via the RPC decoder.
+
+It exists so the replay benchmark and the test scripts run offline without
+a live recording; record a real place with `scrape_fixtures record` when
+network access is available.
+
+Usage:
+    python -m src.devtools.synthetic_maps_fixture --name synthetic_maps_place
+"""
+import argparse
+import base64
+import html
+import json
+import random
+from pathlib import Path
+
+from src.devtools.scrape_fixtures import DEFAULT_DIR, ScrapeFixture
+from src.services.maps_rpc import REVIEW_RPC_PATTERN, XSSI_PREFIX
+
+FIXTURE_URL = "https://www.google.com/maps/place/InsightX+Fixture+Pizzeria/data=!4m2!3m1!1s0x0:0x1f2e3d"
+RPC_URL = f"https://www.google.com/maps/rpc/{REVIEW_RPC_PATTERN}?authuser=0&hl=zh-TW&page={{page}}"
+
+PHRASES = [
+    "披薩餅皮烤得很香脆", "柴燒窯的味道很明顯", "店員很親切會主動介紹", "假日人很多要等一個小時",
+    "停車位不好找", "價格偏高但份量足夠", "環境乾淨有質感", "出餐速度有點慢", "提拉米蘇很推薦",
+    "義大利麵偏鹹", "適合家庭聚餐", "座位有點擠", "會想再來", "服務生忙不過來", "起司很濃郁",
+]
+REPLIES = ["感謝您的支持，期待再次光臨！", "很抱歉讓您久候，我們會加強尖峰時段的人力。"]
+
+PAGE_JS = """
+const feed = document.querySelector('div[role="feed"]');
+let page = 1, loading = false;
+const escape = (s) => s.replace(/[&<>"]/g, (c) => ({'&': '&amp;', '<': '&lt;', '>': '&gt;', '"': '&quot;'}[c]));
+function render(r) {
+    const reply = r.reply ? `<div class="CDe7pd"><span class="wiI7pd">${escape(r.reply)}</span></div>` : '';
+    return `<div class="jftiEf" data-review-id="${r.id}"><div class="d4r55">${escape(r.author)}</div>` +
+        `<span role="img" aria-label="${r.rating} 顆星"></span><span class="rsqaWe">${escape(r.time)}</span>` +
+        `<div class="MyEned"><span class="wiI7pd">${escape(r.text)}</span></div>${reply}</div>`;
+}
+async function loadMore() {
+    if (loading || page >= PAGES) return;
+    loading = true;
+    const body = await (await fetch(RPC_URL.replace('{page}', page))).text();
+    const payload = JSON.parse(body.slice(XSSI.length));
+    feed.insertAdjacentHTML('beforeend', payload[2].map((entry) => {
+        const e = entry[0];
+        return render({id: e[0], author: e[1][4][5][0], time: e[1][6], rating: e[2][0][0],
+                       text: e[2][15][0][0], reply: e[3] ? e[3][14][0][0] : ''});
+    }).join(''));
+    page += 1;
+    loading = false;
+}
+feed.addEventListener('scroll', () => {
+    if (feed.scrollTop + feed.clientHeight >= feed.scrollHeight - 50) loadMore();
+});
+"""
+
+
+def _reviews(count: int, seed: int):
+    rng = random.Random(seed)
+    newest = 1_760_000_000
+    reviews = []
+    for i in range(count):
+        text = "，".join(rng.choice(PHRASES) for _ in range(rng.randint(2, 6))) + "。"
+        reviews.append({
+            "id": f"ChZDSUhNMG9nS0VJQ0FnSUR{i:05d}",
+            "author": f"評論者 {i + 1}",
+            "rating": rng.choice([1, 2, 3, 4, 4, 5, 5, 5]),
+            "time": f"{i // 3 + 1} 週前",
+            "timestamp": newest - i * 86400 * 2,
+            "text": text,
+            "reply": rng.choice(REPLIES) if i % 4 == 0 else "",
+        })
+    return reviews
+
+
+def _rpc_entry(review: dict):
+    # Only the positions listed in maps_rpc.REVIEW_PATHS are filled in
+    meta = [None, None, review["timestamp"] * 1_000_000, None,
+            [None, None, None, None, None, [review["author"]]], None, review["time"]]
+    body = [[review["rating"]]] + [None] * 13 + [["zh-Hant"], [[review["text"]]]]
+    reply = [None] * 14 + [[[review["reply"]]]] if review["reply"] else None
+    return [[review["id"], meta, body, reply]]
+
+
+def _review_html(review: dict) -> str:
+    esc = html.escape
+    reply = (f'<div class="CDe7pd"><span class="wiI7pd">{esc(review["reply"])}</span></div>'
+             if review["reply"] else "")
+    return (f'<div class="jftiEf" data-review-id="{review["id"]}"><div class="d4r55">{esc(review["author"])}</div>'
+            f'<span role="img" aria-label="{review["rating"]} 顆星"></span><span class="rsqaWe">{esc(review["time"])}</span>'
+            f'<div class="MyEned"><span class="wiI7pd">{esc(review["text"])}</span></div>{reply}</div>')
+
+
+def _entry(url: str, content_type: str, body: str):
+    return {
+        "method": "GET",
+        "url": url,
+        "status": 200,
+        "headers": {"content-type": content_type},
+        "body": base64.b64encode(body.encode("utf-8")).decode("ascii"),
+    }
+
+
+def build_fixture(reviews: int = 50, page_size: int = 10, seed: int = 7) -> ScrapeFixture:
+    records = _reviews(reviews, seed)
+    pages = [records[i:i + page_size] for i in range(0, len(records), page_size)]
+    script = (f"const PAGES = {len(pages)}; const RPC_URL = {json.dumps(RPC_URL)}; "
+              f"const XSSI = {json.dumps(XSSI_PREFIX)};" + PAGE_JS)
+    document = (
+        '<!DOCTYPE html><html lang="zh-TW"><head><meta charset="utf-8"><title>InsightX Fixture Pizzeria - Google 地圖</title>'
+        '<style>div[role="feed"]{height:600px;overflow-y:auto}.jftiEf{min-height:120px}</style></head><body>'
+        '<h1>InsightX Fixture Pizzeria</h1><button aria-label="評論">評論</button>'
+        '<div class="m6QErb" role="feed" aria-label="評論">'
+        + "".join(_review_html(r) for r in pages[0])
+        + f"</div><script>{script}</script></body></html>"
+    )
+    entries = [_entry(FIXTURE_URL, "text/html; charset=utf-8", document)]
+    for index, page in enumerate(pages[1:], start=1):
+        payload = [None, None, [_rpc_entry(r) for r in page]]
+        entries.append(_entry(RPC_URL.format(page=index), "application/json; charset=utf-8",
+                              XSSI_PREFIX + "\n" + json.dumps(payload, ensure_ascii=False)))
+    # Fixed so a regenerated fixture carries the same content
+    return ScrapeFixture(FIXTURE_URL, entries, recorded_at=1_760_000_000)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--name", default="synthetic_maps_place")
+    parser.add_argument("--dir", type=Path, default=DEFAULT_DIR)
+    parser.add_argument("--reviews", type=int, default=50)
+    parser.add_argument("--page-size", type=int, default=10)
+    args = parser.parse_args()
+
+    fixture = build_fixture(args.reviews, args.page_size)
+    path = args.dir / f"{args.name}.json.gz"
+    fixture.save(path)
+    print(f"Saved {path}: {fixture.stats()}")
+
+
+if __name__ == "__main__":
+    main()
@@ -5,12 +5,23 @@ import asyncio
 if sys.platform == 'win32':
     asyncio.set_event_loop_policy(asyncio.WindowsProactorEventLoopPolicy())
 
+from contextlib import asynccontextmanager
 from fastapi import FastAPI
 from fastapi.staticfiles import StaticFiles
-from src.api.routes import router
+from src.api.routes import router, scraper, jobs
 import uvicorn
 
-app = FastAPI(title="InsightX API")
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Shared Chromium lives for the whole app instead of one launch per scrape
+    await scraper.start()
+    # Scrape/analysis workers run in the background, sized by JOB_WORKERS
+    await jobs.start()
+    yield
+    await jobs.stop()
+    await scraper.stop()
+
+app = FastAPI(title="InsightX API", lifespan=lifespan)
 
 # API Routes
 app.include_router(router, prefix="/api")
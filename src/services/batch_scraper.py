@@ -0,0 +1,150 @@
+import os
+import time
+import random
+import asyncio
+import logging
+from contextlib import asynccontextmanager
+from urllib.parse import urlsplit
+
+logger = logging.getLogger(__name__)
+
+
+class HostLimiter:
+    """
+    Per-host politeness: at most `per_host` requests in flight to one host,
+    and consecutive starts against a host spaced by `delay` seconds plus up
+    to `jitter` seconds of random slack.
+    """
+
+    def __init__(self, per_host: int = 2, delay: float = 1.0, jitter: float = 0.5):
+        self.per_host = per_host
+        self.delay = delay
+        self.jitter = jitter
+        self._slots = {}
+        self._next_start = {}
+        self._locks = {}
+        self.waited = 0.0
+
+    def _host_state(self, host):
+        if host not in self._slots:
+            self._slots[host] = asyncio.Semaphore(self.per_host)
+            self._locks[host] = asyncio.Lock()
+            self._next_start[host] = 0.0
+        return self._slots[host], self._locks[host]
+
+    async def acquire(self, host: str):
+        slots, lock = self._host_state(host)
+        await slots.acquire()
+        try:
+            # Reserve the next start time under the lock, sleep outside it
+            async with lock:
+                now = time.monotonic()
+                start_at = max(now, self._next_start[host])
+                self._next_start[host] = start_at + self.delay + random.uniform(0, self.jitter)
+            if start_at > now:
+                self.waited += start_at - now
+                await asyncio.sleep(start_at - now)
+        except BaseException:
+            slots.release()
+            raise
+
+    def release(self, host: str):
+        self._slots[host].release()
+
+    @asynccontextmanager
+    async def throttle(self, url: str):
+        """Holds a politeness slot for url's host around one network request."""
+        host = (urlsplit(url).hostname or "").lower()
+        await self.acquire(host)
+        try:
+            yield
+        finally:
+            self.release(host)
+
+
+class BatchScraper:
+    """
+    Runs one coroutine per location with a global concurrency cap,
+    yielding each location's outcome as soon as it completes (not in input
+    order). Per-host politeness is applied by the work itself, only around
+    requests that actually hit the network, so locations served from the
+    scrape cache are not delayed.
+    """
+
+    def __init__(self, max_concurrency: int = 4, per_host: int = 2, delay: float = 1.0, jitter: float = 0.5):
+        self.max_concurrency = max_concurrency
+        self.per_host = per_host
+        self.delay = delay
+        self.jitter = jitter
+        self.counters = {
+            "batches": 0,
+            "locations": 0,
+            "failures": 0,
+        }
+        self.last_batch = None
+
+    @classmethod
+    def from_env(cls):
+        return cls(
+            max_concurrency=int(os.getenv("BATCH_MAX_CONCURRENCY", os.getenv("SCRAPER_MAX_PAGES", "4"))),
+            per_host=int(os.getenv("BATCH_PER_HOST", "2")),
+            delay=float(os.getenv("BATCH_HOST_DELAY", "1.0")),
+            jitter=float(os.getenv("BATCH_HOST_JITTER", "0.5")),
+        )
+
+    async def run(self, items: list, work):
+        """
+        Awaits work(item, throttle) for every item and yields
+        {"index", "item", "result" | "error", "elapsed_ms"} as each finishes.
+        throttle(url) is an async context manager the work must hold around
+        each network scrape (HostLimiter.throttle, shared by the batch).
+        """
+        limiter = HostLimiter(self.per_host, self.delay, self.jitter)
+        slots = asyncio.Semaphore(self.max_concurrency)
+        self.counters["batches"] += 1
+
+        async def run_one(index, item):
+            async with slots:
+                started = time.perf_counter()
+                try:
+                    outcome = {"result": await work(item, limiter.throttle)}
+                except Exception as e:
+                    logger.warning(f"Batch item {index} failed: {e}")
+                    outcome = {"error": str(e)}
+            return {
+                "index": index,
+                "item": item,
+                **outcome,
+                "elapsed_ms": round((time.perf_counter() - started) * 1000),
+            }
+
+        started = time.perf_counter()
+        done = 0
+        tasks = [asyncio.ensure_future(run_one(i, item)) for i, item in enumerate(items)]
+        try:
+            for next_done in asyncio.as_completed(tasks):
+                outcome = await next_done
+                done += 1
+                self.counters["locations"] += 1
+                if "error" in outcome:
+                    self.counters["failures"] += 1
+                yield outcome
+        finally:
+            for task in tasks:
+                task.cancel()
+            elapsed = time.perf_counter() - started
+            self.last_batch = {
+                "locations": done,
+                "elapsed_s": round(elapsed, 2),
+                "locations_per_minute": round(done * 60 / elapsed, 2) if elapsed > 0 else None,
+                "politeness_wait_s": round(limiter.waited, 2),
+            }
+
+    def stats(self):
+        return {
+            **self.counters,
+            "max_concurrency": self.max_concurrency,
+            "per_host": self.per_host,
+            "host_delay": self.delay,
+            "last_batch": self.last_batch,
+        }
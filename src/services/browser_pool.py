@@ -0,0 +1,177 @@
+import os
+import asyncio
+import logging
+from contextlib import asynccontextmanager
+from playwright.async_api import async_playwright
+
+logger = logging.getLogger(__name__)
+
+
+class BrowserPool:
+    """
+    Long-lived Chromium shared by all scrape jobs.
+
+    Each job leases a fresh, isolated browser context (own cookies, storage
+    and user agent) instead of launching a browser. Concurrent pages are
+    capped at max_pages. The browser is replaced after recycle_after jobs or
+    as soon as it is found disconnected; a retired browser is closed once
+    its last lease is returned.
+    """
+
+    def __init__(self, max_pages: int = 4, recycle_after: int = 50, headless: bool = True):
+        self.max_pages = max_pages
+        self.recycle_after = recycle_after
+        self.headless = headless
+
+        self._playwright = None
+        self._browser = None
+        self._browser_jobs = 0
+        self._leases = {}
+        self._holds = {}
+        self._background = set()
+        self._pages = asyncio.Semaphore(max_pages)
+        self._lock = asyncio.Lock()
+        self.counters = {
+            "launches": 0,
+            "recycles": 0,
+            "crashes": 0,
+            "leases": 0,
+        }
+
+    @classmethod
+    def from_env(cls):
+        return cls(
+            max_pages=int(os.getenv("SCRAPER_MAX_PAGES", "4")),
+            recycle_after=int(os.getenv("SCRAPER_BROWSER_RECYCLE_JOBS", "50")),
+            headless=os.getenv("SCRAPER_HEADLESS", "1") != "0",
+        )
+
+    async def start(self):
+        """Starts Playwright and launches the first browser."""
+        async with self._lock:
+            await self._ensure_browser()
+
+    async def stop(self):
+        if self._background:
+            await asyncio.gather(*self._background, return_exceptions=True)
+        async with self._lock:
+            browsers = set(self._leases) | ({self._browser} if self._browser else set())
+            for browser in browsers:
+                await self._close(browser)
+            self._browser = None
+            self._leases.clear()
+            if self._playwright is not None:
+                await self._playwright.stop()
+                self._playwright = None
+
+    @asynccontextmanager
+    async def lease(self, **context_options):
+        """
+        Yields a new browser context; it is closed when the job ends, or
+        once the work registered with hold() has finished.
+        """
+        async with self._pages:
+            browser = await self._acquire_browser()
+            handed_off = False
+            try:
+                try:
+                    context = await browser.new_context(**context_options)
+                except Exception:
+                    if browser.is_connected():
+                        raise
+                    # Browser died between jobs: retry once on a fresh one
+                    await self._release_browser(browser)
+                    browser = await self._acquire_browser()
+                    context = await browser.new_context(**context_options)
+
+                self.counters["leases"] += 1
+                try:
+                    yield context
+                finally:
+                    held = self._holds.pop(context, None)
+                    if held is not None:
+                        handed_off = True
+                        task = asyncio.ensure_future(self._close_after(held, context, browser))
+                        self._background.add(task)
+                        task.add_done_callback(self._background.discard)
+                    else:
+                        await self._close_context(context)
+            finally:
+                if not handed_off:
+                    await self._release_browser(browser)
+
+    def hold(self, context, awaitable):
+        """
+        Keeps a leased context open after the lease ends until awaitable
+        finishes (e.g. a debug screenshot), so the caller need not wait for it.
+        The page slot is freed right away; only the context and browser wait.
+        """
+        self._holds[context] = asyncio.ensure_future(awaitable)
+
+    async def _close_after(self, held, context, browser):
+        try:
+            await asyncio.gather(held, return_exceptions=True)
+        finally:
+            await self._close_context(context)
+            await self._release_browser(browser)
+
+    async def _close_context(self, context):
+        try:
+            await context.close()
+        except Exception:
+            pass
+
+    async def _acquire_browser(self):
+        async with self._lock:
+            if self._browser is not None and not self._browser.is_connected():
+                logger.warning("Browser disconnected, relaunching")
+                self.counters["crashes"] += 1
+                self._retire(self._browser)
+            elif self._browser is not None and self._browser_jobs >= self.recycle_after:
+                logger.info(f"Recycling browser after {self._browser_jobs} jobs")
+                self.counters["recycles"] += 1
+                self._retire(self._browser)
+
+            browser = await self._ensure_browser()
+            self._browser_jobs += 1
+            self._leases[browser] = self._leases.get(browser, 0) + 1
+            return browser
+
+    async def _release_browser(self, browser):
+        async with self._lock:
+            remaining = self._leases.get(browser, 1) - 1
+            if remaining > 0 or browser is self._browser:
+                self._leases[browser] = remaining
+                return
+            self._leases.pop(browser, None)
+        await self._close(browser)
+
+    async def _ensure_browser(self):
+        if self._playwright is None:
+            self._playwright = await async_playwright().start()
+        if self._browser is None:
+            self._browser = await self._playwright.chromium.launch(headless=self.headless)
+            self._browser_jobs = 0
+            self.counters["launches"] += 1
+        return self._browser
+
+    def _retire(self, browser):
+        self._browser = None
+        if not self._leases.get(browser):
+            self._leases.pop(browser, None)
+            asyncio.ensure_future(self._close(browser))
+
+    async def _close(self, browser):
+        try:
+            await browser.close()
+        except Exception as e:
+            logger.debug(f"Error closing browser: {e}")
+
+    def stats(self):
+        return {
+            **self.counters,
+            "max_pages": self.max_pages,
+            "active_leases": sum(self._leases.values()),
+            "browser_jobs": self._browser_jobs,
+            "browser_connected": bool(self._browser and self._browser.is_connected()),
+        }
@@ -0,0 +1,98 @@
+import os
+import re
+import json
+import time
+import uuid
+import random
+import shutil
+import asyncio
+import logging
+
+from src.services.latency_window import LatencyWindow
+
+logger = logging.getLogger(__name__)
+
+
+class DebugArtifacts:
+    """
+    Opt-in debug screenshots for scrapes.
+
+    A scrape is captured when its caller asks for it (debug=True) or, with
+    debug left unset, for a sample_rate fraction of scrapes. Each capture
+    goes to its own directory (screenshot.png + scrape.json) under
+    `directory`; only the newest max_dirs directories are kept.
+    """
+
+    def __init__(self, directory: str = ".cache/debug", sample_rate: float = 0.0,
+                 max_dirs: int = 50, timeout: float = 10.0):
+        self.directory = directory
+        self.sample_rate = sample_rate
+        self.max_dirs = max_dirs
+        self.timeout = timeout
+        self.screenshot_latency = LatencyWindow()
+        self.counters = {
+            "captures": 0,
+            "failures": 0,
+            "pruned": 0,
+        }
+
+    @classmethod
+    def from_env(cls):
+        return cls(
+            directory=os.getenv("SCRAPER_DEBUG_DIR", ".cache/debug"),
+            sample_rate=float(os.getenv("SCRAPER_DEBUG_SAMPLE_RATE", "0")),
+            max_dirs=int(os.getenv("SCRAPER_DEBUG_MAX_DIRS", "50")),
+        )
+
+    def wanted(self, debug: bool | None = None) -> bool:
+        if debug is not None:
+            return debug
+        return self.sample_rate > 0 and random.random() < self.sample_rate
+
+    def artifact_dir(self, artifact_id: str | None = None) -> str:
+        if artifact_id:
+            name = re.sub(r"[^\w.-]", "_", artifact_id)
+        else:
+            name = f"{time.strftime('%Y%m%d-%H%M%S')}-{uuid.uuid4().hex[:8]}"
+        return os.path.join(self.directory, name)
+
+    async def capture(self, page, path: str, summary: dict):
+        """Screenshots the page and writes it with a JSON summary to path."""
+        started = time.perf_counter()
+        try:
+            png = await asyncio.wait_for(page.screenshot(type="png"), self.timeout)
+        except Exception as e:
+            self.counters["failures"] += 1
+            logger.warning(f"Debug screenshot failed: {e}")
+            return
+        elapsed = time.perf_counter() - started
+        elapsed_ms = round(elapsed * 1000, 1)
+        self.screenshot_latency.add(elapsed)
+        self.counters["captures"] += 1
+        await asyncio.to_thread(self._write, path, png, {**summary, "screenshot_ms": elapsed_ms})
+
+    def _write(self, path, png, summary):
+        os.makedirs(path, exist_ok=True)
+        with open(os.path.join(path, "screenshot.png"), "wb") as f:
+            f.write(png)
+        with open(os.path.join(path, "scrape.json"), "w", encoding="utf-8") as f:
+            json.dump(summary, f, ensure_ascii=False, indent=2, default=str)
+        self._prune()
+
+    def _prune(self):
+        try:
+            entries = [e for e in os.scandir(self.directory) if e.is_dir()]
+        except FileNotFoundError:
+            return
+        entries.sort(key=lambda e: e.stat().st_mtime, reverse=True)
+        for entry in entries[self.max_dirs:]:
+            shutil.rmtree(entry.path, ignore_errors=True)
+            self.counters["pruned"] += 1
+
+    def stats(self):
+        return {
+            **self.counters,
+            "sample_rate": self.sample_rate,
+            "screenshot_ms_avg": self.screenshot_latency.mean_ms(),
+            "screenshot_ms_p95": self.screenshot_latency.percentile_ms(0.95),
+        }
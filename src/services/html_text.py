@@ -0,0 +1,144 @@
+import os
+import logging
+from html.parser import HTMLParser
+
+logger = logging.getLogger(__name__)
+
+# Optional C-backed parsers; the streaming extractor works without either
+try:
+    from selectolax.lexbor import LexborHTMLParser
+except ImportError:
+    LexborHTMLParser = None
+
+try:
+    import lxml.html
+    from lxml import etree
+except ImportError:
+    lxml = None
+
+SKIPPED_TAGS = ("script", "style", "noscript", "template")
+DEFAULT_MAX_LINES = 500
+
+
+def _clean_lines(text: str, max_lines: int) -> list[str]:
+    lines = []
+    for line in text.splitlines():
+        line = line.strip()
+        if line:
+            lines.append(line)
+            if len(lines) >= max_lines:
+                break
+    return lines
+
+
+class _TextStream(HTMLParser):
+    """Collects text nodes outside script/style subtrees; no tree is built."""
+
+    def __init__(self, max_lines: int):
+        super().__init__(convert_charrefs=True)
+        self.max_lines = max_lines
+        self.lines = []
+        self._skip_depth = 0
+        # A text node can arrive in several pieces when fed in chunks
+        self._pending = []
+
+    def _flush(self):
+        if self._pending:
+            text = "".join(self._pending)
+            self._pending = []
+            if not self.full:
+                self.lines.extend(_clean_lines(text, self.max_lines - len(self.lines)))
+
+    def handle_starttag(self, tag, attrs):
+        self._flush()
+        if tag in SKIPPED_TAGS:
+            self._skip_depth += 1
+
+    def handle_endtag(self, tag):
+        self._flush()
+        if tag in SKIPPED_TAGS and self._skip_depth:
+            self._skip_depth -= 1
+
+    def handle_data(self, data):
+        if not self._skip_depth:
+            self._pending.append(data)
+
+    def close(self):
+        super().close()
+        self._flush()
+
+    @property
+    def full(self) -> bool:
+        return len(self.lines) >= self.max_lines
+
+
+def _extract_stream(html: str, max_lines: int, chunk_size: int = 65536) -> list[str]:
+    parser = _TextStream(max_lines)
+    # Feed in chunks so parsing stops as soon as enough lines were collected
+    for start in range(0, len(html), chunk_size):
+        parser.feed(html[start:start + chunk_size])
+        if parser.full:
+            break
+    parser.close()
+    return parser.lines
+
+
+def _extract_selectolax(html: str, max_lines: int) -> list[str]:
+    tree = LexborHTMLParser(html)
+    tree.strip_tags(list(SKIPPED_TAGS))
+    root = tree.body or tree.root
+    return _clean_lines(root.text(separator="\n") if root else "", max_lines)
+
+
+def _extract_lxml(html: str, max_lines: int) -> list[str]:
+    if not html.strip():
+        return []
+    root = lxml.html.fromstring(html)
+    etree.strip_elements(root, *SKIPPED_TAGS, etree.Comment, with_tail=False)
+    return _clean_lines("\n".join(root.itertext()), max_lines)
+
+
+def _extract_bs4(html: str, max_lines: int) -> list[str]:
+    from bs4 import BeautifulSoup
+
+    soup = BeautifulSoup(html, "html.parser")
+    for tag in soup(list(SKIPPED_TAGS)):
+        tag.decompose()
+    return _clean_lines(soup.get_text(separator="\n"), max_lines)
+
+
+BACKENDS = {
+    "selectolax": _extract_selectolax,
+    "lxml": _extract_lxml,
+    "stream": _extract_stream,
+    "bs4": _extract_bs4,
+}
+
+
+def available_backends() -> list[str]:
+    names = []
+    if LexborHTMLParser is not None:
+        names.append("selectolax")
+    if lxml is not None:
+        names.append("lxml")
+    return names + ["stream", "bs4"]
+
+
+def resolve_backend(name: str | None = None) -> str:
+    """
+    Picks the parser backend: an explicit name, else SCRAPER_HTML_PARSER,
+    else ("auto") the fastest one installed.
+    """
+    name = (name or os.getenv("SCRAPER_HTML_PARSER", "auto")).lower()
+    available = available_backends()
+    if name == "auto":
+        return available[0]
+    if name not in available:
+        logger.warning(f"HTML parser backend {name!r} unavailable, using {available[0]}")
+        return available[0]
+    return name
+
+
+def extract_text(html: str, backend: str | None = None, max_lines: int = DEFAULT_MAX_LINES) -> str:
+    """Visible page text, one non-empty stripped line per text node, capped at max_lines."""
+    return "\n".join(BACKENDS[resolve_backend(backend)](html, max_lines))
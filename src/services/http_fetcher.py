@@ -0,0 +1,127 @@
+import os
+import logging
+from collections import Counter
+
+import httpx
+
+from src.services.latency_window import LatencyWindow
+from src.services.review_text import estimate_tokens
+
+logger = logging.getLogger(__name__)
+
+# Pages that render nothing without JavaScript
+JS_REQUIRED_MARKERS = (
+    "enable javascript",
+    "javascript is disabled",
+    "javascript is required",
+    "請啟用 javascript",
+    "請開啟 javascript",
+)
+
+
+def has_enough_review_text(text: str, min_tokens: int = 400, min_paragraphs: int = 5,
+                           paragraph_tokens: int = 12) -> bool:
+    """
+    Whether static page text already looks like it holds reviews: enough
+    visible text overall and several paragraph-length lines (navigation and
+    menus are short lines), and no "please enable JavaScript" shell.
+    Sizes are in estimated tokens so CJK and Latin pages are judged alike.
+    """
+    if estimate_tokens(text) < min_tokens:
+        return False
+    lowered = text[:5000].lower()
+    if any(marker in lowered for marker in JS_REQUIRED_MARKERS):
+        return False
+    paragraphs = sum(1 for line in text.splitlines() if estimate_tokens(line) >= paragraph_tokens)
+    return paragraphs >= min_paragraphs
+
+
+class TierStats:
+    """Attempts, hits and latency for one fetch tier."""
+
+    def __init__(self, window: int = 200):
+        self.latencies = LatencyWindow(window)
+        self.attempts = 0
+        self.hits = 0
+        self.escalations = Counter()
+
+    def record(self, seconds: float, hit: bool, reason: str | None = None):
+        self.attempts += 1
+        self.latencies.add(seconds)
+        if hit:
+            self.hits += 1
+        elif reason:
+            self.escalations[reason] += 1
+
+    def snapshot(self):
+        return {
+            "attempts": self.attempts,
+            "hits": self.hits,
+            "hit_rate": round(self.hits / self.attempts, 3) if self.attempts else 0.0,
+            "escalations": dict(self.escalations),
+            "latency_p50_ms": self.latencies.percentile_ms(0.50),
+            "latency_p95_ms": self.latencies.percentile_ms(0.95),
+        }
+
+
+class HttpFetcher:
+    """
+    Shared httpx client for the plain-HTTP scrape tier: keep-alive
+    connection pool, gzip/deflate (and brotli when installed), redirects,
+    and a cap on how much of a response body is read.
+    """
+
+    def __init__(self, timeout: float = 10.0, max_connections: int = 20, max_bytes: int = 5_000_000):
+        self.timeout = timeout
+        self.max_connections = max_connections
+        self.max_bytes = max_bytes
+        self._client = None
+
+    @classmethod
+    def from_env(cls):
+        return cls(
+            timeout=float(os.getenv("SCRAPER_HTTP_TIMEOUT", "10")),
+            max_connections=int(os.getenv("SCRAPER_HTTP_MAX_CONNECTIONS", "20")),
+            max_bytes=int(os.getenv("SCRAPER_HTTP_MAX_BYTES", "5000000")),
+        )
+
+    @property
+    def client(self) -> httpx.AsyncClient:
+        if self._client is None:
+            self._client = httpx.AsyncClient(
+                follow_redirects=True,
+                timeout=self.timeout,
+                limits=httpx.Limits(
+                    max_connections=self.max_connections,
+                    max_keepalive_connections=self.max_connections,
+                ),
+                headers={"Accept": "text/html,application/xhtml+xml;q=0.9,*/*;q=0.8"},
+            )
+        return self._client
+
+    async def fetch(self, url: str, user_agent: str | None = None):
+        """
+        Returns (status_code, html). html is None for non-HTML responses;
+        bodies are truncated at max_bytes.
+        """
+        headers = {"User-Agent": user_agent} if user_agent else None
+        async with self.client.stream("GET", url, headers=headers) as response:
+            content_type = response.headers.get("content-type", "")
+            if "html" not in content_type:
+                return response.status_code, None
+            body = bytearray()
+            async for chunk in response.aiter_bytes():
+                body.extend(chunk)
+                if len(body) >= self.max_bytes:
+                    break
+            return response.status_code, bytes(body).decode(response.encoding or "utf-8", errors="replace")
+
+    async def resolve(self, url: str) -> str:
+        """Follows redirects (e.g. a short link) and returns the final URL without reading the body."""
+        async with self.client.stream("GET", url) as response:
+            return str(response.url)
+
+    async def aclose(self):
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
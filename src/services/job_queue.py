@@ -0,0 +1,185 @@
+import os
+import time
+import uuid
+import asyncio
+import logging
+from collections import OrderedDict
+
+logger = logging.getLogger(__name__)
+
+JOB_QUEUED = "queued"
+JOB_RUNNING = "running"
+JOB_DONE = "done"
+JOB_FAILED = "failed"
+
+
+class QueueFullError(Exception):
+    pass
+
+
+class Job:
+    """One background scrape/analysis job and its progress."""
+
+    def __init__(self, payload: dict, key: str | None = None):
+        self.id = uuid.uuid4().hex
+        self.key = key
+        self.payload = payload
+        self.status = JOB_QUEUED
+        self.stage = JOB_QUEUED
+        self.stages = []
+        self.result = None
+        self.error = None
+        self.created_at = time.time()
+        self.started_at = None
+        self.finished_at = None
+        self._stage_started = None
+
+    @property
+    def finished(self) -> bool:
+        return self.status in (JOB_DONE, JOB_FAILED)
+
+    def set_stage(self, stage: str):
+        """Marks the start of a pipeline stage, closing the previous one."""
+        self._close_stage()
+        self.stage = stage
+        self._stage_started = time.perf_counter()
+
+    def _close_stage(self):
+        if self._stage_started is not None:
+            self.stages.append({
+                "stage": self.stage,
+                "ms": round((time.perf_counter() - self._stage_started) * 1000),
+            })
+            self._stage_started = None
+
+    def to_dict(self):
+        now = self.finished_at or time.time()
+        return {
+            "id": self.id,
+            "key": self.key,
+            "status": self.status,
+            "stage": self.stage,
+            "stages": list(self.stages),
+            "payload": self.payload,
+            "result": self.result,
+            "error": self.error,
+            "created_at": self.created_at,
+            "queued_ms": round(((self.started_at or now) - self.created_at) * 1000),
+            "elapsed_ms": round((now - self.started_at) * 1000) if self.started_at else None,
+        }
+
+
+class JobQueue:
+    """
+    Bounded asyncio job queue with a fixed pool of workers.
+
+    Worker concurrency (JOB_WORKERS) is independent of how many HTTP
+    requests the web server handles: submitting only enqueues, and at most
+    `workers` jobs run handler(job) at a time. Jobs submitted with the key
+    of a job that is still queued or running get that job back instead of a
+    new one. Finished jobs are kept for polling until `retention` newer ones
+    have finished.
+    """
+
+    def __init__(self, handler, workers: int = 2, max_queued: int = 100, retention: int = 200):
+        self.handler = handler
+        self.workers = workers
+        self.max_queued = max_queued
+        self.retention = retention
+        self.jobs = OrderedDict()
+        self._active_by_key = {}
+        self._queue = None
+        self._tasks = []
+        self.counters = {
+            "submitted": 0,
+            "rejected": 0,
+            "coalesced": 0,
+            "done": 0,
+            "failed": 0,
+        }
+
+    @classmethod
+    def from_env(cls, handler):
+        return cls(
+            handler,
+            workers=int(os.getenv("JOB_WORKERS", "2")),
+            max_queued=int(os.getenv("JOB_MAX_QUEUED", "100")),
+            retention=int(os.getenv("JOB_RETENTION", "200")),
+        )
+
+    async def start(self):
+        if self._tasks:
+            return
+        self._queue = asyncio.Queue(maxsize=self.max_queued)
+        self._tasks = [asyncio.create_task(self._worker(i)) for i in range(self.workers)]
+
+    async def stop(self):
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+
+    def submit(self, payload: dict, key: str | None = None) -> Job:
+        if self._queue is None:
+            raise RuntimeError("Job queue is not running")
+        if key is not None and key in self._active_by_key:
+            self.counters["coalesced"] += 1
+            return self._active_by_key[key]
+        job = Job(payload, key)
+        try:
+            self._queue.put_nowait(job)
+        except asyncio.QueueFull:
+            self.counters["rejected"] += 1
+            raise QueueFullError(f"{self.max_queued} jobs already queued")
+        self.jobs[job.id] = job
+        if key is not None:
+            self._active_by_key[key] = job
+        self.counters["submitted"] += 1
+        return job
+
+    def get(self, job_id: str) -> Job | None:
+        return self.jobs.get(job_id)
+
+    async def _worker(self, index: int):
+        while True:
+            job = await self._queue.get()
+            try:
+                await self._run(job)
+            finally:
+                self._queue.task_done()
+
+    async def _run(self, job: Job):
+        job.status = JOB_RUNNING
+        job.started_at = time.time()
+        try:
+            job.result = await self.handler(job)
+            job.status = JOB_DONE
+        except asyncio.CancelledError:
+            job.status = JOB_FAILED
+            job.error = "cancelled"
+            raise
+        except Exception as e:
+            logger.error(f"Job {job.id} failed in stage {job.stage}: {e}")
+            job.status = JOB_FAILED
+            job.error = str(e)
+        finally:
+            job._close_stage()
+            job.stage = job.status
+            job.finished_at = time.time()
+            if self._active_by_key.get(job.key) is job:
+                del self._active_by_key[job.key]
+            self.counters[job.status] += 1
+            self._evict()
+
+    def _evict(self):
+        finished = [job_id for job_id, job in self.jobs.items() if job.finished]
+        for job_id in finished[:max(0, len(finished) - self.retention)]:
+            del self.jobs[job_id]
+
+    def stats(self):
+        return {
+            **self.counters,
+            "workers": self.workers,
+            "queued": self._queue.qsize() if self._queue else 0,
+            "running": sum(1 for job in self.jobs.values() if job.status == JOB_RUNNING),
+        }
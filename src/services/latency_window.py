@@ -0,0 +1,33 @@
+from collections import deque
+
+
+def _ms(seconds):
+    return round(seconds * 1000, 1) if seconds is not None else None
+
+
+class LatencyWindow:
+    """The most recent durations (seconds) with nearest-rank percentiles, for stats()."""
+
+    def __init__(self, size: int = 200):
+        self.samples = deque(maxlen=size)
+
+    def add(self, seconds: float):
+        self.samples.append(seconds)
+
+    def __len__(self):
+        return len(self.samples)
+
+    def percentile(self, p: float) -> float | None:
+        if not self.samples:
+            return None
+        ordered = sorted(self.samples)
+        return ordered[min(len(ordered) - 1, int(p * len(ordered)))]
+
+    def mean(self) -> float | None:
+        return sum(self.samples) / len(self.samples) if self.samples else None
+
+    def percentile_ms(self, p: float) -> float | None:
+        return _ms(self.percentile(p))
+
+    def mean_ms(self) -> float | None:
+        return _ms(self.mean())
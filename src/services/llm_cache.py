@@ -0,0 +1,157 @@
+import os
+import json
+import time
+import sqlite3
+import asyncio
+import hashlib
+import threading
+import logging
+from collections import OrderedDict
+
+logger = logging.getLogger(__name__)
+
+
+class CachedResponse:
+    """Minimal stand-in for a Gemini response served from the cache."""
+    __slots__ = ("text",)
+
+    def __init__(self, text: str):
+        self.text = text
+
+
+class LLMCache:
+    """
+    Content-addressed cache for LLM completions.
+    Tier 1 is an in-process LRU, tier 2 a SQLite file that survives restarts.
+    Both tiers honour the same TTL; the disk tier is trimmed to max_entries
+    by least-recent access.
+    """
+
+    def __init__(self, path: str | None = None, memory_entries: int = 512,
+                 max_entries: int = 10000, ttl: float = 86400):
+        self.path = path
+        self.memory_entries = memory_entries
+        self.max_entries = max_entries
+        self.ttl = ttl
+
+        self._memory = OrderedDict()
+        self._lock = threading.Lock()
+        self._conn = None
+        self.counters = {
+            "memory_hits": 0,
+            "disk_hits": 0,
+            "misses": 0,
+            "writes": 0,
+            "memory_evictions": 0,
+            "disk_evictions": 0,
+        }
+
+        if path:
+            try:
+                os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+                self._conn = sqlite3.connect(path, check_same_thread=False)
+                self._conn.execute(
+                    "CREATE TABLE IF NOT EXISTS llm_cache ("
+                    "key TEXT PRIMARY KEY, value TEXT NOT NULL, "
+                    "created_at REAL NOT NULL, accessed_at REAL NOT NULL)"
+                )
+                self._conn.execute("CREATE INDEX IF NOT EXISTS idx_llm_cache_accessed ON llm_cache (accessed_at)")
+                self._conn.commit()
+            except sqlite3.Error as e:
+                logger.warning(f"LLM disk cache disabled ({path}): {e}")
+                self._conn = None
+
+    @classmethod
+    def from_env(cls):
+        return cls(
+            path=os.getenv("LLM_CACHE_PATH", ".cache/llm_cache.sqlite3"),
+            memory_entries=int(os.getenv("LLM_CACHE_MEMORY_ENTRIES", "512")),
+            max_entries=int(os.getenv("LLM_CACHE_MAX_ENTRIES", "10000")),
+            ttl=float(os.getenv("LLM_CACHE_TTL", "86400")),
+        )
+
+    @staticmethod
+    def make_key(model: str, prompt: str, generation_config: dict | None = None) -> str:
+        payload = json.dumps(
+            {"model": model, "prompt": prompt, "config": generation_config or {}},
+            sort_keys=True, ensure_ascii=False, default=str
+        )
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    async def get(self, key: str) -> str | None:
+        now = time.time()
+        entry = self._memory.get(key)
+        if entry is not None:
+            value, created_at = entry
+            if now - created_at <= self.ttl:
+                self._memory.move_to_end(key)
+                self.counters["memory_hits"] += 1
+                return value
+            del self._memory[key]
+
+        if self._conn is not None:
+            row = await asyncio.to_thread(self._disk_get, key, now)
+            if row is not None:
+                value, created_at = row
+                self._remember(key, value, created_at)
+                self.counters["disk_hits"] += 1
+                return value
+
+        self.counters["misses"] += 1
+        return None
+
+    async def set(self, key: str, value: str):
+        now = time.time()
+        self._remember(key, value, now)
+        self.counters["writes"] += 1
+        if self._conn is not None:
+            await asyncio.to_thread(self._disk_set, key, value, now)
+
+    def _remember(self, key, value, created_at):
+        self._memory[key] = (value, created_at)
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.memory_entries:
+            self._memory.popitem(last=False)
+            self.counters["memory_evictions"] += 1
+
+    def _disk_get(self, key, now):
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT value, created_at FROM llm_cache WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None:
+                return None
+            if now - row[1] > self.ttl:
+                self._conn.execute("DELETE FROM llm_cache WHERE key = ?", (key,))
+                self._conn.commit()
+                return None
+            self._conn.execute("UPDATE llm_cache SET accessed_at = ? WHERE key = ?", (now, key))
+            self._conn.commit()
+            return row
+
+    def _disk_set(self, key, value, now):
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO llm_cache (key, value, created_at, accessed_at) VALUES (?, ?, ?, ?)",
+                (key, value, now, now)
+            )
+            expired = self._conn.execute(
+                "DELETE FROM llm_cache WHERE created_at < ?", (now - self.ttl,)
+            ).rowcount
+            overflow = self._conn.execute(
+                "DELETE FROM llm_cache WHERE key IN ("
+                "SELECT key FROM llm_cache ORDER BY accessed_at DESC LIMIT -1 OFFSET ?)",
+                (self.max_entries,)
+            ).rowcount
+            self._conn.commit()
+        self.counters["disk_evictions"] += expired + overflow
+
+    def stats(self):
+        lookups = self.counters["memory_hits"] + self.counters["disk_hits"] + self.counters["misses"]
+        hits = lookups - self.counters["misses"]
+        return {
+            **self.counters,
+            "hit_rate": round(hits / lookups, 3) if lookups else 0.0,
+            "memory_entries": len(self._memory),
+            "disk_enabled": self._conn is not None,
+        }
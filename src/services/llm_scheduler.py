@@ -0,0 +1,336 @@
+import os
+import re
+import time
+import heapq
+import random
+import asyncio
+import logging
+import itertools
+from contextlib import asynccontextmanager
+
+import httpx
+
+from src.services.latency_window import LatencyWindow
+
+logger = logging.getLogger(__name__)
+
+# Lower value = served first
+PRIORITY_INTERACTIVE = 0   # /api/chat
+PRIORITY_STANDARD = 1      # single generator endpoints
+PRIORITY_BULK = 2          # review analysis, prefetch
+PRIORITY_NAMES = {
+    PRIORITY_INTERACTIVE: "interactive",
+    PRIORITY_STANDARD: "standard",
+    PRIORITY_BULK: "bulk",
+}
+PRIORITY_BY_NAME = {name: priority for priority, name in PRIORITY_NAMES.items()}
+
+RETRYABLE_STATUS = {429, 500, 502, 503, 504}
+
+
+class TokenBucket:
+    """Classic token bucket refilled continuously at rate_per_minute."""
+
+    def __init__(self, rate_per_minute: float, capacity: float | None = None):
+        self.rate = rate_per_minute / 60.0
+        self.capacity = capacity or rate_per_minute
+        self.tokens = self.capacity
+        self._last = time.monotonic()
+
+    def _refill(self, now):
+        self.tokens = min(self.capacity, self.tokens + (now - self._last) * self.rate)
+        self._last = now
+
+    def wait_time(self, amount: float) -> float:
+        """Seconds until amount tokens are available (0 if they already are)."""
+        now = time.monotonic()
+        self._refill(now)
+        amount = min(amount, self.capacity)
+        if self.tokens >= amount:
+            return 0.0
+        return (amount - self.tokens) / self.rate
+
+    def consume(self, amount: float):
+        self.tokens -= min(amount, self.capacity)
+
+
+class _LaneStats:
+    def __init__(self):
+        self.queued = 0
+        self.dispatched = 0
+        self.wait_total = 0.0
+        self.wait_max = 0.0
+        self.recent_waits = LatencyWindow(500)
+
+    def record_wait(self, seconds):
+        self.dispatched += 1
+        self.wait_total += seconds
+        self.wait_max = max(self.wait_max, seconds)
+        self.recent_waits.add(seconds)
+
+    def snapshot(self):
+        return {
+            "queue_depth": self.queued,
+            "dispatched": self.dispatched,
+            "wait_avg_ms": round(self.wait_total / self.dispatched * 1000, 1) if self.dispatched else 0.0,
+            "wait_p50_ms": self.recent_waits.percentile_ms(0.50) or 0.0,
+            "wait_p95_ms": self.recent_waits.percentile_ms(0.95) or 0.0,
+            "wait_max_ms": round(self.wait_max * 1000, 1),
+        }
+
+
+class Priority:
+    """
+    Priority shared by every attempt (retries, fallbacks, hedges) of one
+    logical call. LLMScheduler.raise_priority() moves its queued attempts
+    to a higher lane, and later attempts start there.
+    """
+
+    def __init__(self, value: int):
+        self.value = value
+
+
+def _level(priority) -> int:
+    return priority.value if isinstance(priority, Priority) else priority
+
+
+class Dispatch:
+    """
+    Dispatch state of one run() call, for callers that time or hedge it.
+    started is the perf_counter() time the current attempt was admitted;
+    it is None while the call is queued or waiting out a retry backoff.
+    """
+
+    def __init__(self):
+        self.started = None
+        self._running = asyncio.Event()
+
+    def admitted(self):
+        self.started = time.perf_counter()
+        self._running.set()
+
+    def requeued(self):
+        self.started = None
+        self._running.clear()
+
+    async def wait_running(self):
+        await self._running.wait()
+
+
+class LLMScheduler:
+    """
+    Admission control for Gemini calls.
+
+    Requests wait in priority lanes and are dispatched when a concurrency
+    slot is free and the RPM/TPM token buckets allow it. The head of the
+    highest-priority lane is always served first; non-interactive lanes may
+    not use the last `interactive_reserved` slots, so chat stays responsive
+    while analysis soaks up the rest. Rate-limit and server errors are
+    retried with exponential backoff and jitter, honouring Retry-After; a 429
+    pauses dispatching for everyone until the advertised delay has passed.
+    """
+
+    def __init__(self, max_in_flight: int = 16, rpm: float = 0, tpm: float = 0,
+                 interactive_reserved: int = 2, max_retries: int = 3,
+                 backoff_base: float = 1.0, backoff_max: float = 30.0):
+        self.max_in_flight = max_in_flight
+        self.interactive_reserved = min(interactive_reserved, max(0, max_in_flight - 1))
+        self.request_bucket = TokenBucket(rpm) if rpm else None
+        self.token_bucket = TokenBucket(tpm) if tpm else None
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+
+        self.in_flight = 0
+        self._heap = []
+        self._seq = itertools.count()
+        self._timer = None
+        self._paused_until = 0.0
+        self.lanes = {priority: _LaneStats() for priority in PRIORITY_NAMES}
+        self.counters = {"retries": 0, "rate_limited": 0, "failures": 0}
+
+    @classmethod
+    def from_env(cls):
+        return cls(
+            max_in_flight=int(os.getenv("LLM_MAX_CONCURRENCY", "16")),
+            rpm=float(os.getenv("LLM_RPM", "0")),
+            tpm=float(os.getenv("LLM_TPM", "0")),
+            interactive_reserved=int(os.getenv("LLM_INTERACTIVE_RESERVED", "2")),
+            max_retries=int(os.getenv("LLM_MAX_RETRIES", "3")),
+            backoff_base=float(os.getenv("LLM_BACKOFF_BASE", "1.0")),
+            backoff_max=float(os.getenv("LLM_BACKOFF_MAX", "30")),
+        )
+
+    async def acquire(self, priority: int | Priority = PRIORITY_STANDARD, tokens: int = 0):
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        level = _level(priority)
+        self.lanes[level].queued += 1
+        # A list so raise_priority() can move the entry to another lane
+        entry = [level, next(self._seq), future, tokens, time.monotonic(), priority]
+        heapq.heappush(self._heap, entry)
+        self._dispatch()
+        try:
+            await future
+        except asyncio.CancelledError:
+            if future.done() and not future.cancelled():
+                # Slot was granted just as the caller went away
+                self.release()
+            else:
+                self.lanes[entry[0]].queued -= 1
+            raise
+
+    def raise_priority(self, priority: Priority, level: int):
+        """
+        Moves a call to a higher-priority lane, e.g. when an interactive
+        caller joins a coalesced call that was started at bulk priority.
+        Attempts already queued are re-queued in the new lane.
+        """
+        if level >= priority.value:
+            return
+        priority.value = level
+        for entry in self._heap:
+            if entry[5] is priority and not entry[2].done():
+                self.lanes[entry[0]].queued -= 1
+                self.lanes[level].queued += 1
+                entry[0] = level
+        heapq.heapify(self._heap)
+        self._dispatch()
+
+    def release(self):
+        self.in_flight -= 1
+        self._dispatch()
+
+    @asynccontextmanager
+    async def slot(self, priority: int | Priority = PRIORITY_STANDARD, tokens: int = 0):
+        await self.acquire(priority, tokens)
+        try:
+            yield
+        finally:
+            self.release()
+
+    async def run(self, fn, priority: int | Priority = PRIORITY_STANDARD, tokens: int = 0,
+                  dispatch: Dispatch | None = None):
+        """
+        Runs fn() (a coroutine function) under admission control with retries.
+        dispatch, if given, is marked admitted whenever an attempt gets its
+        slot and requeued while it backs off before the next one.
+        """
+        attempt = 0
+        while True:
+            async with self.slot(priority, tokens):
+                if dispatch is not None:
+                    dispatch.admitted()
+                try:
+                    return await fn()
+                except Exception as e:
+                    delay = self.retry_delay(e, attempt)
+                    if delay is None:
+                        raise
+                    if dispatch is not None:
+                        dispatch.requeued()
+            attempt += 1
+            await asyncio.sleep(delay)
+
+    def retry_delay(self, exc: Exception, attempt: int) -> float | None:
+        """
+        Backoff in seconds before retrying a call that failed with exc on
+        its attempt-th retry (0 = first call), or None when it must not be
+        retried. A 429 also pauses dispatching for everyone. Callers that
+        manage their own slot (streams) use this to get run()'s retry policy;
+        the slot must be released before sleeping.
+        """
+        status = _status_code(exc)
+        retryable = status in RETRYABLE_STATUS or isinstance(
+            exc, (httpx.TransportError, asyncio.TimeoutError, ConnectionError))
+        if not retryable or attempt >= self.max_retries:
+            self.counters["failures"] += 1
+            return None
+        delay = self._backoff(attempt, _retry_after(exc))
+        if status == 429:
+            self.counters["rate_limited"] += 1
+            self._paused_until = max(self._paused_until, time.monotonic() + delay)
+        self.counters["retries"] += 1
+        logger.warning(f"LLM call failed ({status or type(exc).__name__}), retry {attempt + 1} in {delay:.1f}s")
+        return delay
+
+    def _backoff(self, attempt, retry_after):
+        if retry_after is not None:
+            return min(self.backoff_max, retry_after) + random.uniform(0, self.backoff_base)
+        # Full jitter: uniform in [0, base * 2^attempt]
+        return random.uniform(0, min(self.backoff_max, self.backoff_base * 2 ** attempt))
+
+    def _dispatch(self):
+        now = time.monotonic()
+        while self._heap:
+            priority, _, future, tokens, enqueued, _ = self._heap[0]
+            if future.cancelled():
+                heapq.heappop(self._heap)
+                continue
+
+            limit = self.max_in_flight
+            if priority != PRIORITY_INTERACTIVE:
+                limit -= self.interactive_reserved
+            if self.in_flight >= limit:
+                return
+
+            wait = max(
+                self._paused_until - now,
+                self.request_bucket.wait_time(1) if self.request_bucket else 0.0,
+                self.token_bucket.wait_time(tokens) if self.token_bucket and tokens else 0.0,
+            )
+            if wait > 0:
+                self._schedule(wait)
+                return
+
+            heapq.heappop(self._heap)
+            if self.request_bucket:
+                self.request_bucket.consume(1)
+            if self.token_bucket and tokens:
+                self.token_bucket.consume(tokens)
+            self.in_flight += 1
+            lane = self.lanes[priority]
+            lane.queued -= 1
+            lane.record_wait(now - enqueued)
+            future.set_result(None)
+
+    def _schedule(self, delay):
+        if self._timer is not None and not self._timer.cancelled():
+            self._timer.cancel()
+        loop = asyncio.get_running_loop()
+        self._timer = loop.call_later(delay, self._dispatch)
+
+    def stats(self):
+        return {
+            "in_flight": self.in_flight,
+            "max_in_flight": self.max_in_flight,
+            "paused_for_s": round(max(0.0, self._paused_until - time.monotonic()), 2),
+            **self.counters,
+            "lanes": {PRIORITY_NAMES[p]: lane.snapshot() for p, lane in self.lanes.items()},
+        }
+
+
+def _status_code(exc):
+    code = getattr(exc, "code", None)
+    if isinstance(code, int):
+        return code
+    response = getattr(exc, "response", None)
+    return getattr(response, "status_code", None)
+
+
+_RETRY_DELAY = re.compile(r"'?retryDelay'?\s*[:=]\s*'?\"?(\d+(?:\.\d+)?)s")
+
+
+def _retry_after(exc):
+    """Seconds the server asked us to wait, from Retry-After or a RetryInfo detail."""
+    response = getattr(exc, "response", None)
+    headers = getattr(response, "headers", None)
+    if headers:
+        value = headers.get("retry-after")
+        if value:
+            try:
+                return float(value)
+            except ValueError:
+                pass
+    match = _RETRY_DELAY.search(str(getattr(exc, "details", "") or exc))
+    return float(match.group(1)) if match else None
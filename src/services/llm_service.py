@@ -1,123 +1,480 @@
 import os
+import re
+import json
+import time
+import asyncio
+import logging
+import contextvars
+from collections import Counter
 import google.genai as genai
 from dotenv import load_dotenv
+from src.services.llm_cache import LLMCache, CachedResponse
+from src.services.singleflight import SingleFlight
+from src.services.llm_scheduler import LLMScheduler, Priority, PRIORITY_BY_NAME
+from src.services.model_router import ModelRouter
+from src.services.review_text import split_reviews, chunk_reviews, estimate_tokens
+from src.services.review_compactor import compact_reviews
+from src.services.review import Review
 
 load_dotenv()
 
+logger = logging.getLogger(__name__)
+
+JSON_CONFIG = {"response_mime_type": "application/json"}
+# Output allowance added to the prompt estimate when charging the TPM bucket
+EXPECTED_OUTPUT_TOKENS = 800
+
+# Priority for every call made from the current context (e.g. action-kit
+# prefetch runs at PRIORITY_BULK); None falls back to the task route's
+PRIORITY_OVERRIDE = contextvars.ContextVar("llm_priority_override", default=None)
+
 class LLMService:
-    def __init__(self):
+    def __init__(self, base_url: str | None = None):
         api_key = os.getenv("GEMINI_API_KEY")
+        # GEMINI_BASE_URL points the real client at a stand-in server
+        # (e.g. python -m src.devtools.fake_gemini) for offline load tests.
+        self.base_url = base_url or os.getenv("GEMINI_BASE_URL")
+        if self.base_url and not api_key:
+            api_key = "fake-key"
+
         if not api_key:
             print("Warning: GEMINI_API_KEY not found in environment variables.")
         else:
-            self.client = genai.Client(api_key=api_key)
-            self.model = self.client.models
+            http_options = genai.types.HttpOptions(base_url=self.base_url) if self.base_url else None
+            self.client = genai.Client(api_key=api_key, http_options=http_options)
+            # Async client: awaiting a completion must not block the event loop
+            self.model = self.client.aio.models
+
+        # Concurrency cap, RPM/TPM buckets, priority lanes and 429 backoff
+        self.scheduler = LLMScheduler.from_env()
+        # Task type -> model chain, fallback, hedging (src/config/model_routes.py)
+        self.router = ModelRouter()
+
+        self.cache = LLMCache.from_env()
+        self.singleflight = SingleFlight()
+        # cache key -> Priority of the in-flight call, raised when a
+        # higher-priority caller joins it
+        self._flight_priority = {}
+
+        # Map-reduce review analysis budget
+        self.analysis_chunk_tokens = int(os.getenv("ANALYSIS_CHUNK_TOKENS", "6000"))
+        self.analysis_max_chunks = int(os.getenv("ANALYSIS_MAX_CHUNKS", "40"))
+        self.analysis_parallel_chunks = int(os.getenv("ANALYSIS_PARALLEL_CHUNKS", "4"))
 
-    def generate_content(self, prompt: str, generation_config: dict | None = None):
+        # Prompt compaction between the scraper output and the analysis prompt
+        self.compaction_target_tokens = int(os.getenv(
+            "COMPACTION_TARGET_TOKENS",
+            str(self.analysis_chunk_tokens * self.analysis_max_chunks)
+        ))
+        self.compaction_review_tokens = int(os.getenv("COMPACTION_REVIEW_TOKENS", "300"))
+        self.compaction_totals = Counter()
+
+    async def generate_content(self, prompt: str, generation_config: dict | None = None,
+                               task: str = "default", priority: int | None = None):
         """
         Generates content using the Gemini model based on the provided prompt.
+        The task type selects the model chain and scheduling priority.
+        Identical (model, prompt, config) requests are answered from the cache
+        (only answers from the route's primary model are cached), and
+        identical requests already in flight share a single Gemini call.
+        Calls are admitted by the scheduler in priority order within the
+        configured concurrency and RPM/TPM limits.
         """
-        if generation_config is None:
-            generation_config = {}
+        if priority is None:
+            priority = PRIORITY_OVERRIDE.get()
+        if priority is None:
+            priority = PRIORITY_BY_NAME[self.router.priority_name(task)]
+        cache_key = self.cache.make_key(self.router.models(task)[0], prompt, generation_config)
+        cached = await self.cache.get(cache_key)
+        if cached is not None:
+            return CachedResponse(cached)
 
-        response = self.model.generate_content(
-            model="gemini-2.5-flash",
-            contents=prompt,
-            **generation_config
+        self._join_flight(cache_key, priority)
+        return await self.singleflight.do(
+            cache_key,
+            lambda: self._call_model(prompt, generation_config, cache_key, task, priority)
         )
+
+    def _join_flight(self, cache_key: str, priority: int):
+        """A caller joining an in-flight call lifts it to its own priority."""
+        flight = self._flight_priority.get(cache_key)
+        if flight is not None:
+            self.scheduler.raise_priority(flight, priority)
+
+    async def _call_model(self, prompt: str, generation_config: dict | None, cache_key: str,
+                          task: str, priority: int):
+        tokens = estimate_tokens(prompt) + EXPECTED_OUTPUT_TOKENS
+        answered_by = []
+        priority = self._flight_priority[cache_key] = Priority(priority)
+
+        async def call_model(model, dispatch):
+            response = await self.scheduler.run(
+                lambda: self.model.generate_content(
+                    model=model,
+                    contents=prompt,
+                    config=generation_config or None
+                ),
+                priority=priority,
+                tokens=tokens,
+                dispatch=dispatch
+            )
+            answered_by.append(model)
+            return response
+
+        try:
+            response = await self.router.call(task, call_model)
+        finally:
+            del self._flight_priority[cache_key]
+
+        # The key names the route's primary model: a fallback model's answer
+        # must not be served as the primary's for the rest of the TTL
+        if response.text and answered_by[-1] == self.router.models(task)[0]:
+            await self.cache.set(cache_key, response.text)
         return response
 
-    async def analyze_content(self, text_content: str):
+    async def stream_content(self, prompt: str, generation_config: dict | None = None,
+                             task: str = "default", priority: int | None = None):
+        """
+        Streams the completion as text chunks via generate_content_stream.
+        A cached or already in-flight completion is yielded as a single chunk;
+        a finished stream from the route's primary model is written back to
+        the cache so the blocking endpoints can reuse it. Until the first chunk has been sent, failures
+        are retried with the scheduler's backoff (a 429 pauses dispatching)
+        and then fall back along the route's model chain; streams are never
+        hedged.
+        """
+        if priority is None:
+            priority = PRIORITY_OVERRIDE.get()
+        if priority is None:
+            priority = PRIORITY_BY_NAME[self.router.priority_name(task)]
+        models = self.router.models(task)
+        cache_key = self.cache.make_key(models[0], prompt, generation_config)
+        cached = await self.cache.get(cache_key)
+        if cached is not None:
+            yield cached
+            return
+
+        # The same prompt is already being generated (e.g. by /api/action-kit
+        # prefetch): wait for that result instead of paying for a second call,
+        # lifting it to this caller's priority if it is still queued.
+        pending = self.singleflight.pending(cache_key)
+        if pending is not None:
+            self._join_flight(cache_key, priority)
+            response = await asyncio.shield(pending)
+            yield response.text
+            return
+
+        chunks = []
+        stats = self.router.stats_for(task)
+        tokens = estimate_tokens(prompt) + EXPECTED_OUTPUT_TOKENS
+        answered_by = None
+        for index, model in enumerate(models):
+            attempt = 0
+            while answered_by is None:
+                usage = None
+                try:
+                    async with self.scheduler.slot(priority, tokens):
+                        # Route latency runs from dispatch, not from enqueue
+                        started = time.perf_counter()
+                        stream = await self.model.generate_content_stream(
+                            model=model,
+                            contents=prompt,
+                            config=generation_config or None
+                        )
+                        async for chunk in stream:
+                            usage = chunk.usage_metadata or usage
+                            if chunk.text:
+                                chunks.append(chunk.text)
+                                yield chunk.text
+                except Exception as e:
+                    if chunks:
+                        stats.counters["errors"] += 1
+                        raise
+                    # Nothing sent yet: same retry/backoff/429 pause as blocking calls
+                    delay = self.scheduler.retry_delay(e, attempt)
+                    if delay is not None:
+                        attempt += 1
+                        await asyncio.sleep(delay)
+                        continue
+                    stats.counters["errors"] += 1
+                    if index == len(models) - 1:
+                        raise
+                    stats.counters["fallbacks"] += 1
+                    logger.warning(f"Route {task}: stream falling back from {model}: {e}")
+                    break
+                stats.record(model, time.perf_counter() - started, usage)
+                answered_by = model
+            if answered_by is not None:
+                break
+
+        if chunks and answered_by == models[0]:
+            await self.cache.set(cache_key, "".join(chunks))
+
+    def stats(self):
+        return {
+            "scheduler": self.scheduler.stats(),
+            "routes": self.router.stats(),
+            "cache": self.cache.stats(),
+            "singleflight": self.singleflight.stats(),
+            "compaction": dict(self.compaction_totals),
+        }
+
+    async def analyze_content(self, content: str | list[Review]):
         """
-        Analyzes the scraped text content using Gemini.
+        Analyzes scraped reviews using Gemini: either a list of Review
+        objects or unstructured scraped text (split into reviews here).
         Returns a JSON structure compatible with the frontend.
+
+        Reviews are first compacted (normalised, de-duplicated, trimmed and
+        packed to COMPACTION_TARGET_TOKENS).
+        Map-reduce: the review corpus is split into token-budgeted chunks,
+        each chunk is analysed in parallel for per-topic review counts, and
+        the counts are merged into the good/bad percentage shape.
         """
-        if not text_content:
+        if not content:
             return {"error": "No content to analyze"}
 
+        if isinstance(content, str):
+            raw_reviews, ratings = split_reviews(content), []
+        else:
+            raw_reviews = [review.prompt_text() for review in content if review.text]
+            ratings = [review.rating for review in content if review.rating is not None]
+        reviews, compaction = compact_reviews(
+            raw_reviews, self.compaction_target_tokens, self.compaction_review_tokens,
+            # A Review's owner reply is its own field, never part of the text
+            strip_replies=isinstance(content, str)
+        )
+        self.compaction_totals.update(compaction)
+        logger.info(
+            f"Compacted {compaction['reviews_in']} -> {compaction['reviews_kept']} reviews, "
+            f"saved ~{compaction['tokens_saved']} tokens"
+        )
+        if not reviews:
+            return {"error": "No content to analyze", "compaction": compaction}
+
+        chunks = chunk_reviews(reviews, self.analysis_chunk_tokens)[:self.analysis_max_chunks]
+        logger.info(f"Analyzing {len(reviews)} reviews in {len(chunks)} chunks")
+
+        limiter = asyncio.Semaphore(self.analysis_parallel_chunks)
+
+        async def map_chunk(chunk):
+            async with limiter:
+                return await self._analyze_chunk(chunk)
+
+        outcomes = await asyncio.gather(*(map_chunk(c) for c in chunks), return_exceptions=True)
+
+        partials = []
+        for chunk, outcome in zip(chunks, outcomes):
+            if isinstance(outcome, Exception):
+                logger.warning(f"Chunk of {len(chunk)} reviews failed: {outcome}")
+            else:
+                partials.append((len(chunk), outcome))
+
+        if not partials:
+            failure = next((o for o in outcomes if isinstance(o, Exception)), None)
+            return {"error": str(failure) if failure else "No content to analyze"}
+
+        result = await self._reduce_partials(partials, total_reviews=len(raw_reviews))
+        result["compaction"] = compaction
+        if ratings:
+            result["rating"] = {"average": round(sum(ratings) / len(ratings), 2), "count": len(ratings)}
+        return result
+
+    async def _analyze_chunk(self, chunk: list[str]):
+        """Map step: per-topic review counts for one chunk of reviews."""
+        numbered = "\n".join(f"[{i + 1}] {review}" for i, review in enumerate(chunk))
         prompt = f"""
-        You are an expert business analyst. Analyze the following customer feedback text scraped from a website.
-        
-        Raw Text:
-        {text_content[:15000]}  # Truncate to safe limit
+        You are an expert business analyst. Below are {len(chunk)} customer reviews scraped from a website, one per [n] marker.
+
+        Reviews:
+        {numbered}
 
         Task:
         1. Identify the platform (Google Maps, Facebook, or Other) based on the text.
-        2. Analyze sentiment (Good/Bad) and extract key topics.
-        3. Provide specific percentages (estimate) for top 3 Good and top 3 Bad user feedback topics.
-        
+        2. For each review, decide which positive and which negative topics it mentions.
+        3. Count how many reviews mention each topic. Use short topic labels in Traditional Chinese (2-6 characters), at most 8 topics per side.
+
         Output JSON exactly in this format (no markdown):
         {{
             "platform": "detected_platform",
-            "total_reviews": "Estimate count based on text or N/A",
-            "good": [
-                {{"label": "Topic 1", "value": 30}},
-                {{"label": "Topic 2", "value": 20}},
-                {{"label": "Topic 3", "value": 10}}
-            ],
-            "bad": [
-                {{"label": "Topic 1", "value": 40}},
-                {{"label": "Topic 2", "value": 20}},
-                {{"label": "Topic 3", "value": 10}}
-            ]
+            "good": [{{"label": "Topic", "count": 3}}],
+            "bad": [{{"label": "Topic", "count": 2}}]
         }}
         """
-        
-        try:
-            response = self.generate_content(prompt, generation_config={"response_mime_type": "application/json"})
-            return response.text
-        except Exception as e:
-            return {"error": str(e)}
+        response = await self.generate_content(prompt, generation_config=JSON_CONFIG, task="analysis")
+        # A malformed reply fails this chunk only, like any other map error
+        return _chunk_partial(_parse_json(response.text))
 
-    async def generate_reply(self, topic: str):
-        prompt = f"Write a polite, professional response to a customer complaining about '{topic}'. Chinese Traditional."
-        response = self.generate_content(prompt)
-        return response.text
+    async def _reduce_partials(self, partials, total_reviews: int):
+        """
+        Reduce step: sums per-chunk topic counts and turns them into the
+        top-3 percentage lists. When more than one chunk was analysed, Gemini
+        is asked to group synonymous labels; counts are always summed locally.
+        """
+        covered = sum(size for size, _ in partials)
+        platforms = Counter(p["platform"] for _, p in partials)
 
-    async def generate_marketing(self, strengths: str):
-         prompt = f"Write a Facebook post highlighting these strengths: {strengths}. Include emojis and hashtags. Chinese Traditional."
-         response = self.generate_content(prompt)
-         return response.text
+        merged = {}
+        for side in ("good", "bad"):
+            counts = Counter()
+            for _, partial in partials:
+                for label, count in partial[side]:
+                    counts[label] += count
+            merged[side] = counts
 
-    async def generate_root_cause_analysis(self, topic: str):
+        if len(partials) > 1:
+            try:
+                merged = await self._group_synonyms(merged)
+            except Exception as e:
+                logger.warning(f"Topic grouping failed, using exact labels: {e}")
+
+        result = {
+            "platform": platforms.most_common(1)[0][0],
+            "total_reviews": f"共分析 {covered} 則評論",
+            "reviews_covered": covered,
+            "reviews_total": total_reviews,
+            "chunks": len(partials),
+        }
+        for side in ("good", "bad"):
+            result[side] = [
+                {"label": label, "value": min(100, round(count * 100 / covered))}
+                for label, count in merged[side].most_common(3)
+            ]
+        return result
+
+    async def _group_synonyms(self, merged):
+        labels = {side: sorted(merged[side]) for side in merged}
         prompt = f"""
+        Group customer feedback topic labels that mean the same thing.
+        Positive labels: {json.dumps(labels["good"], ensure_ascii=False)}
+        Negative labels: {json.dumps(labels["bad"], ensure_ascii=False)}
+
+        Every input label must appear in exactly one group. Pick the clearest label of each group as its name.
+        Output JSON exactly in this format (no markdown):
+        {{
+            "good": [{{"label": "Group name", "members": ["label", "label"]}}],
+            "bad": [{{"label": "Group name", "members": ["label"]}}]
+        }}
+        """
+        response = await self.generate_content(prompt, generation_config=JSON_CONFIG, task="analysis_merge")
+        groups = _parse_json(response.text)
+
+        regrouped = {}
+        for side, counts in merged.items():
+            grouped, seen = Counter(), set()
+            for group in groups.get(side) or []:
+                for member in group.get("members") or []:
+                    if member in counts and member not in seen:
+                        grouped[group["label"]] += counts[member]
+                        seen.add(member)
+            for label, count in counts.items():
+                if label not in seen:
+                    grouped[label] += count
+            regrouped[side] = grouped
+        return regrouped
+
+    # Prompt builders are shared by the blocking generators below and by the
+    # streaming endpoints, which feed them to stream_content().
+
+    def build_reply_prompt(self, topic: str):
+        return f"Write a polite, professional response to a customer complaining about '{topic}'. Chinese Traditional."
+
+    def build_marketing_prompt(self, strengths: str):
+        return f"Write a Facebook post highlighting these strengths: {strengths}. Include emojis and hashtags. Chinese Traditional."
+
+    def build_root_cause_prompt(self, topic: str):
+        return f"""
         You are a business consultant. Analyze the root causes of the following issue reported by customers: '{topic}'.
         Provide a detailed analysis and suggest actionable improvements. Chinese Traditional.
         """
-        response = self.generate_content(prompt)
-        return response.text
-    
-    async def generate_weekly_plan(self, weaknesses: str):
-        prompt = f"""
+
+    def build_weekly_plan_prompt(self, weaknesses: str):
+        return f"""
         You are a business strategist. Create a weekly action plan to address the following weaknesses in restaurant operations: {weaknesses}.
         The plan should include daily tasks and goals. Chinese Traditional.
         """
-        response = self.generate_content(prompt)
-        return response.text
 
-    async def generate_training_script(self, issue: str):
-        prompt = f"""
+    def build_training_script_prompt(self, issue: str):
+        return f"""
         You are a training expert. Create a training script for restaurant staff on the issue: '{issue}'.
         The script should be engaging and informative. Chinese Traditional.
         """
-        response = self.generate_content(prompt)
-        return response.text
 
-    async def generate_internal_email(self, strengths: str, weaknesses: str):
-        prompt = f"""
+    def build_internal_email_prompt(self, strengths: str, weaknesses: str):
+        return f"""
         You are an internal communications expert. Write a professional email to restaurant staff highlighting these strengths: {strengths}.
         Also address these weaknesses: {weaknesses}. Chinese Traditional.
         """
-        response = self.generate_content(prompt)
-        return response.text
 
-    async def chat(self, user_message: str):
+    def build_chat_prompt(self, user_message: str):
         # In a real app, we would pass history here. 
         # For simplicity, we just respond to the current message with system context.
         system_prompt = "You are an AI restaurant strategy consultant. Answer questions about restaurant operations, marketing, and analysis. Be professional and helpful. Chinese Traditional."
         
         # We can construct a combined prompt
-        combined_prompt = f"{system_prompt}\n\nUser: {user_message}\nAI:"
-        
-        response = self.generate_content(combined_prompt)
+        return f"{system_prompt}\n\nUser: {user_message}\nAI:"
+
+    async def generate_reply(self, topic: str):
+        response = await self.generate_content(self.build_reply_prompt(topic), task="reply")
         return response.text
+
+    async def generate_marketing(self, strengths: str):
+        response = await self.generate_content(self.build_marketing_prompt(strengths), task="marketing")
+        return response.text
+
+    async def generate_root_cause_analysis(self, topic: str):
+        response = await self.generate_content(self.build_root_cause_prompt(topic), task="root_cause")
+        return response.text
+    
+    async def generate_weekly_plan(self, weaknesses: str):
+        response = await self.generate_content(self.build_weekly_plan_prompt(weaknesses), task="weekly_plan")
+        return response.text
+
+    async def generate_training_script(self, issue: str):
+        response = await self.generate_content(self.build_training_script_prompt(issue), task="training_script")
+        return response.text
+
+    async def generate_internal_email(self, strengths: str, weaknesses: str):
+        response = await self.generate_content(self.build_internal_email_prompt(strengths, weaknesses), task="internal_email")
+        return response.text
+
+    async def chat(self, user_message: str):
+        response = await self.generate_content(self.build_chat_prompt(user_message), task="chat")
+        return response.text
+
+
+def _parse_json(text: str):
+    """Parses a model JSON reply, tolerating markdown code fences."""
+    cleaned = re.sub(r"^```(?:json)?|```$", "", (text or "").strip()).strip()
+    return json.loads(cleaned)
+
+
+def _count(value) -> int:
+    """Topic count from a model reply: 3, 3.0, "3" and "3則" all give 3; anything else 0."""
+    if isinstance(value, bool):
+        return 0
+    if isinstance(value, (int, float)):
+        return max(0, int(value))
+    match = re.search(r"\d+", str(value or ""))
+    return int(match.group()) if match else 0
+
+
+def _chunk_partial(data) -> dict:
+    """
+    Validates a map-step reply and normalises it to
+    {"platform": str, "good": [(label, count)], "bad": [(label, count)]}.
+    Raises ValueError when the reply does not have the requested shape.
+    """
+    if not isinstance(data, dict):
+        raise ValueError(f"chunk reply is {type(data).__name__}, not an object")
+    partial = {"platform": str(data.get("platform") or "Other")}
+    for side in ("good", "bad"):
+        topics = data.get(side) or []
+        if not isinstance(topics, list) or not all(isinstance(t, dict) for t in topics):
+            raise ValueError(f"chunk reply '{side}' is not a list of topic objects")
+        partial[side] = [
+            (label, _count(topic.get("count")))
+            for topic in topics
+            if (label := str(topic.get("label") or "").strip())
+        ]
+    return partial
@@ -0,0 +1,141 @@
+import json
+import asyncio
+import logging
+from src.services.review import Review
+
+logger = logging.getLogger(__name__)
+
+# Review pages are served by this RPC as XSSI-guarded nested JSON arrays
+REVIEW_RPC_PATTERN = "listugcposts"
+XSSI_PREFIX = ")]}'"
+
+# Positions inside one review entry (entry[0]) of a listugcposts payload.
+# The layout is undocumented; update here when Maps changes it.
+REVIEW_PATHS = {
+    "id": [(0,)],
+    "author": [(1, 4, 5, 0), (1, 4, 0, 4)],
+    "timestamp_us": [(1, 2), (1, 3)],
+    "time": [(1, 6)],
+    "rating": [(2, 0, 0)],
+    "language": [(2, 14, 0)],
+    "text": [(2, 15, 0, 0), (2, 1, 0)],
+    "reply": [(3, 14, 0, 0)],
+}
+
+
+def _dig(value, path):
+    for index in path:
+        if not isinstance(value, list) or index >= len(value):
+            return None
+        value = value[index]
+    return value
+
+
+def _first(entry, field, kind):
+    for path in REVIEW_PATHS[field]:
+        value = _dig(entry, path)
+        if isinstance(value, kind) and not isinstance(value, bool):
+            return value
+    return None
+
+
+def parse_rpc_body(body: str):
+    """Strips the XSSI prefix and decodes the JSON payload (None if it is not JSON)."""
+    body = body.lstrip()
+    if body.startswith(XSSI_PREFIX):
+        body = body[len(XSSI_PREFIX):]
+    try:
+        return json.loads(body)
+    except ValueError:
+        return None
+
+
+def decode_reviews(payload) -> list[Review]:
+    """
+    Turns a listugcposts payload into Reviews. Unlike the DOM collector's,
+    these carry timestamp and language as well. Entries without an id, or
+    without both text and rating, are skipped.
+    """
+    entries = _dig(payload, (2,))
+    if not isinstance(entries, list):
+        return []
+
+    records = []
+    for entry in entries:
+        review = _dig(entry, (0,))
+        review_id = _first(review, "id", str)
+        if not review_id:
+            continue
+        rating = _first(review, "rating", (int, float))
+        text = _first(review, "text", str) or ""
+        if not text and rating is None:
+            continue
+        timestamp_us = _first(review, "timestamp_us", int)
+        records.append(Review(
+            id=review_id,
+            author=_first(review, "author", str) or "",
+            rating=rating,
+            time=_first(review, "time", str) or "",
+            timestamp=timestamp_us // 1_000_000 if timestamp_us else None,
+            language=_first(review, "language", str),
+            text=text.strip(),
+            reply=(_first(review, "reply", str) or "").strip(),
+        ))
+    return records
+
+
+class ReviewRpcCapture:
+    """
+    Listens to page responses and decodes review RPC payloads as they
+    arrive. Records are kept in arrival order and de-duplicated by id.
+    """
+
+    def __init__(self, page):
+        self.page = page
+        self.records = {}
+        self._tasks = set()
+        self.counters = {
+            "responses": 0,
+            "decoded": 0,
+            "empty": 0,
+            "failures": 0,
+            "bytes": 0,
+        }
+
+    def attach(self):
+        self.page.on("response", self._on_response)
+
+    def detach(self):
+        self.page.remove_listener("response", self._on_response)
+
+    def _on_response(self, response):
+        if REVIEW_RPC_PATTERN not in response.url:
+            return
+        task = asyncio.ensure_future(self._read(response))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def _read(self, response):
+        self.counters["responses"] += 1
+        try:
+            body = await response.text()
+            self.counters["bytes"] += len(body)
+            records = decode_reviews(parse_rpc_body(body))
+        except Exception as e:
+            self.counters["failures"] += 1
+            logger.debug(f"Could not decode review RPC {response.url}: {e}")
+            return
+        if not records:
+            self.counters["empty"] += 1
+            return
+        self.counters["decoded"] += 1
+        for record in records:
+            self.records.setdefault(record.id, record)
+
+    async def flush(self):
+        """Waits for response bodies still being read."""
+        if self._tasks:
+            await asyncio.gather(*self._tasks, return_exceptions=True)
+
+    def stats(self):
+        return {**self.counters, "reviews": len(self.records)}
@@ -0,0 +1,186 @@
+import os
+import re
+import time
+import logging
+from collections import OrderedDict
+from urllib.parse import urlsplit, urlunsplit, parse_qsl, urlencode
+
+from src.services.singleflight import SingleFlight
+
+logger = logging.getLogger(__name__)
+
+# Stable feature id of a place: …/data=!4m…!1s0x3442a…:0x1e3…!8m2… or ?ftid=0x…:0x…
+FEATURE_ID_PATTERN = re.compile(r"(?:!1s|ftid=)(0x[0-9a-f]+:0x[0-9a-f]+)", re.I)
+LOOSE_FEATURE_ID_PATTERN = re.compile(r"(0x[0-9a-f]+:0x[0-9a-f]+)", re.I)
+CID_PATTERN = re.compile(r"[?&]cid=(\d+)")
+# Viewport segment (/@25.03,121.56,17z) only describes where the map was panned
+VIEWPORT_PATTERN = re.compile(r"/@-?[\d.]+,-?[\d.]+(?:,[\d.]+[a-z])*")
+
+# Query parameters that never change which place a URL points to
+TRACKING_PARAMS = {"g_ep", "g_st", "entry", "coh", "shorturl", "skid", "authuser", "ved", "ei"}
+# Dropped from the cache key of non-Maps URLs
+GENERIC_TRACKING_PARAMS = {"fbclid", "gclid", "igshid", "mc_cid", "mc_eid"}
+
+GOOGLE_HOST_PATTERN = re.compile(r"^(?:www\.)?google\.[a-z]{2,3}(?:\.[a-z]{2})?$")
+MAPS_HOST_PATTERN = re.compile(r"^maps\.google\.[a-z]{2,3}(?:\.[a-z]{2})?$")
+
+
+class CanonicalPlace:
+    """
+    Result of canonicalising a URL. key is what caches, stores and job
+    coalescing use; url is what gets scraped.
+    """
+    __slots__ = ("key", "url", "place_id")
+
+    def __init__(self, key: str, url: str, place_id: str | None = None):
+        self.key = key
+        self.url = url
+        self.place_id = place_id
+
+    def to_dict(self):
+        return {"key": self.key, "url": self.url, "place_id": self.place_id}
+
+
+def is_short_link(url: str) -> bool:
+    parts = urlsplit(url.strip())
+    host = (parts.hostname or "").lower()
+    if host == "maps.app.goo.gl":
+        return True
+    if host == "goo.gl":
+        return parts.path.startswith("/maps")
+    if host == "g.co":
+        return parts.path.startswith("/kgs")
+    return False
+
+
+def is_maps_url(url: str) -> bool:
+    """google.<tld>/maps/… or maps.google.<tld> (short links: is_short_link)."""
+    parts = urlsplit(url.strip())
+    host = (parts.hostname or "").lower()
+    if MAPS_HOST_PATTERN.match(host):
+        return True
+    return bool(GOOGLE_HOST_PATTERN.match(host)) and parts.path.startswith("/maps")
+
+
+def extract_place_id(url: str) -> str | None:
+    """The 0x…:0x… feature id (or cid:N) of a Maps URL, if it has one."""
+    match = FEATURE_ID_PATTERN.search(url) or LOOSE_FEATURE_ID_PATTERN.search(url)
+    if match:
+        return match.group(1).lower()
+    match = CID_PATTERN.search(url)
+    if match:
+        return f"cid:{match.group(1)}"
+    return None
+
+
+def strip_url(url: str) -> str:
+    """Drops fragments, tracking parameters and Maps viewport segments."""
+    parts = urlsplit(url.strip())
+    query = [(k, v) for k, v in parse_qsl(parts.query, keep_blank_values=True)
+             if k not in TRACKING_PARAMS and not k.startswith("utm_")]
+    path = VIEWPORT_PATTERN.sub("", parts.path).rstrip("/") or "/"
+    return urlunsplit((parts.scheme.lower(), (parts.netloc or "").lower(), path, urlencode(query), ""))
+
+
+def generic_key(url: str) -> str:
+    """
+    Cache key of a non-Maps URL: the URL itself minus utm_* and click-id
+    parameters. The rest of the query (in its original encoding), the path
+    and the fragment are kept, since they may select the content.
+    """
+    parts = urlsplit(url.strip())
+    kept = [pair for pair in parts.query.split("&") if pair and not _is_generic_tracking(pair.split("=", 1)[0])]
+    return urlunsplit((parts.scheme, parts.netloc, parts.path, "&".join(kept), parts.fragment))
+
+
+def _is_generic_tracking(name: str) -> bool:
+    name = name.lower()
+    return name.startswith("utm_") or name in GENERIC_TRACKING_PARAMS
+
+
+def _unwrap_consent(url: str) -> str:
+    # EU traffic is bounced through consent.google.com?continue=<real url>
+    parts = urlsplit(url)
+    if (parts.hostname or "").startswith("consent."):
+        target = dict(parse_qsl(parts.query)).get("continue")
+        if target:
+            return target
+    return url
+
+
+class MapsUrlCanonicalizer:
+    """
+    Maps every incoming URL form (maps.app.goo.gl / goo.gl short links,
+    /maps/place/…@lat,lng URLs with tracking parameters) to one canonical
+    place. Short links are resolved once over HTTP; results are memoised
+    for `ttl` seconds and concurrent resolutions of the same link coalesce.
+    Non-Maps URLs are scraped exactly as given and keyed by generic_key().
+    """
+
+    def __init__(self, resolve, ttl: float = 86400, max_entries: int = 5000):
+        # resolve(url) -> final URL after redirects
+        self.resolve = resolve
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._memo = OrderedDict()
+        self._singleflight = SingleFlight()
+        self.counters = {
+            "hits": 0,
+            "misses": 0,
+            "resolutions": 0,
+            "resolve_errors": 0,
+        }
+
+    @classmethod
+    def from_env(cls, resolve):
+        return cls(
+            resolve,
+            ttl=float(os.getenv("MAPS_URL_CACHE_TTL", "86400")),
+            max_entries=int(os.getenv("MAPS_URL_CACHE_ENTRIES", "5000")),
+        )
+
+    async def canonicalize(self, url: str) -> CanonicalPlace:
+        url = url.strip()
+        entry = self._memo.get(url)
+        if entry is not None:
+            place, expires_at = entry
+            if time.time() < expires_at:
+                self._memo.move_to_end(url)
+                self.counters["hits"] += 1
+                return place
+            del self._memo[url]
+
+        self.counters["misses"] += 1
+        place = await self._singleflight.do(url, lambda: self._canonicalize(url))
+        if is_short_link(place.url):
+            # Resolution failed: try again next time
+            return place
+        self._memo[url] = (place, time.time() + self.ttl)
+        self._memo.move_to_end(url)
+        while len(self._memo) > self.max_entries:
+            self._memo.popitem(last=False)
+        return place
+
+    async def _canonicalize(self, url: str) -> CanonicalPlace:
+        target = url
+        if is_short_link(url):
+            self.counters["resolutions"] += 1
+            try:
+                target = _unwrap_consent(await self.resolve(url))
+            except Exception as e:
+                # Scrape the short link as-is; the browser follows it itself
+                self.counters["resolve_errors"] += 1
+                logger.warning(f"Could not resolve {url}: {e}")
+                return CanonicalPlace(strip_url(url), url)
+
+        if not is_maps_url(target):
+            return CanonicalPlace(generic_key(target), target)
+
+        place_id = extract_place_id(target)
+        stripped = strip_url(target)
+        if place_id:
+            return CanonicalPlace(f"maps:{place_id}", stripped, place_id)
+        return CanonicalPlace(stripped, stripped)
+
+    def stats(self):
+        return {**self.counters, "entries": len(self._memo)}
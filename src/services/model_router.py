@@ -0,0 +1,176 @@
+import os
+import time
+import asyncio
+import logging
+
+from src.config.model_routes import model_routes, model_prices
+from src.services.latency_window import LatencyWindow
+from src.services.llm_scheduler import Dispatch
+
+logger = logging.getLogger(__name__)
+
+
+class RouteStats:
+    """Latency, outcome and cost counters for one route."""
+
+    def __init__(self, window: int = 200):
+        self.latencies = LatencyWindow(window)
+        self.counters = {
+            "calls": 0,
+            "errors": 0,
+            "fallbacks": 0,
+            "hedges": 0,
+            "hedge_wins": 0,
+            "input_tokens": 0,
+            "output_tokens": 0,
+        }
+        self.cost_usd = 0.0
+        self.models = {}
+
+    def record(self, model: str, seconds: float, usage=None):
+        self.counters["calls"] += 1
+        self.latencies.add(seconds)
+        self.models[model] = self.models.get(model, 0) + 1
+        if usage is not None:
+            input_tokens = getattr(usage, "prompt_token_count", None) or 0
+            output_tokens = getattr(usage, "candidates_token_count", None) or 0
+            self.counters["input_tokens"] += input_tokens
+            self.counters["output_tokens"] += output_tokens
+            input_price, output_price = model_prices.get(model, (0.0, 0.0))
+            self.cost_usd += (input_tokens * input_price + output_tokens * output_price) / 1_000_000
+
+    def snapshot(self):
+        return {
+            **self.counters,
+            "latency_p50_ms": self.latencies.percentile_ms(0.50),
+            "latency_p95_ms": self.latencies.percentile_ms(0.95),
+            "cost_usd": round(self.cost_usd, 6),
+            "models": dict(self.models),
+        }
+
+
+class ModelRouter:
+    """
+    Maps a task type to its model chain (src/config/model_routes.py) and
+    executes calls with ordered fallback and optional hedging.
+
+    A hedged route starts a second attempt on the same model once the first
+    has run longer than the route's recent p95 latency, and returns whichever
+    finishes first. Until enough samples exist the delay is
+    LLM_HEDGE_INITIAL_DELAY seconds. Both the hedge delay and the recorded
+    latency count from dispatch: time spent queued in the scheduler or
+    waiting out a retry backoff neither triggers a hedge nor skews the p95.
+    """
+
+    def __init__(self, routes: dict | None = None):
+        self.routes = {}
+        for task, route in (routes or model_routes).items():
+            route = dict(route)
+            override = os.getenv(f"LLM_ROUTE_{task.upper()}")
+            if override:
+                route["models"] = [m.strip() for m in override.split(",") if m.strip()]
+            self.routes[task] = route
+        self.hedge_initial_delay = float(os.getenv("LLM_HEDGE_INITIAL_DELAY", "4.0"))
+        self.hedge_min_samples = int(os.getenv("LLM_HEDGE_MIN_SAMPLES", "20"))
+        self.stats_by_route = {task: RouteStats() for task in self.routes}
+
+    def route(self, task: str):
+        return self.routes.get(task) or self.routes["default"]
+
+    def models(self, task: str) -> list[str]:
+        return self.route(task)["models"]
+
+    def priority_name(self, task: str) -> str:
+        return self.route(task).get("priority", "standard")
+
+    def stats_for(self, task: str) -> RouteStats:
+        return self.stats_by_route.get(task) or self.stats_by_route["default"]
+
+    def hedge_delay(self, task: str) -> float:
+        stats = self.stats_for(task)
+        if len(stats.latencies) < self.hedge_min_samples:
+            return self.hedge_initial_delay
+        return stats.latencies.percentile(0.95)
+
+    async def call(self, task: str, call_model):
+        """
+        Runs call_model(model, dispatch) along the task's fallback chain and
+        returns the first successful response. call_model passes dispatch
+        (an llm_scheduler.Dispatch) on to LLMScheduler.run.
+        """
+        route = self.route(task)
+        stats = self.stats_for(task)
+        last_error = None
+        for index, model in enumerate(route["models"]):
+            if index:
+                stats.counters["fallbacks"] += 1
+                logger.warning(f"Route {task}: falling back to {model} after {last_error}")
+            try:
+                if route.get("hedge"):
+                    return await self._hedged(task, model, call_model)
+                return await self._timed(task, model, call_model)
+            except Exception as e:
+                last_error = e
+        raise last_error
+
+    async def _timed(self, task, model, call_model, dispatch=None):
+        stats = self.stats_for(task)
+        dispatch = dispatch or Dispatch()
+        try:
+            response = await call_model(model, dispatch)
+        except Exception:
+            stats.counters["errors"] += 1
+            raise
+        latency = time.perf_counter() - dispatch.started if dispatch.started is not None else None
+        if latency is not None:
+            stats.record(model, latency, getattr(response, "usage_metadata", None))
+        return response
+
+    async def _hedge_due(self, task, primary, dispatch):
+        """Returns once primary has held a slot for the hedge delay, or has finished."""
+        while not primary.done():
+            running = asyncio.ensure_future(dispatch.wait_running())
+            try:
+                await asyncio.wait({primary, running}, return_when=asyncio.FIRST_COMPLETED)
+            finally:
+                running.cancel()
+            if primary.done():
+                return
+            started = dispatch.started
+            remaining = self.hedge_delay(task) - (time.perf_counter() - started)
+            if remaining > 0:
+                await asyncio.wait({primary}, timeout=remaining)
+            # Still the same admitted attempt, not requeued for a retry meanwhile
+            if not primary.done() and dispatch.started == started:
+                return
+
+    async def _hedged(self, task, model, call_model):
+        stats = self.stats_for(task)
+        dispatch = Dispatch()
+        primary = asyncio.ensure_future(self._timed(task, model, call_model, dispatch))
+        hedge = None
+        try:
+            await self._hedge_due(task, primary, dispatch)
+            if primary.done():
+                return primary.result()
+
+            stats.counters["hedges"] += 1
+            hedge = asyncio.ensure_future(self._timed(task, model, call_model))
+            attempts = {primary, hedge}
+            first_error = None
+            while attempts:
+                done, attempts = await asyncio.wait(attempts, return_when=asyncio.FIRST_COMPLETED)
+                for attempt in done:
+                    if attempt.exception() is None:
+                        if attempt is hedge:
+                            stats.counters["hedge_wins"] += 1
+                        return attempt.result()
+                    first_error = first_error or attempt.exception()
+            raise first_error
+        finally:
+            for attempt in (primary, hedge):
+                if attempt is not None and not attempt.done():
+                    attempt.cancel()
+
+    def stats(self):
+        return {task: stats.snapshot() for task, stats in self.stats_by_route.items()}
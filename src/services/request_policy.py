@@ -0,0 +1,112 @@
+import re
+import logging
+from collections import Counter
+from urllib.parse import urlparse
+
+logger = logging.getLogger(__name__)
+
+# Resource types no scraper reads
+BLOCKED_RESOURCE_TYPES = {"image", "media", "font"}
+
+# Map tiles, street view imagery and Google telemetry beacons
+BLOCKED_URL_PATTERNS = {
+    "tiles": re.compile(r"/maps/vt(?:/|\?)|://khms?\d*\.google|/kh/v=|streetviewpixels|/maps/photometa|/cbk\?"),
+    "telemetry": re.compile(r"/gen_204|/log\?format=|/csi\?|/maps/preview/log204|play\.google\.com/log"),
+}
+
+ANALYTICS_HOSTS = (
+    "google-analytics.com",
+    "googletagmanager.com",
+    "googleadservices.com",
+    "googlesyndication.com",
+    "doubleclick.net",
+    "connect.facebook.net",
+    "hotjar.com",
+    "clarity.ms",
+    "scorecardresearch.com",
+)
+
+# Requests matching these are never blocked for the platform, whatever their type
+PLATFORM_ALLOW_LIST = {
+    "google_maps": [
+        re.compile(r"/maps/rpc/listugcposts|/maps/preview/review|/maps/api/js/"),
+    ],
+    "facebook": [
+        re.compile(r"facebook\.com/api/graphql"),
+    ],
+    "generic": [],
+}
+
+
+def detect_platform(url: str) -> str:
+    if "google.com/maps" in url or "goo.gl" in url:
+        return "google_maps"
+    if "facebook.com" in url or "fb.com" in url:
+        return "facebook"
+    return "generic"
+
+
+class RequestPolicy:
+    """
+    Network-routing policy for one scrape.
+
+    Aborts images, media, fonts, map tiles and analytics/telemetry requests
+    unless the platform allow-list matches, and counts what was blocked and
+    how many bytes were actually downloaded (from CDP loadingFinished events).
+    With enabled=False nothing is aborted but matching requests are still
+    counted, so blocked and unblocked scrapes can be compared.
+    """
+
+    def __init__(self, platform: str, enabled: bool = True):
+        self.platform = platform
+        self.enabled = enabled
+        self.allow = PLATFORM_ALLOW_LIST.get(platform, [])
+        self.requests = 0
+        self.bytes_downloaded = 0
+        self.blocked = Counter()
+
+    async def attach(self, context, page):
+        await context.route("**/*", self._handle)
+        try:
+            cdp = await context.new_cdp_session(page)
+            await cdp.send("Network.enable")
+            cdp.on("Network.loadingFinished", self._on_loading_finished)
+        except Exception as e:
+            # Non-Chromium browsers: byte counts stay at 0
+            logger.debug(f"CDP byte accounting unavailable: {e}")
+
+    def block_reason(self, url: str, resource_type: str):
+        if any(pattern.search(url) for pattern in self.allow):
+            return None
+        if resource_type in BLOCKED_RESOURCE_TYPES:
+            return resource_type
+        host = urlparse(url).hostname or ""
+        if any(host == h or host.endswith("." + h) for h in ANALYTICS_HOSTS):
+            return "analytics"
+        for reason, pattern in BLOCKED_URL_PATTERNS.items():
+            if pattern.search(url):
+                return reason
+        return None
+
+    async def _handle(self, route):
+        request = route.request
+        self.requests += 1
+        reason = self.block_reason(request.url, request.resource_type)
+        if reason:
+            self.blocked[reason] += 1
+        if reason and self.enabled:
+            await route.abort("blockedbyclient")
+        else:
+            await route.continue_()
+
+    def _on_loading_finished(self, event):
+        self.bytes_downloaded += int(event.get("encodedDataLength") or 0)
+
+    def stats(self):
+        return {
+            "blocking": self.enabled,
+            "requests": self.requests,
+            "blocked": sum(self.blocked.values()),
+            "blocked_by_reason": dict(self.blocked),
+            "bytes_downloaded": self.bytes_downloaded,
+        }
@@ -0,0 +1,72 @@
+import json
+
+# Field order of Review; also the order of the review_store columns
+REVIEW_FIELDS = ("id", "author", "rating", "time", "timestamp", "language", "text", "reply")
+
+_SEPARATORS = (",", ":")
+
+
+class Review:
+    """
+    One scraped review. time is the page's relative label ("3 個月前"),
+    timestamp the epoch seconds when the platform provides it; reply is the
+    owner's response. Flows unchanged from ScraperService through the
+    review store and LLMService.analyze_content to the API.
+    """
+    __slots__ = REVIEW_FIELDS
+
+    def __init__(self, id: str | None = None, author: str = "", rating: float | None = None,
+                 time: str = "", timestamp: int | None = None, language: str | None = None,
+                 text: str = "", reply: str = ""):
+        self.id = id
+        self.author = author or ""
+        self.rating = rating
+        self.time = time or ""
+        self.timestamp = timestamp
+        self.language = language
+        self.text = text or ""
+        self.reply = reply or ""
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "Review":
+        return cls(**{field: data.get(field) for field in REVIEW_FIELDS})
+
+    def to_dict(self) -> dict:
+        """Compact form: empty fields are left out."""
+        return {field: value for field in REVIEW_FIELDS
+                if (value := getattr(self, field)) is not None and value != ""}
+
+    def to_json(self) -> str:
+        return json.dumps(self.to_dict(), ensure_ascii=False, separators=_SEPARATORS)
+
+    def prompt_text(self) -> str:
+        """Review as fed to the analysis prompt: rating + body, no owner reply."""
+        if self.rating is None:
+            return self.text
+        return f"({self.rating:g}★) {self.text}"
+
+    def __eq__(self, other):
+        if not isinstance(other, Review):
+            return NotImplemented
+        return all(getattr(self, f) == getattr(other, f) for f in REVIEW_FIELDS)
+
+    def __repr__(self):
+        return f"Review(id={self.id!r}, rating={self.rating!r}, text={self.text[:30]!r})"
+
+
+def reviews_to_json(reviews: list[Review]) -> str:
+    return "[" + ",".join(review.to_json() for review in reviews) + "]"
+
+
+def iter_ndjson(reviews):
+    """One JSON line per review, for streaming responses."""
+    for review in reviews:
+        yield review.to_json() + "\n"
+
+
+def reviews_to_ndjson(reviews: list[Review]) -> str:
+    return "".join(iter_ndjson(reviews))
+
+
+def reviews_from_ndjson(text: str) -> list[Review]:
+    return [Review.from_dict(json.loads(line)) for line in text.splitlines() if line.strip()]
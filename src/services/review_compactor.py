@@ -0,0 +1,111 @@
+import re
+import unicodedata
+from src.services.review_text import estimate_tokens
+
+# Lines that carry no opinion: ratings, timestamps, reviewer badges, UI buttons
+_BOILERPLATE_LINE = re.compile(
+    r'^(?:'
+    r'[★☆\s]+'
+    r'|\d(?:\.\d)?\s*(?:顆星|星|stars?)'
+    r'|\d+\s*(?:秒|分鐘|小時|天|週|個月|年)前'
+    r'|(?:a|an|\d+)\s+(?:second|minute|hour|day|week|month|year)s?\s+ago'
+    r'|在地嚮導.*|Local Guide.*'
+    r'|\d+\s*(?:則評論|張相片|reviews?|photos?)(?:\s*[·・]\s*\d+\s*(?:則評論|張相片|reviews?|photos?))*'
+    r'|讚|分享|更多|Like|Share|More|新|NEW'
+    r')$',
+    re.IGNORECASE
+)
+
+# Everything from the owner's reply onwards is dropped from a review. The
+# marker only counts at the start of a line ("店家回覆很快" is customer text).
+_OWNER_REPLY = re.compile(r'^\s*(?:業主回應|店家回覆|Response from the owner)', re.IGNORECASE | re.MULTILINE)
+
+_WHITESPACE = re.compile(r'[ \t　]+')
+_DEDUP_NOISE = re.compile(r'[\W_]+')
+
+
+def normalize_review(review: str, strip_reply: bool = True) -> str:
+    """
+    Strips owner replies, rating/timestamp boilerplate and redundant whitespace.
+    strip_reply=False for text that cannot contain a reply (Review.text).
+    """
+    text = unicodedata.normalize('NFKC', review)
+    match = _OWNER_REPLY.search(text) if strip_reply else None
+    if match:
+        text = text[:match.start()]
+
+    lines = []
+    for line in text.splitlines():
+        line = _WHITESPACE.sub(' ', line).strip()
+        if line and not _BOILERPLATE_LINE.match(line):
+            lines.append(line)
+    return ' '.join(lines)
+
+
+def trim_to_tokens(text: str, max_tokens: int) -> str:
+    """Cuts text to roughly max_tokens, preferring a sentence boundary."""
+    if estimate_tokens(text) <= max_tokens:
+        return text
+    low, high = 0, len(text)
+    while low < high:
+        mid = (low + high + 1) // 2
+        if estimate_tokens(text[:mid]) <= max_tokens:
+            low = mid
+        else:
+            high = mid - 1
+    cut = text[:low]
+    boundary = max(cut.rfind(p) for p in '。！？!?.')
+    if boundary > len(cut) // 2:
+        cut = cut[:boundary + 1]
+    return cut.rstrip() + '…'
+
+
+def compact_reviews(reviews: list[str], target_tokens: int, per_review_tokens: int,
+                    strip_replies: bool = True):
+    """
+    Normalises, de-duplicates and trims reviews, then packs as many distinct
+    reviews as fit target_tokens (in original order). strip_replies=False
+    when the owner replies were already split off (structured Reviews).
+    Returns (compacted_reviews, report).
+    """
+    tokens_before = sum(estimate_tokens(r) for r in reviews)
+    seen = set()
+    kept = []
+    used = 0
+    report = {
+        "reviews_in": len(reviews),
+        "reviews_kept": 0,
+        "duplicates_removed": 0,
+        "empty_removed": 0,
+        "trimmed": 0,
+        "dropped_over_budget": 0,
+    }
+
+    for review in reviews:
+        text = normalize_review(review, strip_replies)
+        if not text:
+            report["empty_removed"] += 1
+            continue
+
+        key = _DEDUP_NOISE.sub('', text.lower())[:200]
+        if key in seen:
+            report["duplicates_removed"] += 1
+            continue
+        seen.add(key)
+
+        trimmed = trim_to_tokens(text, per_review_tokens)
+        if trimmed != text:
+            report["trimmed"] += 1
+
+        cost = estimate_tokens(trimmed)
+        if used + cost > target_tokens:
+            report["dropped_over_budget"] += 1
+            continue
+        kept.append(trimmed)
+        used += cost
+
+    report["reviews_kept"] = len(kept)
+    report["tokens_before"] = tokens_before
+    report["tokens_after"] = used
+    report["tokens_saved"] = tokens_before - used
+    return kept, report
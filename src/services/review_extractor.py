@@ -0,0 +1,113 @@
+import time
+import logging
+from src.services.review import Review
+
+logger = logging.getLogger(__name__)
+
+# Installed once per page. A MutationObserver extracts each review element
+# into a compact record as soon as it is rendered; drain() hands over the
+# records collected since the previous call. Reviews removed from the DOM
+# later (virtualised lists) are not lost.
+REVIEW_COLLECTOR_JS = """
+() => {
+    if (window.__insightxReviews) return;
+
+    const seen = new Set();
+    const queue = [];
+    const text = (root, selector) => {
+        const el = root.querySelector(selector);
+        return el ? el.innerText.trim() : '';
+    };
+
+    const extract = (el) => {
+        const reply = el.querySelector('.CDe7pd');
+        let body = '';
+        for (const node of el.querySelectorAll('.wiI7pd, .MyEned')) {
+            if (reply && reply.contains(node)) continue;
+            body = node.innerText.trim();
+            if (body) break;
+        }
+        const stars = el.querySelector('[role="img"][aria-label]');
+        const rating = stars ? parseFloat((stars.getAttribute('aria-label').match(/\\d+(\\.\\d+)?/) || [])[0]) : null;
+        return {
+            id: el.getAttribute('data-review-id'),
+            author: text(el, '.d4r55') || el.getAttribute('aria-label') || '',
+            rating: Number.isFinite(rating) ? rating : null,
+            time: text(el, '.rsqaWe') || text(el, '.xRkPPb'),
+            text: body,
+            reply: reply ? text(reply, '.wiI7pd') : '',
+        };
+    };
+
+    const scan = () => {
+        for (const el of document.querySelectorAll('[data-review-id]')) {
+            const id = el.getAttribute('data-review-id');
+            if (seen.has(id)) continue;
+            // Nested children repeat the id; only the outermost element is a review
+            if (el.parentElement && el.parentElement.closest('[data-review-id="' + CSS.escape(id) + '"]')) continue;
+            const record = extract(el);
+            // Not fully rendered yet: retry on the next mutation
+            if (!record.text && record.rating === null) continue;
+            seen.add(id);
+            queue.push(record);
+        }
+    };
+
+    let scheduled = false;
+    new MutationObserver(() => {
+        if (scheduled) return;
+        scheduled = true;
+        requestAnimationFrame(() => { scheduled = false; scan(); });
+    }).observe(document.body, { childList: true, subtree: true });
+    scan();
+
+    window.__insightxReviews = {
+        drain: () => { scan(); return queue.splice(0); },
+        heap: () => (performance.memory ? performance.memory.usedJSHeapSize : null),
+    };
+}
+"""
+
+DRAIN_JS = "() => window.__insightxReviews.drain()"
+HEAP_JS = "() => window.__insightxReviews.heap()"
+
+
+class ReviewCollector:
+    """
+    Pulls Review records (id, author, rating, time, text, reply) out of a
+    Maps page incrementally, without serialising the document.
+    """
+
+    def __init__(self, page):
+        self.page = page
+        self.records = []
+        self.drains = 0
+        self.extract_seconds = 0.0
+        self.payload_chars = 0
+
+    async def install(self):
+        await self.page.evaluate(REVIEW_COLLECTOR_JS)
+
+    async def drain(self):
+        """Fetches the records extracted since the last drain."""
+        started = time.perf_counter()
+        batch = await self.page.evaluate(DRAIN_JS) or []
+        self.extract_seconds += time.perf_counter() - started
+        self.drains += 1
+        self.payload_chars += sum(len(r.get("text") or "") + len(r.get("reply") or "") for r in batch)
+        reviews = [Review.from_dict(r) for r in batch]
+        self.records.extend(reviews)
+        return reviews
+
+    async def stats(self):
+        try:
+            js_heap = await self.page.evaluate(HEAP_JS)
+        except Exception:
+            js_heap = None
+        return {
+            "records": len(self.records),
+            "drains": self.drains,
+            "extract_ms": round(self.extract_seconds * 1000, 1),
+            "payload_chars": self.payload_chars,
+            "js_heap_bytes": js_heap,
+        }
@@ -0,0 +1,173 @@
+import time
+import asyncio
+import logging
+from playwright.async_api import TimeoutError as PlaywrightTimeoutError
+
+from src.services.maps_rpc import REVIEW_RPC_PATTERN
+
+logger = logging.getLogger(__name__)
+
+# One element per review (nested children repeat the id, so ids are de-duplicated)
+REVIEW_SELECTOR = "[data-review-id]"
+
+PROGRESS_JS = """
+([reviewSelector, containerSelector]) => {
+    const ids = new Set(Array.from(document.querySelectorAll(reviewSelector), e => e.getAttribute('data-review-id')));
+    const el = containerSelector ? document.querySelector(containerSelector) : document.scrollingElement;
+    return [ids.size, el ? el.scrollHeight : 0];
+}
+"""
+
+GREW_JS = """
+([reviewSelector, containerSelector, reviews, height]) => {
+    const ids = new Set(Array.from(document.querySelectorAll(reviewSelector), e => e.getAttribute('data-review-id')));
+    const el = containerSelector ? document.querySelector(containerSelector) : document.scrollingElement;
+    return ids.size > reviews || (el ? el.scrollHeight : 0) > height;
+}
+"""
+
+SCROLL_JS = """
+(containerSelector) => {
+    const el = document.querySelector(containerSelector);
+    if (el) el.scrollTop = el.scrollHeight;
+}
+"""
+
+
+class ReviewScroller:
+    """
+    Scrolls a Maps review feed until no new reviews arrive.
+
+    After each scroll it waits for the number of distinct review elements (or
+    the feed height) to grow instead of sleeping a fixed interval. The wait
+    timeout adapts to how quickly recent batches arrived; a timeout while a
+    review RPC is still in flight waits for the RPC rather than counting as a
+    stall. Scrolling ends after stall_limit consecutive stalls, or at
+    max_reviews / max_scrolls. on_progress, if given, is awaited after every
+    batch of new reviews; a truthy return value stops scrolling.
+    """
+
+    def __init__(self, page, container_selector: str | None = None, max_reviews: int = 100,
+                 max_scrolls: int = 40, stall_limit: int = 2,
+                 min_wait: float = 0.5, max_wait: float = 6.0, on_progress=None):
+        self.page = page
+        self.container_selector = container_selector
+        self.max_reviews = max_reviews
+        self.max_scrolls = max_scrolls
+        self.stall_limit = stall_limit
+        self.min_wait = min_wait
+        self.max_wait = max_wait
+        self.on_progress = on_progress
+
+        self.rpc_in_flight = 0
+        self.rpc_responses = 0
+        self._rpc_idle = asyncio.Event()
+        self._rpc_idle.set()
+        self._batch_interval = None
+
+    def _is_review_rpc(self, request):
+        return REVIEW_RPC_PATTERN in request.url
+
+    def _on_request(self, request):
+        if self._is_review_rpc(request):
+            self.rpc_in_flight += 1
+            self._rpc_idle.clear()
+
+    def _on_request_done(self, request):
+        if self._is_review_rpc(request) and self.rpc_in_flight:
+            self.rpc_in_flight -= 1
+            self.rpc_responses += 1
+            if not self.rpc_in_flight:
+                self._rpc_idle.set()
+
+    def wait_timeout(self) -> float:
+        """Three times the recent batch interval, clamped to [min_wait, max_wait]."""
+        if self._batch_interval is None:
+            return self.max_wait / 2
+        return min(self.max_wait, max(self.min_wait, 3 * self._batch_interval))
+
+    def _observe_batch(self, seconds: float):
+        if self._batch_interval is None:
+            self._batch_interval = seconds
+        else:
+            self._batch_interval = 0.7 * self._batch_interval + 0.3 * seconds
+
+    async def progress(self):
+        return await self.page.evaluate(PROGRESS_JS, [REVIEW_SELECTOR, self.container_selector])
+
+    async def _scroll(self):
+        if self.container_selector:
+            await self.page.evaluate(SCROLL_JS, self.container_selector)
+        else:
+            await self.page.mouse.wheel(0, 3000)
+
+    async def _wait_for_growth(self, reviews: int, height: int, timeout: float) -> bool:
+        try:
+            await self.page.wait_for_function(
+                GREW_JS,
+                arg=[REVIEW_SELECTOR, self.container_selector, reviews, height],
+                timeout=timeout * 1000,
+            )
+            return True
+        except PlaywrightTimeoutError:
+            return False
+
+    async def run(self):
+        """Scrolls to the end of the feed and returns scroll metrics."""
+        self.page.on("request", self._on_request)
+        self.page.on("requestfinished", self._on_request_done)
+        self.page.on("requestfailed", self._on_request_done)
+
+        started = time.perf_counter()
+        reviews, height = await self.progress()
+        initial_reviews = reviews
+        scrolls = stalls = total_stalls = 0
+        stopped_early = False
+        last_growth = started
+        try:
+            while scrolls < self.max_scrolls and reviews < self.max_reviews:
+                await self._scroll()
+                scrolls += 1
+
+                grew = await self._wait_for_growth(reviews, height, self.wait_timeout())
+                if not grew and self.rpc_in_flight:
+                    # Reviews are still on the wire: wait for the RPC, then for rendering
+                    try:
+                        await asyncio.wait_for(self._rpc_idle.wait(), self.max_wait)
+                    except asyncio.TimeoutError:
+                        pass
+                    grew = await self._wait_for_growth(reviews, height, self.min_wait)
+
+                if not grew:
+                    stalls += 1
+                    total_stalls += 1
+                    if stalls >= self.stall_limit:
+                        logger.info(f"Review feed stalled after {scrolls} scrolls")
+                        break
+                    continue
+
+                now = time.perf_counter()
+                self._observe_batch(now - last_growth)
+                last_growth = now
+                stalls = 0
+                reviews, height = await self.progress()
+                if self.on_progress is not None and await self.on_progress():
+                    logger.info(f"Scrolling stopped by caller after {scrolls} scrolls")
+                    stopped_early = True
+                    break
+        finally:
+            self.page.remove_listener("request", self._on_request)
+            self.page.remove_listener("requestfinished", self._on_request_done)
+            self.page.remove_listener("requestfailed", self._on_request_done)
+
+        elapsed = time.perf_counter() - started
+        return {
+            "reviews": reviews,
+            "new_reviews": reviews - initial_reviews,
+            "scrolls": scrolls,
+            "stalls": total_stalls,
+            "stopped_early": stopped_early,
+            "review_rpcs": self.rpc_responses,
+            "seconds": round(elapsed, 3),
+            "reviews_per_second": round(reviews / elapsed, 2) if elapsed > 0 else None,
+        }
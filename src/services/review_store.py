@@ -0,0 +1,177 @@
+import os
+import re
+import time
+import sqlite3
+import asyncio
+import hashlib
+import threading
+import logging
+from src.services.review import Review, REVIEW_FIELDS
+
+logger = logging.getLogger(__name__)
+
+# Review fields stored next to review_id
+STORED_FIELDS = REVIEW_FIELDS[1:]
+
+_RELATIVE_TIME = re.compile(
+    r'(\d+|一|an?|one)?\s*(分鐘|minutes?|小時|hours?|天|days?|週|星期|weeks?|個月|months?|年|years?)\s*(?:前|ago)',
+    re.IGNORECASE
+)
+_UNIT_SECONDS = [
+    (("分鐘", "minute"), 60),
+    (("小時", "hour"), 3600),
+    (("天", "day"), 86400),
+    (("週", "星期", "week"), 7 * 86400),
+    (("個月", "month"), 30 * 86400),
+    (("年", "year"), 365 * 86400),
+]
+
+
+def approximate_timestamp(label: str, now: float) -> float | None:
+    """
+    Epoch seconds for a relative label such as "3 個月前", "一週前" or
+    "2 weeks ago" as seen at time now; None when the label is not one.
+    """
+    match = _RELATIVE_TIME.search(label or "")
+    if not match:
+        return None
+    amount, unit = match.group(1), match.group(2).lower()
+    count = int(amount) if amount and amount.isdigit() else 1
+    seconds = next(size for names, size in _UNIT_SECONDS if unit.startswith(names))
+    return now - count * seconds
+
+
+def review_key(review: Review) -> str:
+    """Platform review id, or a content hash for reviews that have none."""
+    if review.id:
+        return review.id
+    content = f"{review.author}\n{review.text}"
+    return "sha1:" + hashlib.sha1(content.encode("utf-8")).hexdigest()
+
+
+class ReviewStore:
+    """
+    SQLite store of every review seen per place.
+
+    Reviews are keyed by (place_id, review id or content hash) and carry
+    first_seen / last_seen timestamps, so a re-scrape only has to fetch the
+    reviews newer than the ones already stored. sort_time orders them: the
+    publish timestamp when the platform gives one, otherwise an estimate
+    from the relative time label, otherwise first_seen.
+    """
+
+    def __init__(self, path: str | None = None):
+        self.path = path
+        self._lock = threading.Lock()
+        self._conn = None
+        self.counters = {
+            "upserts": 0,
+            "new_reviews": 0,
+            "seen_reviews": 0,
+        }
+
+        if path:
+            try:
+                os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+                self._conn = sqlite3.connect(path, check_same_thread=False)
+                self._conn.execute(
+                    "CREATE TABLE IF NOT EXISTS reviews ("
+                    "place_id TEXT NOT NULL, review_id TEXT NOT NULL, "
+                    "author TEXT, rating REAL, time TEXT, timestamp INTEGER, language TEXT, "
+                    "text TEXT, reply TEXT, "
+                    "first_seen REAL NOT NULL, last_seen REAL NOT NULL, sort_time REAL, "
+                    "PRIMARY KEY (place_id, review_id))"
+                )
+                columns = {row[1] for row in self._conn.execute("PRAGMA table_info(reviews)")}
+                if "sort_time" not in columns:
+                    # Stores created before sort_time existed
+                    self._conn.execute("ALTER TABLE reviews ADD COLUMN sort_time REAL")
+                    self._conn.execute("UPDATE reviews SET sort_time = COALESCE(timestamp, first_seen)")
+                self._conn.execute("DROP INDEX IF EXISTS idx_reviews_place_time")
+                self._conn.execute(
+                    "CREATE INDEX IF NOT EXISTS idx_reviews_place_sort ON reviews (place_id, sort_time)"
+                )
+                self._conn.commit()
+            except sqlite3.Error as e:
+                logger.warning(f"Review store disabled ({path}): {e}")
+                self._conn = None
+
+    @classmethod
+    def from_env(cls):
+        return cls(path=os.getenv("REVIEW_STORE_PATH", ".cache/reviews.sqlite3"))
+
+    @property
+    def enabled(self) -> bool:
+        return self._conn is not None
+
+    async def known_ids(self, place_id: str) -> set[str]:
+        if self._conn is None:
+            return set()
+        return await asyncio.to_thread(self._known_ids, place_id)
+
+    async def upsert(self, place_id: str, reviews: list[Review]) -> int:
+        """Stores the reviews and returns how many were not seen before."""
+        if self._conn is None or not reviews:
+            return 0
+        new = await asyncio.to_thread(self._upsert, place_id, reviews, time.time())
+        self.counters["upserts"] += 1
+        self.counters["new_reviews"] += new
+        self.counters["seen_reviews"] += len(reviews) - new
+        return new
+
+    async def reviews(self, place_id: str, limit: int = 1000) -> list[Review]:
+        """Stored reviews for a place, newest first."""
+        if self._conn is None:
+            return []
+        return await asyncio.to_thread(self._reviews, place_id, limit)
+
+    def _known_ids(self, place_id):
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT review_id FROM reviews WHERE place_id = ?", (place_id,)
+            ).fetchall()
+        return {row[0] for row in rows}
+
+    def _upsert(self, place_id, reviews, now):
+        new = 0
+        with self._lock:
+            for review in reviews:
+                key = review_key(review)
+                # Empty fields never overwrite stored values
+                values = [getattr(review, field) if getattr(review, field) != "" else None for field in STORED_FIELDS]
+                # A publish timestamp replaces the estimate; a later relative
+                # label does not, it only gets coarser as the review ages
+                updated = self._conn.execute(
+                    "UPDATE reviews SET last_seen = ?, sort_time = COALESCE(?, sort_time), "
+                    + ", ".join(f"{field} = COALESCE(?, {field})" for field in STORED_FIELDS)
+                    + " WHERE place_id = ? AND review_id = ?",
+                    (now, review.timestamp, *values, place_id, key)
+                ).rowcount
+                if not updated:
+                    sort_time = review.timestamp
+                    if sort_time is None:
+                        sort_time = approximate_timestamp(review.time, now) or now
+                    self._conn.execute(
+                        "INSERT INTO reviews (place_id, review_id, "
+                        + ", ".join(STORED_FIELDS)
+                        + ", first_seen, last_seen, sort_time) VALUES (?, ?, "
+                        + ", ".join("?" for _ in STORED_FIELDS)
+                        + ", ?, ?, ?)",
+                        (place_id, key, *values, now, now, sort_time)
+                    )
+                    new += 1
+            self._conn.commit()
+        return new
+
+    def _reviews(self, place_id, limit):
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT review_id, " + ", ".join(STORED_FIELDS) + " "
+                "FROM reviews WHERE place_id = ? "
+                "ORDER BY sort_time DESC, first_seen DESC LIMIT ?",
+                (place_id, limit)
+            ).fetchall()
+        return [Review(*row) for row in rows]
+
+    def stats(self):
+        return {**self.counters, "enabled": self.enabled}
@@ -0,0 +1,50 @@
+import re
+
+# Separator between reviews in joined review text (scrapes cached before
+# reviews became structured Review objects)
+REVIEW_SEPARATOR = '\n\n---評論---\n\n'
+
+_SEPARATOR_PATTERN = re.compile(r'\s*---評論---\s*')
+_BLANK_LINES = re.compile(r'\n\s*\n')
+_CJK_CHAR = re.compile(r'[\u3000-\u30ff\u3400-\u4dbf\u4e00-\u9fff\uac00-\ud7af\uff00-\uffef]')
+
+
+def estimate_tokens(text: str) -> int:
+    """
+    Cheap token estimate without a tokenizer round-trip.
+    Gemini spends roughly one token per CJK character and one per ~4
+    characters of Latin text, which is close enough for budgeting.
+    """
+    if not text:
+        return 0
+    cjk = len(_CJK_CHAR.findall(text))
+    return cjk + (len(text) - cjk + 3) // 4
+
+
+def split_reviews(text: str) -> list[str]:
+    """
+    Splits scraped raw_text into individual reviews.
+    Uses the scraper's review separator when present, blank lines otherwise.
+    """
+    if not text:
+        return []
+    pattern = _SEPARATOR_PATTERN if '---評論---' in text else _BLANK_LINES
+    return [part.strip() for part in pattern.split(text) if part.strip()]
+
+
+def chunk_reviews(reviews: list[str], max_tokens: int) -> list[list[str]]:
+    """
+    Groups reviews into consecutive chunks of at most max_tokens each.
+    A single review larger than the budget becomes its own chunk.
+    """
+    chunks, current, used = [], [], 0
+    for review in reviews:
+        cost = estimate_tokens(review)
+        if current and used + cost > max_tokens:
+            chunks.append(current)
+            current, used = [], 0
+        current.append(review)
+        used += cost
+    if current:
+        chunks.append(current)
+    return chunks
@@ -0,0 +1,126 @@
+import os
+import json
+import time
+import zlib
+import sqlite3
+import asyncio
+import threading
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+class ScrapeCache:
+    """
+    Disk cache of scrape results keyed by canonical place.
+
+    Payloads are stored as zlib-compressed JSON. An entry younger than
+    fresh_for seconds is served as-is; up to stale_for seconds after that it
+    is still served but flagged stale so the caller can refresh it in the
+    background. Older entries are dropped.
+    """
+
+    def __init__(self, path: str | None = None, fresh_for: float = 3600,
+                 stale_for: float = 86400, max_entries: int = 2000):
+        self.path = path
+        self.fresh_for = fresh_for
+        self.stale_for = stale_for
+        self.max_entries = max_entries
+
+        self._lock = threading.Lock()
+        self._conn = None
+        self.counters = {
+            "hits": 0,
+            "stale_hits": 0,
+            "misses": 0,
+            "writes": 0,
+            "evictions": 0,
+            "bytes_raw": 0,
+            "bytes_stored": 0,
+        }
+
+        if path:
+            try:
+                os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+                self._conn = sqlite3.connect(path, check_same_thread=False)
+                self._conn.execute(
+                    "CREATE TABLE IF NOT EXISTS scrape_cache ("
+                    "key TEXT PRIMARY KEY, payload BLOB NOT NULL, created_at REAL NOT NULL)"
+                )
+                self._conn.execute("CREATE INDEX IF NOT EXISTS idx_scrape_cache_created ON scrape_cache (created_at)")
+                self._conn.commit()
+            except sqlite3.Error as e:
+                logger.warning(f"Scrape cache disabled ({path}): {e}")
+                self._conn = None
+
+    @classmethod
+    def from_env(cls):
+        return cls(
+            path=os.getenv("SCRAPE_CACHE_PATH", ".cache/scrape_cache.sqlite3"),
+            fresh_for=float(os.getenv("SCRAPE_CACHE_FRESH", "3600")),
+            stale_for=float(os.getenv("SCRAPE_CACHE_STALE", "86400")),
+            max_entries=int(os.getenv("SCRAPE_CACHE_MAX_ENTRIES", "2000")),
+        )
+
+    @property
+    def enabled(self) -> bool:
+        return self._conn is not None
+
+    async def get(self, key: str):
+        """Returns (result, age_seconds, is_fresh) or None."""
+        if self._conn is None:
+            return None
+        row = await asyncio.to_thread(self._disk_get, key)
+        if row is None:
+            self.counters["misses"] += 1
+            return None
+        payload, created_at = row
+        age = time.time() - created_at
+        if age > self.fresh_for + self.stale_for:
+            self.counters["misses"] += 1
+            return None
+        fresh = age <= self.fresh_for
+        self.counters["hits" if fresh else "stale_hits"] += 1
+        result = await asyncio.to_thread(lambda: json.loads(zlib.decompress(payload)))
+        return result, age, fresh
+
+    async def set(self, key: str, result: dict):
+        if self._conn is None:
+            return
+        raw = json.dumps(result, ensure_ascii=False).encode("utf-8")
+        payload = await asyncio.to_thread(zlib.compress, raw, 6)
+        await asyncio.to_thread(self._disk_set, key, payload, time.time())
+        self.counters["writes"] += 1
+        self.counters["bytes_raw"] += len(raw)
+        self.counters["bytes_stored"] += len(payload)
+
+    def _disk_get(self, key):
+        with self._lock:
+            return self._conn.execute(
+                "SELECT payload, created_at FROM scrape_cache WHERE key = ?", (key,)
+            ).fetchone()
+
+    def _disk_set(self, key, payload, now):
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO scrape_cache (key, payload, created_at) VALUES (?, ?, ?)",
+                (key, payload, now)
+            )
+            expired = self._conn.execute(
+                "DELETE FROM scrape_cache WHERE created_at < ?", (now - self.fresh_for - self.stale_for,)
+            ).rowcount
+            overflow = self._conn.execute(
+                "DELETE FROM scrape_cache WHERE key IN ("
+                "SELECT key FROM scrape_cache ORDER BY created_at DESC LIMIT -1 OFFSET ?)",
+                (self.max_entries,)
+            ).rowcount
+            self._conn.commit()
+        self.counters["evictions"] += expired + overflow
+
+    def stats(self):
+        raw, stored = self.counters["bytes_raw"], self.counters["bytes_stored"]
+        return {
+            **self.counters,
+            "compression_ratio": round(raw / stored, 2) if stored else None,
+            "enabled": self.enabled,
+        }
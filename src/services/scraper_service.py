@@ -1,103 +1,355 @@
+import os
+import time
 import asyncio
-from playwright.async_api import async_playwright
-from bs4 import BeautifulSoup
 from fake_useragent import UserAgent
 import logging
-import re
+from contextlib import nullcontext
+from src.services.review import Review
+from src.services.browser_pool import BrowserPool
+from src.services.request_policy import RequestPolicy, detect_platform
+from src.services.review_scroller import ReviewScroller, REVIEW_SELECTOR
+from src.services.review_extractor import ReviewCollector
+from src.services.html_text import extract_text, resolve_backend
+from src.services.maps_rpc import ReviewRpcCapture
+from src.services.http_fetcher import HttpFetcher, TierStats, has_enough_review_text
+from src.services.maps_url import MapsUrlCanonicalizer, CanonicalPlace
+from src.services.scrape_cache import ScrapeCache
+from src.services.singleflight import SingleFlight
+from src.services.debug_artifacts import DebugArtifacts
+
+FEED_TEXT_JS = "() => { const feed = document.querySelector('div[role=\"feed\"]'); return feed ? feed.innerText.trim() : ''; }"
 
 logger = logging.getLogger(__name__)
 
 class ScraperService:
-    def __init__(self):
+    def __init__(self, pool: BrowserPool | None = None):
         self.ua = UserAgent()
+        self.pool = pool or BrowserPool.from_env()
+        self.block_resources = os.getenv("SCRAPER_BLOCK_RESOURCES", "1") != "0"
+        self.network_totals = {}
+        self.html_parser = resolve_backend()
+        self.maps_extraction = os.getenv("SCRAPER_MAPS_EXTRACTION", "rpc").lower()
+        self.scroll_settings = {
+            "max_reviews": int(os.getenv("SCRAPER_MAX_REVIEWS", "100")),
+            "max_scrolls": int(os.getenv("SCRAPER_MAX_SCROLLS", "40")),
+            "stall_limit": int(os.getenv("SCRAPER_SCROLL_STALLS", "2")),
+            "max_wait": float(os.getenv("SCRAPER_SCROLL_MAX_WAIT", "6.0")),
+        }
+        self.scroll_totals = {"scrapes": 0, "reviews": 0, "seconds": 0.0, "stalls": 0}
+        # Generic pages try plain HTTP first and only escalate to the browser when needed
+        self.http = HttpFetcher.from_env()
+        self.http_first = os.getenv("SCRAPER_HTTP_FIRST", "1") != "0"
+        self.tiers = {"http": TierStats(), "browser": TierStats()}
+        self.urls = MapsUrlCanonicalizer.from_env(self.http.resolve)
+        self.cache = ScrapeCache.from_env()
+        self.singleflight = SingleFlight()
+        self._refreshes = set()
+        self.refresh_counters = {"background_refreshes": 0, "refresh_errors": 0}
+        self.debug = DebugArtifacts.from_env()
+
+    async def start(self):
+        """Launches the shared browser ahead of the first scrape (app startup)."""
+        try:
+            await self.pool.start()
+        except Exception as e:
+            # Leave it to the first lease to retry, so the API still serves without Chromium
+            logger.warning(f"Browser pool did not start: {e}")
+
+    async def stop(self):
+        for task in self._refreshes:
+            task.cancel()
+        await asyncio.gather(*self._refreshes, return_exceptions=True)
+        await self.http.aclose()
+        await self.pool.stop()
+
+    def stats(self):
+        return {
+            "browser_pool": self.pool.stats(),
+            "network": self._network_summary(),
+            "scroll": self._scroll_summary(),
+            "tiers": {name: tier.snapshot() for name, tier in self.tiers.items()},
+            "urls": self.urls.stats(),
+            "cache": {**self.cache.stats(), **self.refresh_counters},
+            "singleflight": self.singleflight.stats(),
+            "debug": self.debug.stats(),
+        }
+
+    async def canonicalize(self, url: str) -> CanonicalPlace:
+        """
+        Canonical place for a URL (short links resolved, tracking stripped).
+        Caches, the review store and job coalescing key on place.key.
+        """
+        return await self.urls.canonicalize(url)
+
+    async def scrape_place(self, place: CanonicalPlace, force_refresh: bool = False,
+                           known_review_ids: set[str] | None = None,
+                           debug: bool | None = None, artifact_id: str | None = None,
+                           throttle=None):
+        """
+        Scrape result for a canonical place through the disk cache.
+        Fresh entries are returned directly; stale ones are returned and
+        refreshed in the background; force_refresh always scrapes. Concurrent
+        scrapes of one place share a single browser session.
+        throttle(url), an async context manager (BatchScraper politeness),
+        is held around the scrape only when the cache cannot answer.
+        """
+        if not force_refresh:
+            entry = await self.cache.get(place.key)
+            if entry is not None:
+                result, age, fresh = entry
+                if not fresh:
+                    self._refresh_in_background(place)
+                result["reviews"] = [Review.from_dict(r) for r in result.get("reviews") or []]
+                result["cache"] = {"status": "fresh" if fresh else "stale", "age_s": round(age)}
+                return result
+
+        async with throttle(place.url) if throttle is not None else nullcontext():
+            result = await self.singleflight.do(
+                place.key, lambda: self._scrape_and_cache(place, known_review_ids, debug, artifact_id)
+            )
+        return {**result, "cache": {"status": "refreshed" if force_refresh else "miss", "age_s": 0}}
+
+    async def _scrape_and_cache(self, place: CanonicalPlace, known_review_ids=None,
+                                debug=None, artifact_id=None):
+        result = await self.scrape_url(place.url, known_review_ids=known_review_ids,
+                                       debug=debug, artifact_id=artifact_id)
+        if result["status"] == "success":
+            await self.cache.set(place.key, {**result, "reviews": [r.to_dict() for r in result.get("reviews") or []]})
+        return result
+
+    def _refresh_in_background(self, place: CanonicalPlace):
+        if self.singleflight.pending(place.key) is not None:
+            return
+        self.refresh_counters["background_refreshes"] += 1
+
+        async def refresh():
+            try:
+                await self.singleflight.do(place.key, lambda: self._scrape_and_cache(place))
+            except Exception as e:
+                self.refresh_counters["refresh_errors"] += 1
+                logger.warning(f"Background refresh of {place.key} failed: {e}")
+
+        task = asyncio.ensure_future(refresh())
+        self._refreshes.add(task)
+        task.add_done_callback(self._refreshes.discard)
 
-    async def scrape_url(self, url: str):
+    async def scrape_url(self, url: str, block_resources: bool | None = None,
+                         known_review_ids: set[str] | None = None,
+                         debug: bool | None = None, artifact_id: str | None = None,
+                         fixture=None):
         """
         Scrapes a given URL using Playwright to handle dynamic content.
         Smartly detects platform based on URL.
+        Images, fonts, map tiles and analytics are blocked unless
+        block_resources=False (default: SCRAPER_BLOCK_RESOURCES).
+        Maps results carry Review objects under "reviews"; with known_review_ids
+        reviews are sorted newest first and scrolling stops at the first known one.
+        Generic pages are fetched over plain HTTP first (SCRAPER_HTTP_FIRST).
+        Browser scrapes are screenshotted when debug=True or sampled
+        (SCRAPER_DEBUG_SAMPLE_RATE), without delaying the result.
+        fixture (src/devtools/scrape_fixtures.py) records the browser session
+        or replays a recorded one offline.
         """
-        async with async_playwright() as p:
-            # Launch with anti-detection args
-            browser = await p.chromium.launch(headless=True)
-            context = await browser.new_context(
-                user_agent=self.ua.random,
-                viewport={'width': 1920, 'height': 1080}
-            )
+        platform = detect_platform(url)
+        if block_resources is None:
+            block_resources = self.block_resources
+
+        if platform == "generic" and self.http_first and fixture is None:
+            result = await self._scrape_static(url)
+            if result is not None:
+                return result
+
+        # Fresh isolated context on the shared browser; closed when the job ends
+        async with self.pool.lease(
+            user_agent=self.ua.random,
+            viewport={'width': 1920, 'height': 1080}
+        ) as context:
             page = await context.new_page()
+            policy = RequestPolicy(platform, enabled=block_resources)
+            await policy.attach(context, page)
+            if fixture is not None:
+                await fixture.attach(context, page)
+            metrics = {}
+            started = time.perf_counter()
             
             try:
                 logger.info(f"Navigating to {url}")
-                if "google.com/maps" in url or "goo.gl" in url:
-                    raw_text = await self.scrape_google_maps(page, url)
-                    status = "success" if raw_text else "failed"
-                    return {
+                if platform == "google_maps":
+                    raw_text, reviews = await self.scrape_google_maps(page, url, metrics, known_review_ids)
+                    status = "success" if raw_text or reviews else "failed"
+                    result = {
                         "url": url,
                         "raw_text": raw_text,
+                        "reviews": reviews,
                         "status": status
                     }
-        
-                await page.goto(url, wait_until="networkidle", timeout=60000)
-                
-                # Basic scroll to load more content
-                for _ in range(3):
-                    await page.keyboard.press("End")
-                    await asyncio.sleep(2)
-                
-                content = await page.content()
-                soup = BeautifulSoup(content, 'html.parser')
-                
-                # Remove scripts and styles
-                for script in soup(["script", "style"]):
-                    script.decompose()
+                else:
+                    await page.goto(url, wait_until="networkidle", timeout=60000)
                     
-                text = soup.get_text(separator='\n')
-                lines = [line.strip() for line in text.splitlines() if line.strip()]
-                cleaned_text = '\n'.join(lines[:500])
-                
-                return {
-                    "url": url,
-                    "raw_text": cleaned_text,
-                    "status": "success"
-                }
+                    # Basic scroll to load more content
+                    for _ in range(3):
+                        await page.keyboard.press("End")
+                        await asyncio.sleep(2)
+                    
+                    content = await page.content()
+                    
+                    # Text extraction is CPU-bound: keep it off the event loop
+                    parse_started = time.perf_counter()
+                    cleaned_text = await asyncio.to_thread(extract_text, content, self.html_parser)
+                    metrics["parse"] = {
+                        "backend": self.html_parser,
+                        "parse_ms": round((time.perf_counter() - parse_started) * 1000, 1),
+                        "html_chars": len(content),
+                    }
+                    
+                    result = {
+                        "url": url,
+                        "raw_text": cleaned_text,
+                        "status": "success"
+                    }
 
             except Exception as e:
                 logger.error(f"Error scraping {url}: {e}")
-                return {
+                result = {
                     "url": url,
                     "error": str(e),
                     "status": "failed"
                 }
-            finally:
-                await browser.close()
 
-    async def scrape_google_maps(self, page, url):
+            elapsed = time.perf_counter() - started
+            if fixture is not None:
+                await fixture.finish()
+            network = policy.stats()
+            result["metrics"] = {"tier": "browser", "elapsed_ms": round(elapsed * 1000), "network": network, **metrics}
+            self.tiers["browser"].record(elapsed, result["status"] == "success", "failed")
+            if self.debug.wanted(debug):
+                # The context stays open until the screenshot is written; the result returns now
+                artifact_dir = self.debug.artifact_dir(artifact_id)
+                summary = {k: v for k, v in result.items() if k not in ("raw_text", "reviews")}
+                self.pool.hold(context, self.debug.capture(page, artifact_dir, summary))
+                result["debug"] = {"artifact_dir": artifact_dir}
+            if result["status"] == "success":
+                self._record_network(platform, block_resources, elapsed, network["bytes_downloaded"])
+            logger.info(
+                f"Scrape finished in {elapsed:.1f}s, {network['bytes_downloaded'] / 1024:.0f} KiB downloaded, "
+                f"{network['blocked']} requests {'blocked' if block_resources else 'blockable'}"
+            )
+            return result
+
+    async def _scrape_static(self, url: str):
+        """Plain-HTTP tier. Returns None when the page needs the browser."""
+        started = time.perf_counter()
+        reason = None
+        try:
+            status, html = await self.http.fetch(url, user_agent=self.ua.random)
+            if status >= 400:
+                reason = f"http_{status}"
+            elif html is None:
+                reason = "not_html"
+            else:
+                parse_started = time.perf_counter()
+                text = await asyncio.to_thread(extract_text, html, self.html_parser)
+                parse = {
+                    "backend": self.html_parser,
+                    "parse_ms": round((time.perf_counter() - parse_started) * 1000, 1),
+                    "html_chars": len(html),
+                }
+                if not has_enough_review_text(text):
+                    reason = "thin_content"
+        except Exception as e:
+            logger.info(f"HTTP fetch failed for {url}: {e}")
+            reason = "error"
+
+        elapsed = time.perf_counter() - started
+        self.tiers["http"].record(elapsed, reason is None, reason)
+        if reason:
+            logger.info(f"Escalating {url} to the browser ({reason})")
+            return None
+
+        logger.info(f"Served {url} over plain HTTP in {elapsed:.2f}s")
+        return {
+            "url": url,
+            "raw_text": text,
+            "status": "success",
+            "metrics": {"tier": "http", "elapsed_ms": round(elapsed * 1000), "parse": parse},
+        }
+
+    def _record_network(self, platform, blocking, elapsed, bytes_downloaded):
+        totals = self.network_totals.setdefault((platform, blocking), {"scrapes": 0, "seconds": 0.0, "bytes": 0})
+        totals["scrapes"] += 1
+        totals["seconds"] += elapsed
+        totals["bytes"] += bytes_downloaded
+
+    def _record_scroll(self, scroll_stats):
+        self.scroll_totals["scrapes"] += 1
+        self.scroll_totals["reviews"] += scroll_stats["reviews"]
+        self.scroll_totals["seconds"] += scroll_stats["seconds"]
+        self.scroll_totals["stalls"] += scroll_stats["stalls"]
+
+    def _scroll_summary(self):
+        totals = self.scroll_totals
+        return {
+            **totals,
+            "seconds": round(totals["seconds"], 3),
+            "reviews_per_second": round(totals["reviews"] / totals["seconds"], 2) if totals["seconds"] else None,
+        }
+
+    def _network_summary(self):
+        """Average time/bytes per platform with and without blocking, and the difference."""
+        summary = {}
+        for (platform, blocking), totals in self.network_totals.items():
+            mode = "blocked" if blocking else "unblocked"
+            summary.setdefault(platform, {})[mode] = {
+                "scrapes": totals["scrapes"],
+                "avg_ms": round(totals["seconds"] / totals["scrapes"] * 1000),
+                "avg_bytes": round(totals["bytes"] / totals["scrapes"]),
+            }
+        for modes in summary.values():
+            if "blocked" in modes and "unblocked" in modes:
+                modes["time_saved_ms"] = modes["unblocked"]["avg_ms"] - modes["blocked"]["avg_ms"]
+                modes["bytes_saved"] = modes["unblocked"]["avg_bytes"] - modes["blocked"]["avg_bytes"]
+        return summary
+
+    async def scrape_google_maps(self, page, url, metrics: dict | None = None,
+                                 known_review_ids: set[str] | None = None):
         """
         Scrape Google Maps reviews - hybrid approach combining proven techniques.
         Uses working text extraction with improved review identification.
+        Reviews are decoded from the listugcposts RPC responses when possible
+        (SCRAPER_MAPS_EXTRACTION=rpc) and completed from the DOM; with "dom"
+        only the DOM is read.
+        Scroll/extraction metrics are written to `metrics` when a dict is given.
+        Returns (fallback text, reviews); the text is only filled in when no
+        structured reviews could be extracted.
         """
         logger.info(f"Scraping Google Maps reviews: {url}")
         
         try:
+            # Step 0: Capture review RPC payloads from the first request on
+            capture = None
+            if self.maps_extraction == "rpc":
+                capture = ReviewRpcCapture(page)
+                capture.attach()
+            
             # Step 1: Navigate
             await page.goto(url, wait_until="domcontentloaded", timeout=30000)
-            await page.wait_for_timeout(3000)
             
             # Step 2: Handle consent
             try:
                 consent_button = page.locator('button:has-text("Accept all"), button:has-text("全部接受")')
                 await consent_button.first.click(timeout=3000)
                 logger.info("Clicked consent")
-                await page.wait_for_timeout(1000)
+                await page.wait_for_load_state("domcontentloaded")
             except:
                 pass
             
             # Step 3: Try to click Reviews tab
             try:
                 review_button = page.locator('button:has-text("評論"), button:has-text("Reviews"), button[aria-label*="Reviews"], button[aria-label*="評論"]')
-                if await review_button.count() > 0:
-                    await review_button.first.click(timeout=5000)
-                    logger.info("Clicked Reviews tab")
-                    await page.wait_for_timeout(2000)
+                await review_button.first.wait_for(timeout=5000)
+                await review_button.first.click(timeout=5000)
+                logger.info("Clicked Reviews tab")
+                await page.wait_for_selector(REVIEW_SELECTOR, timeout=5000)
             except:
                 logger.info("Could not click Reviews tab or already on reviews")
             
@@ -107,13 +359,18 @@ class ScraperService:
                 if await more_button.count() > 0:
                     await more_button.first.click(timeout=3000)
                     logger.info("Clicked 'More reviews'")
-                    await page.wait_for_timeout(2000)
+                    await page.wait_for_selector(REVIEW_SELECTOR, timeout=3000)
             except:
                 pass
             
-            # Step 5: Find and scroll reviews container
-            # Try multiple container selectors
-            scrolled = False
+            # Step 4b: Re-scrape: newest first, so known reviews mark where to stop
+            # (only when sorting worked; in relevance order known reviews prove nothing)
+            stop_at = None
+            if known_review_ids and await self._sort_reviews_newest(page):
+                stop_at = known_review_ids
+            rpc_seen_before = len(capture.records) if capture is not None else 0
+            
+            # Step 5: Find and scroll reviews container until no new reviews arrive
             container_selectors = [
                 'div[role="feed"]',
                 '.m6QErb', 
@@ -122,92 +379,76 @@ class ScraperService:
                 'div.DxyBCb'
             ]
             
+            container_selector = None
             for selector in container_selectors:
-                try:
-                    container = await page.query_selector(selector)
-                    if container:
-                        logger.info(f"Found container: {selector}, scrolling...")
-                        
-                        # Scroll within container
-                        for i in range(12):
-                            prev_height = await page.evaluate(f'document.querySelector("{selector}").scrollHeight')
-                            await page.evaluate(f'document.querySelector("{selector}").scrollTop = document.querySelector("{selector}").scrollHeight')
-                            await page.wait_for_timeout(1500)
-                            new_height = await page.evaluate(f'document.querySelector("{selector}").scrollHeight')
-                            
-                            if new_height == prev_height:
-                                logger.info(f"Scroll complete at iteration {i+1}")
-                                break
-                        
-                        scrolled = True
-                        break
-                except Exception as e:
-                    continue
-            
-            if not scrolled:
-                # Fallback: page scroll
+                if await page.query_selector(selector):
+                    container_selector = selector
+                    break
+            
+            if container_selector:
+                logger.info(f"Found container: {container_selector}, scrolling...")
+            else:
                 logger.info("Using fallback page scroll")
-                for _ in range(8):
-                    await page.mouse.wheel(0, 3000)
-                    await page.wait_for_timeout(1500)
-            
-            # Step 6: Extract content with improved parsing
-            await page.wait_for_timeout(1000)
-            content = await page.content()
-            soup = BeautifulSoup(content, 'html.parser')
-            
-            # Try to extract individual reviews with common selectors
-            reviews_text = []
-            
-            # Look for review text elements
-            text_selectors = [
-                ('span', {'class': re.compile(r'wiI7pd|MyEned', re.I)}),
-                ('div', {'class': re.compile(r'.*review.*text', re.I)}),
-                ('span', {'class': re.compile(r'.*review.*', re.I)}),
-            ]
             
-            for tag, attrs in text_selectors:
-                elements = soup.find_all(tag, attrs)
-                if elements:
-                    logger.info(f"Found {len(elements)} elements with {tag} {attrs}")
-                    for elem in elements[:30]:  # Limit to 30
-                        text = elem.get_text(strip=True, separator=' ')
-                        # Filter: must be substantial text (> 20 chars) and not menu items
-                        if (len(text) > 20 and 
-                            not text in ['搜尋', 'Google', '地圖', 'Maps', '路線', 'Directions'] and
-                            not text.startswith('http')):
-                            reviews_text.append(text)
-                    if reviews_text:
-                        break
-            
-            # If structured extraction worked, format nicely
-            if reviews_text:
-                formatted = '\n\n---評論---\n\n'.join(reviews_text)
-                logger.info(f"Extracted {len(reviews_text)} reviews via selectors, {len(formatted)} chars")
-                
-                # Save debug screenshot
-                try:
-                    await page.screenshot(path="scraper_debug.png")
-                except:
-                    pass
+            # Reviews are extracted in the page as they render and drained per batch
+            collector = ReviewCollector(page)
+            await collector.install()
+            
+            async def on_batch():
+                batch_ids = {r.id for r in await collector.drain()}
+                if not stop_at:
+                    return False
+                if capture is not None:
+                    batch_ids.update(list(capture.records)[rpc_seen_before:])
+                return not batch_ids.isdisjoint(stop_at)
+            
+            scroller = ReviewScroller(page, container_selector, on_progress=on_batch, **self.scroll_settings)
+            scroll_stats = await scroller.run()
+            logger.info(
+                f"Loaded {scroll_stats['reviews']} reviews in {scroll_stats['seconds']:.1f}s "
+                f"({scroll_stats['reviews_per_second']} reviews/s, {scroll_stats['scrolls']} scrolls)"
+            )
+            self._record_scroll(scroll_stats)
+            
+            # Step 6: Collect the remaining records
+            await collector.drain()
+            extraction = await collector.stats()
+            records = []
+            if capture is not None:
+                await capture.flush()
+                capture.detach()
+                records = list(capture.records.values())
+                extraction["rpc"] = capture.stats()
+            
+            # The first reviews usually ship with the page itself, not the RPC
+            known_ids = {r.id for r in records}
+            dom_only = [r for r in collector.records if r.id not in known_ids]
+            extraction["from_rpc"] = len(records)
+            extraction["from_dom"] = len(dom_only)
+            records += dom_only
+            if metrics is not None:
+                metrics["scroll"] = scroll_stats
+                metrics["extraction"] = extraction
+            
+            # Structured extraction worked: no text blob needed
+            if any(r.text for r in records):
+                logger.info(
+                    f"Extracted {len(records)} reviews ({extraction['from_rpc']} from RPC, "
+                    f"{extraction['from_dom']} from DOM)"
+                )
                 
-                return formatted
+                return "", records
             
             # Fallback: extract from feed or all text
             logger.info("Using fallback text extraction")
-            feed = soup.find('div', role='feed')
-            if feed:
-                text = feed.get_text(separator='\n', strip=True)
-                if len(text) > 100:
-                    logger.info(f"Extracted {len(text)} chars from feed")
-                    return text
+            text = await page.evaluate(FEED_TEXT_JS)
+            if len(text) > 100:
+                logger.info(f"Extracted {len(text)} chars from feed")
+                return text, []
             
-            # Last resort: clean all visible text
-            for tag in soup(['script', 'style', 'meta', 'link']):
-                tag.decompose()
-            
-            text = soup.get_text(separator='\n', strip=True)
-            lines = [line for line in text.splitlines() if line.strip() and len(line) > 10]
+            # Last resort: all visible text
+            text = await page.evaluate("() => document.body.innerText")
+            lines = [line.strip() for line in text.splitlines() if line.strip() and len(line.strip()) > 10]
             
             # Filter out common navigation items
             filtered = [
@@ -218,16 +459,23 @@ class ScraperService:
             result = '\n'.join(filtered[:200])  # Limit lines
             logger.info(f"Fallback extraction: {len(result)} chars")
             
-            # Save debug screenshot
-            try:
-                await page.screenshot(path="scraper_debug.png")
-            except:
-                pass
-            
-            return result
+            return result, []
             
         except Exception as e:
             logger.error(f"Google Maps scraping error: {e}")
             import traceback
             traceback.print_exc()
-            return ""
+            return "", []
+
+    async def _sort_reviews_newest(self, page):
+        try:
+            sort_button = page.locator('button[aria-label*="排序"], button[aria-label*="Sort"], button[data-value="排序"], button[data-value="Sort"]')
+            await sort_button.first.click(timeout=3000)
+            newest = page.locator('div[role="menuitemradio"]:has-text("最新"), div[role="menuitemradio"]:has-text("Newest")')
+            await newest.first.click(timeout=3000)
+            await page.wait_for_selector(REVIEW_SELECTOR, timeout=5000)
+            logger.info("Sorted reviews by newest")
+            return True
+        except Exception:
+            logger.info("Could not sort reviews by newest")
+            return False
@@ -0,0 +1,53 @@
+import asyncio
+
+
+class SingleFlight:
+    """
+    Coalesces concurrent calls that share a key into a single execution.
+    The first caller starts the work as a task; callers arriving while it is
+    still running await the same task instead of starting their own.
+    """
+
+    def __init__(self):
+        self._inflight = {}
+        self.counters = {
+            "calls": 0,
+            "executions": 0,
+            "coalesced": 0,
+        }
+
+    async def do(self, key: str, fn):
+        """
+        Runs fn() (a coroutine function) once per key at a time and returns
+        its result to every concurrent caller.
+        """
+        self.counters["calls"] += 1
+        task = self._inflight.get(key)
+        if task is None:
+            task = asyncio.ensure_future(fn())
+            self._inflight[key] = task
+            task.add_done_callback(lambda t: self._forget(key, t))
+            self.counters["executions"] += 1
+        else:
+            self.counters["coalesced"] += 1
+
+        # Shield so one caller going away (e.g. a closed HTTP connection)
+        # does not cancel the shared call for everyone else.
+        return await asyncio.shield(task)
+
+    def pending(self, key: str):
+        """Returns the in-flight task for key, if any."""
+        return self._inflight.get(key)
+
+    def _forget(self, key, task):
+        if self._inflight.get(key) is task:
+            del self._inflight[key]
+        if not task.cancelled():
+            # Mark the exception as retrieved when every waiter has left
+            task.exception()
+
+    def stats(self):
+        return {
+            **self.counters,
+            "in_flight_keys": len(self._inflight),
+        }
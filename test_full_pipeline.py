@@ -1,5 +1,8 @@
+import argparse
 import asyncio
 import logging
+from pathlib import Path
+from src.devtools.scrape_fixtures import FixtureReplayer, ScrapeFixture
 from src.services.scraper_service import ScraperService
 from src.services.llm_service import LLMService
 
@@ -7,7 +10,11 @@ from src.services.llm_service import LLMService
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
-async def main():
+# Replayed by default so scraping runs offline; --live scrapes the URL below.
+# For a fully offline run point GEMINI_BASE_URL at python -m src.devtools.fake_gemini.
+FIXTURE = Path("benchmarks/fixtures/scrapes/synthetic_maps_place.json.gz")
+
+async def main(live: bool, fixture_path: Path):
     scraper = ScraperService()
     llm = LLMService()
     
@@ -20,15 +27,23 @@ async def main():
     # Step 1: Scrape
     print("\n[1/2] Scraping...")
     try:
-        scrape_result = await scraper.scrape_url(url)
+        if live:
+            scrape_result = await scraper.scrape_url(url)
+        else:
+            fixture = ScrapeFixture.load(fixture_path)
+            print(f"Replaying {fixture_path}")
+            scrape_result = await scraper.scrape_url(fixture.url, fixture=FixtureReplayer(fixture))
+        await scraper.stop()
         if scrape_result['status'] == 'failed':
             print(f"❌ Scraping failed: {scrape_result.get('error')}")
             return
         
-        raw_text = scrape_result['raw_text']
-        print(f"✅ Scraped {len(raw_text)} characters")
-        print(f"Preview: {raw_text[:200]}...")
+        reviews = scrape_result.get('reviews') or []
+        raw_text = scrape_result.get('raw_text') or ''
+        print(f"✅ Scraped {len(reviews)} reviews, {len(raw_text)} characters of unstructured text")
+        print(f"Preview: {(reviews[0].text if reviews else raw_text)[:200]}...")
     except Exception as e:
+        await scraper.stop()
         print(f"❌ Scraping error: {e}")
         import traceback
         traceback.print_exc()
@@ -37,7 +52,7 @@ async def main():
     # Step 2: Analyze with LLM
     print("\n[2/2] Analyzing with Gemini...")
     try:
-        analysis_result = await llm.analyze_content(raw_text)
+        analysis_result = await llm.analyze_content(reviews or raw_text)
         print(f"✅ LLM Response received")
         print(f"Response type: {type(analysis_result)}")
         print(f"Response:\n{analysis_result}")
@@ -55,8 +70,11 @@ async def main():
                 print(json.dumps(parsed, indent=2, ensure_ascii=False))
             except json.JSONDecodeError as je:
                 print(f"\n❌ JSON parse error: {je}")
+        elif isinstance(analysis_result, dict) and "error" not in analysis_result:
+            print(f"\n✅ Analysis result:")
+            print(json.dumps(analysis_result, indent=2, ensure_ascii=False))
         else:
-            print(f"Response is not a string: {analysis_result}")
+            print(f"❌ Analysis failed: {analysis_result}")
             
     except Exception as e:
         print(f"❌ LLM analysis error: {e}")
@@ -69,4 +87,8 @@ async def main():
     print("="*60)
 
 if __name__ == "__main__":
-    asyncio.run(main())
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--live", action="store_true", help="scrape the live Maps URL instead of the fixture")
+    parser.add_argument("--fixture", type=Path, default=FIXTURE)
+    args = parser.parse_args()
+    asyncio.run(main(args.live, args.fixture))
@@ -1,22 +1,36 @@
+import argparse
 import asyncio
 import logging
+from pathlib import Path
+from src.devtools.scrape_fixtures import FixtureReplayer, ScrapeFixture
 from src.services.scraper_service import ScraperService
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
-async def main():
+# Replayed by default so the script runs offline; --live scrapes the URL below
+FIXTURE = Path("benchmarks/fixtures/scrapes/synthetic_maps_place.json.gz")
+
+async def main(live: bool, fixture_path: Path):
     service = ScraperService()
     url = "https://www.google.com/maps/place/Pizza+Shalom+%E6%9F%B4%E7%87%92%E7%AA%AF%E7%83%A4%E6%8A%AB%E8%96%A9/@24.8294946,121.0264991,17z/data=!4m8!3m7!1s0x346837d8ac8c2283:0x87892d179da342bf!8m2!3d24.8294946!4d121.0264991!9m1!1b1!16s%2Fg%2F11kccf84lx?entry=ttu&g_ep=EgoyMDI2MDExMy4wIKXMDSoASAFQAw%3D%3D"
     
-    print(f"Testing scraper with URL: {url}")
     try:
-        result = await service.scrape_url(url)
+        if live:
+            print(f"Testing scraper with URL: {url}")
+            result = await service.scrape_url(url)
+        else:
+            fixture = ScrapeFixture.load(fixture_path)
+            print(f"Testing scraper with fixture: {fixture_path} ({fixture.url})")
+            result = await service.scrape_url(fixture.url, fixture=FixtureReplayer(fixture))
         print("Scraping Result Status:", result.get("status"))
+        reviews = result.get("reviews") or []
         raw_text = result.get("raw_text", "")
-        print(f"Extracted Text Length: {len(raw_text)}")
-        print("--- Text Preview ---")
+        print(f"Extracted Reviews: {len(reviews)}, Text Length: {len(raw_text)}")
+        print("--- Preview ---")
+        for review in reviews[:5]:
+            print(review.to_json())
         print(raw_text[:1000])
         print("--- End Preview ---")
     except Exception as e:
@@ -24,6 +38,12 @@ async def main():
         print(e)
         import traceback
         traceback.print_exc()
+    finally:
+        await service.stop()
 
 if __name__ == "__main__":
-    asyncio.run(main())
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--live", action="store_true", help="scrape the live Maps URL instead of the fixture")
+    parser.add_argument("--fixture", type=Path, default=FIXTURE)
+    args = parser.parse_args()
+    asyncio.run(main(args.live, args.fixture))
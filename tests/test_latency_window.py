@@ -0,0 +1,23 @@
+import unittest
+
+from src.services.latency_window import LatencyWindow
+
+
+class LatencyWindowTest(unittest.TestCase):
+    def test_empty(self):
+        window = LatencyWindow()
+        self.assertIsNone(window.percentile(0.95))
+        self.assertIsNone(window.mean_ms())
+
+    def test_nearest_rank_over_recent_samples(self):
+        window = LatencyWindow(size=10)
+        for ms in range(1, 21):
+            window.add(ms / 1000)
+        self.assertEqual(len(window), 10)
+        self.assertEqual(window.percentile_ms(0.50), 16.0)
+        self.assertEqual(window.percentile_ms(0.95), 20.0)
+        self.assertEqual(window.mean_ms(), 15.5)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,60 @@
+import json
+import unittest
+from types import SimpleNamespace
+
+from src.services.llm_cache import LLMCache
+from src.services.llm_service import LLMService, _chunk_partial
+
+REVIEWS = {
+    "餐點好吃 A": {"good": [{"label": "餐點美味", "count": 1}], "bad": []},
+    "餐點好吃 B": {"good": [{"label": "餐點美味", "count": "1則"}], "bad": []},
+    "等很久 C": [{"label": "出餐慢", "count": 1}],
+    "等很久 D": {"good": [], "bad": ["出餐慢"]},
+}
+
+
+class ScriptedModels:
+    """Answers each single-review chunk with the reply scripted for it."""
+
+    async def generate_content(self, model, contents, config=None):
+        if "Group customer feedback" in contents:
+            return SimpleNamespace(text='{"good": [], "bad": []}')
+        reply = next(reply for review, reply in REVIEWS.items() if review in contents)
+        return SimpleNamespace(text=json.dumps(reply, ensure_ascii=False))
+
+
+class ChunkPartialTest(unittest.TestCase):
+    def test_counts_are_coerced(self):
+        partial = _chunk_partial({"good": [{"label": "服務", "count": "3則"},
+                                           {"label": "環境", "count": 2.0},
+                                           {"label": "價格", "count": "很多"}]})
+        self.assertEqual(partial["good"], [("服務", 3), ("環境", 2), ("價格", 0)])
+        self.assertEqual(partial["platform"], "Other")
+
+    def test_topics_without_label_are_skipped(self):
+        self.assertEqual(_chunk_partial({"bad": [{"count": 2}, {"label": " "}]})["bad"], [])
+
+    def test_rejects_wrong_shapes(self):
+        for data in ([], "ok", {"good": "服務"}, {"bad": ["出餐慢"]}, {"good": {"label": "服務"}}):
+            with self.subTest(data=data), self.assertRaises(ValueError):
+                _chunk_partial(data)
+
+
+class AnalyzeContentTest(unittest.IsolatedAsyncioTestCase):
+    async def test_malformed_chunk_is_dropped(self):
+        llm = LLMService()
+        llm.model = ScriptedModels()
+        llm.cache = LLMCache(path=None, memory_entries=0)
+        llm.analysis_chunk_tokens = 1  # one review per chunk
+
+        result = await llm.analyze_content("\n\n".join(REVIEWS))
+
+        self.assertEqual(result["chunks"], 2)
+        self.assertEqual(result["reviews_covered"], 2)
+        self.assertEqual(result["reviews_total"], 4)
+        self.assertEqual(result["good"], [{"label": "餐點美味", "value": 100}])
+        self.assertEqual(result["bad"], [])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,189 @@
+import asyncio
+import time
+import unittest
+from types import SimpleNamespace
+
+from src.services.llm_cache import LLMCache
+from src.services.llm_scheduler import (
+    LLMScheduler, Priority, PRIORITY_BULK, PRIORITY_INTERACTIVE, PRIORITY_STANDARD,
+)
+from src.services.llm_service import LLMService
+
+
+class _RateLimited(Exception):
+    code = 429
+    response = SimpleNamespace(headers={"retry-after": "0.3"})
+
+
+class LaneTest(unittest.IsolatedAsyncioTestCase):
+    async def test_lanes_are_served_in_priority_order(self):
+        scheduler = LLMScheduler(max_in_flight=1, interactive_reserved=0)
+        order = []
+
+        async def call(name, priority):
+            async with scheduler.slot(priority):
+                order.append(name)
+                await asyncio.sleep(0.01)
+
+        blocker = asyncio.ensure_future(call("blocker", PRIORITY_STANDARD))
+        await asyncio.sleep(0)
+        queued = [asyncio.ensure_future(call(name, priority)) for name, priority in [
+            ("bulk 1", PRIORITY_BULK), ("standard", PRIORITY_STANDARD),
+            ("bulk 2", PRIORITY_BULK), ("chat", PRIORITY_INTERACTIVE),
+        ]]
+        await asyncio.gather(blocker, *queued)
+        self.assertEqual(order, ["blocker", "chat", "standard", "bulk 1", "bulk 2"])
+
+    async def test_reserved_slots_are_left_for_interactive(self):
+        scheduler = LLMScheduler(max_in_flight=3, interactive_reserved=1)
+        release = asyncio.Event()
+
+        async def call(priority):
+            async with scheduler.slot(priority):
+                await release.wait()
+
+        calls = [asyncio.ensure_future(call(PRIORITY_BULK)) for _ in range(3)]
+        await asyncio.sleep(0)
+        self.assertEqual(scheduler.in_flight, 2)
+        self.assertEqual(scheduler.lanes[PRIORITY_BULK].queued, 1)
+
+        calls.append(asyncio.ensure_future(call(PRIORITY_INTERACTIVE)))
+        await asyncio.sleep(0)
+        self.assertEqual(scheduler.in_flight, 3)
+        self.assertEqual(scheduler.lanes[PRIORITY_INTERACTIVE].queued, 0)
+
+        release.set()
+        await asyncio.gather(*calls)
+        self.assertEqual(scheduler.in_flight, 0)
+
+    async def test_cancelled_while_queued(self):
+        scheduler = LLMScheduler(max_in_flight=1, interactive_reserved=0)
+        await scheduler.acquire()
+        waiter = asyncio.ensure_future(scheduler.acquire(PRIORITY_BULK))
+        await asyncio.sleep(0)
+        self.assertEqual(scheduler.lanes[PRIORITY_BULK].queued, 1)
+
+        waiter.cancel()
+        with self.assertRaises(asyncio.CancelledError):
+            await waiter
+        self.assertEqual(scheduler.lanes[PRIORITY_BULK].queued, 0)
+
+        # The cancelled entry does not take the slot when it frees up
+        scheduler.release()
+        await asyncio.wait_for(scheduler.acquire(), 1)
+        self.assertEqual(scheduler.in_flight, 1)
+        self.assertEqual(scheduler.lanes[PRIORITY_BULK].dispatched, 0)
+
+
+class RetryTest(unittest.IsolatedAsyncioTestCase):
+    async def test_429_pauses_every_caller(self):
+        scheduler = LLMScheduler(max_in_flight=4, interactive_reserved=0, backoff_base=0.01)
+        attempts = []
+
+        async def limited():
+            attempts.append(time.monotonic())
+            if len(attempts) == 1:
+                raise _RateLimited()
+            return "ok"
+
+        start = time.monotonic()
+        first = asyncio.ensure_future(scheduler.run(limited))
+        await asyncio.sleep(0.05)
+        # Arrives during the pause and must wait it out too
+        other_started = []
+
+        async def other():
+            other_started.append(time.monotonic())
+            return "other"
+
+        self.assertEqual(await asyncio.gather(first, scheduler.run(other)), ["ok", "other"])
+        self.assertGreaterEqual(other_started[0] - start, 0.3)
+        self.assertGreaterEqual(attempts[1] - start, 0.3)
+        self.assertEqual((scheduler.counters["rate_limited"], scheduler.counters["retries"]), (1, 1))
+
+    async def test_non_retryable_error_is_raised(self):
+        scheduler = LLMScheduler()
+
+        async def bad_request():
+            raise ValueError("invalid prompt")
+
+        with self.assertRaises(ValueError):
+            await scheduler.run(bad_request)
+        self.assertEqual(scheduler.counters["failures"], 1)
+        self.assertEqual(scheduler.in_flight, 0)
+
+    async def test_gives_up_after_max_retries(self):
+        scheduler = LLMScheduler(max_retries=2, backoff_base=0.001)
+        calls = []
+
+        async def unavailable():
+            calls.append(1)
+            raise type("Unavailable", (Exception,), {"code": 503})()
+
+        with self.assertRaises(Exception):
+            await scheduler.run(unavailable)
+        self.assertEqual(len(calls), 3)
+        self.assertEqual(scheduler.counters["retries"], 2)
+
+
+class RaisePriorityTest(unittest.IsolatedAsyncioTestCase):
+    async def test_queued_call_moves_to_higher_lane(self):
+        scheduler = LLMScheduler(max_in_flight=1, interactive_reserved=0)
+        order = []
+
+        async def call(name, priority):
+            async with scheduler.slot(priority):
+                order.append(name)
+                await asyncio.sleep(0.01)
+
+        blocker = asyncio.ensure_future(call("blocker", PRIORITY_STANDARD))
+        await asyncio.sleep(0)
+        prefetch = Priority(PRIORITY_BULK)
+        calls = [asyncio.ensure_future(call(name, priority)) for name, priority in
+                 [("standard", PRIORITY_STANDARD), ("prefetch", prefetch)]]
+        await asyncio.sleep(0)
+        scheduler.raise_priority(prefetch, PRIORITY_INTERACTIVE)
+        self.assertEqual(scheduler.lanes[PRIORITY_INTERACTIVE].queued, 1)
+        self.assertEqual(scheduler.lanes[PRIORITY_BULK].queued, 0)
+
+        await asyncio.gather(blocker, *calls)
+        self.assertEqual(order, ["blocker", "prefetch", "standard"])
+
+    async def test_lower_priority_is_ignored(self):
+        scheduler = LLMScheduler()
+        priority = Priority(PRIORITY_INTERACTIVE)
+        scheduler.raise_priority(priority, PRIORITY_BULK)
+        self.assertEqual(priority.value, PRIORITY_INTERACTIVE)
+
+
+class SlowModels:
+    async def generate_content(self, model, contents, config=None):
+        await asyncio.sleep(0.05)
+        return SimpleNamespace(text=contents, usage_metadata=None)
+
+
+class JoinedCallTest(unittest.IsolatedAsyncioTestCase):
+    async def test_interactive_caller_lifts_queued_bulk_call(self):
+        llm = LLMService()
+        llm.model = SlowModels()
+        llm.cache = LLMCache(path=None, memory_entries=0)
+        llm.scheduler = LLMScheduler(max_in_flight=3, interactive_reserved=1)
+        finished = []
+
+        async def generate(prompt, priority):
+            await llm.generate_content(prompt, priority=priority)
+            finished.append(prompt)
+
+        # Two bulk calls fill the non-reserved slots; "tool" queues behind more bulk work
+        bulk = [asyncio.ensure_future(generate(f"bulk {i}", PRIORITY_BULK)) for i in range(6)]
+        prefetch = asyncio.ensure_future(generate("tool", PRIORITY_BULK))
+        await asyncio.sleep(0)
+        click = asyncio.ensure_future(generate("tool", PRIORITY_INTERACTIVE))
+        await asyncio.gather(click, prefetch, *bulk)
+
+        self.assertEqual(llm.singleflight.counters["executions"], 7)
+        self.assertLess(finished.index("tool"), finished.index("bulk 2"))
+
+
+if __name__ == "__main__":
+    unittest.main()
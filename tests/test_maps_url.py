@@ -0,0 +1,104 @@
+import unittest
+from urllib.parse import quote
+
+from src.services.maps_url import (
+    MapsUrlCanonicalizer, extract_place_id, generic_key, is_maps_url, is_short_link, strip_url,
+)
+
+FEATURE_ID = "0x346837d8ac8c2283:0x87892d179da342bf"
+PLACE_URL = (
+    "https://www.google.com/maps/place/Pizza+Shalom/@24.8294946,121.0264991,17z/"
+    f"data=!4m8!3m7!1s{FEATURE_ID}!8m2!3d24.82!4d121.02?entry=ttu&g_ep=EgoyMDI2&hl=zh-TW"
+)
+
+
+class UrlHelpersTest(unittest.TestCase):
+    def test_short_links(self):
+        self.assertTrue(is_short_link("https://maps.app.goo.gl/AbCd123"))
+        self.assertTrue(is_short_link("https://goo.gl/maps/AbCd123"))
+        self.assertTrue(is_short_link("https://g.co/kgs/AbCd123"))
+        self.assertFalse(is_short_link("https://goo.gl/AbCd123"))
+        self.assertFalse(is_short_link(PLACE_URL))
+
+    def test_maps_hosts(self):
+        self.assertTrue(is_maps_url(PLACE_URL))
+        self.assertTrue(is_maps_url("https://maps.google.com.tw/?cid=123"))
+        self.assertTrue(is_maps_url("https://google.co.uk/maps/place/X"))
+        self.assertFalse(is_maps_url("https://www.google.com/search?q=pizza"))
+        self.assertFalse(is_maps_url("https://notgoogle.com/maps/place/X"))
+
+    def test_place_id_forms(self):
+        self.assertEqual(extract_place_id(PLACE_URL), FEATURE_ID)
+        self.assertEqual(extract_place_id(f"https://www.google.com/maps?ftid={FEATURE_ID.upper()}"), FEATURE_ID)
+        self.assertEqual(extract_place_id("https://maps.google.com/?cid=9765432101234"), "cid:9765432101234")
+        self.assertIsNone(extract_place_id("https://www.google.com/maps/search/pizza"))
+
+    def test_strip_url_drops_viewport_and_tracking(self):
+        self.assertEqual(
+            strip_url(PLACE_URL),
+            f"https://www.google.com/maps/place/Pizza+Shalom/data=!4m8!3m7!1s{FEATURE_ID}!8m2!3d24.82!4d121.02?hl=zh-TW"
+        )
+
+    def test_generic_key_keeps_content_selectors(self):
+        url = "https://example.com/r/Page?id=7&utm_source=fb&sort=new%20first&fbclid=abc&UTM_Medium=x#reviews"
+        self.assertEqual(generic_key(url), "https://example.com/r/Page?id=7&sort=new%20first#reviews")
+
+    def test_generic_key_without_query(self):
+        self.assertEqual(generic_key("https://example.com/a/?"), "https://example.com/a/")
+
+
+class CanonicalizerTest(unittest.IsolatedAsyncioTestCase):
+    def setUp(self):
+        self.redirects = {}
+        self.resolved = []
+
+        async def resolve(url):
+            self.resolved.append(url)
+            target = self.redirects[url]
+            if isinstance(target, Exception):
+                raise target
+            return target
+
+        self.canonicalizer = MapsUrlCanonicalizer(resolve)
+
+    async def test_url_forms_share_one_key(self):
+        self.redirects["https://maps.app.goo.gl/AbCd"] = PLACE_URL
+        keys = {
+            (await self.canonicalizer.canonicalize(url)).key
+            for url in (PLACE_URL, f"https://www.google.com/maps?ftid={FEATURE_ID}", "https://maps.app.goo.gl/AbCd")
+        }
+        self.assertEqual(keys, {f"maps:{FEATURE_ID}"})
+
+    async def test_short_link_through_consent_page(self):
+        consent = "https://consent.google.com/ml?continue=" + quote(PLACE_URL, safe="") + "&gl=DE"
+        self.redirects["https://maps.app.goo.gl/EU"] = consent
+        place = await self.canonicalizer.canonicalize("https://maps.app.goo.gl/EU")
+        self.assertEqual(place.place_id, FEATURE_ID)
+        self.assertEqual(place.url, strip_url(PLACE_URL))
+
+    async def test_resolution_is_memoised(self):
+        self.redirects["https://maps.app.goo.gl/AbCd"] = PLACE_URL
+        for _ in range(3):
+            await self.canonicalizer.canonicalize("https://maps.app.goo.gl/AbCd")
+        self.assertEqual(self.resolved, ["https://maps.app.goo.gl/AbCd"])
+        self.assertEqual(self.canonicalizer.stats()["hits"], 2)
+
+    async def test_failed_resolution_is_retried(self):
+        self.redirects["https://maps.app.goo.gl/Down"] = OSError("timeout")
+        place = await self.canonicalizer.canonicalize("https://maps.app.goo.gl/Down")
+        self.assertEqual(place.url, "https://maps.app.goo.gl/Down")
+        self.redirects["https://maps.app.goo.gl/Down"] = PLACE_URL
+        place = await self.canonicalizer.canonicalize("https://maps.app.goo.gl/Down")
+        self.assertEqual(place.key, f"maps:{FEATURE_ID}")
+
+    async def test_generic_url_is_scraped_unchanged(self):
+        url = "https://www.facebook.com/pizza/reviews?ref=page&utm_source=x"
+        place = await self.canonicalizer.canonicalize(url)
+        self.assertEqual(place.url, url)
+        self.assertEqual(place.key, "https://www.facebook.com/pizza/reviews?ref=page")
+        self.assertIsNone(place.place_id)
+        self.assertEqual(self.resolved, [])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,81 @@
+import asyncio
+import unittest
+from types import SimpleNamespace
+
+from src.services.llm_scheduler import LLMScheduler
+from src.services.model_router import ModelRouter
+
+ROUTES = {
+    "reply": {"models": ["primary", "fallback"], "hedge": True},
+    "default": {"models": ["primary"]},
+}
+
+
+class _Busy(Exception):
+    code = 429
+    response = SimpleNamespace(headers={"retry-after": "0.4"})
+
+
+class HedgingTest(unittest.IsolatedAsyncioTestCase):
+    def setUp(self):
+        self.router = ModelRouter(ROUTES)
+        self.router.hedge_initial_delay = 0.2
+        self.scheduler = LLMScheduler(max_in_flight=1, interactive_reserved=0, backoff_base=0.01)
+
+    def call_model(self, latencies):
+        """call_model that sleeps latencies[i] on the i-th backend call (last one repeats)."""
+        calls = []
+
+        async def backend():
+            latency = latencies[min(len(calls), len(latencies) - 1)]
+            calls.append(latency)
+            if isinstance(latency, Exception):
+                raise latency
+            await asyncio.sleep(latency)
+            return "ok"
+
+        async def call_model(model, dispatch):
+            return await self.scheduler.run(backend, dispatch=dispatch)
+
+        return call_model, calls
+
+    async def test_queue_wait_does_not_trigger_hedge(self):
+        call_model, calls = self.call_model([0.1])
+        # One slot: the last of five calls queues for 0.4s, past the 0.2s hedge delay
+        await asyncio.gather(*(self.router.call("reply", call_model) for _ in range(5)))
+        stats = self.router.stats()["reply"]
+        self.assertEqual(stats["hedges"], 0)
+        self.assertEqual(len(calls), 5)
+        self.assertLess(stats["latency_p95_ms"], 150)
+
+    async def test_backoff_does_not_trigger_hedge(self):
+        # Retry-After keeps the call out of a slot for 0.4s, past the 0.2s hedge delay
+        call_model, calls = self.call_model([_Busy(), 0.05])
+        self.assertEqual(await self.router.call("reply", call_model), "ok")
+        self.assertEqual(self.router.stats()["reply"]["hedges"], 0)
+        self.assertEqual(len(calls), 2)
+
+    async def test_slow_dispatched_call_is_hedged(self):
+        self.scheduler.max_in_flight = 2
+        call_model, calls = self.call_model([1.0, 0.05])
+        self.assertEqual(await self.router.call("reply", call_model), "ok")
+        stats = self.router.stats()["reply"]
+        self.assertEqual((stats["hedges"], stats["hedge_wins"]), (1, 1))
+        self.assertEqual(len(calls), 2)
+
+    async def test_falls_back_to_next_model(self):
+        models = []
+
+        async def call_model(model, dispatch):
+            models.append(model)
+            if model == "primary":
+                raise ValueError("bad request")
+            return await self.scheduler.run(lambda: asyncio.sleep(0, "ok"), dispatch=dispatch)
+
+        self.assertEqual(await self.router.call("reply", call_model), "ok")
+        self.assertEqual(models, ["primary", "fallback"])
+        self.assertEqual(self.router.stats()["reply"]["fallbacks"], 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
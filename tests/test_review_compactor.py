@@ -0,0 +1,62 @@
+import unittest
+
+from src.services.review_compactor import compact_reviews, normalize_review
+
+
+class NormalizeReviewTest(unittest.TestCase):
+    def test_strips_owner_reply_on_its_own_line(self):
+        review = "餐點很好吃\n業主回應\n謝謝您的支持"
+        self.assertEqual(normalize_review(review), "餐點很好吃")
+
+    def test_strips_english_owner_reply(self):
+        review = "Great pizza\nResponse from the owner 2 days ago\nThanks!"
+        self.assertEqual(normalize_review(review), "Great pizza")
+
+    def test_keeps_marker_words_inside_customer_text(self):
+        # NFKC turns the full-width commas into ASCII ones; the text itself stays
+        review = "這家店家回覆很快，餐點也很好吃，但是停車不方便"
+        self.assertEqual(normalize_review(review), "這家店家回覆很快,餐點也很好吃,但是停車不方便")
+
+    def test_keeps_complaint_starting_mid_line(self):
+        self.assertEqual(normalize_review("覺得店家回覆態度差"), "覺得店家回覆態度差")
+
+    def test_strip_reply_disabled(self):
+        review = "店家回覆態度差"
+        self.assertEqual(normalize_review(review, strip_reply=False), review)
+
+    def test_drops_boilerplate_lines(self):
+        review = "王小明\n在地嚮導 · 12 則評論\n★★★★★\n3 個月前\n服務  很好\n讚\n分享"
+        self.assertEqual(normalize_review(review), "王小明 服務 很好")
+
+
+class CompactReviewsTest(unittest.TestCase):
+    def test_complaint_about_owner_reply_is_kept(self):
+        kept, report = compact_reviews(["店家回覆態度差", "餐點好吃"], 1000, 300, strip_replies=False)
+        self.assertEqual(kept, ["店家回覆態度差", "餐點好吃"])
+        self.assertEqual(report["empty_removed"], 0)
+
+    def test_review_that_is_only_an_owner_reply_is_removed(self):
+        kept, report = compact_reviews(["業主回應\n謝謝光臨", "餐點好吃"], 1000, 300)
+        self.assertEqual(kept, ["餐點好吃"])
+        self.assertEqual(report["empty_removed"], 1)
+
+    def test_duplicates_removed(self):
+        kept, report = compact_reviews(["好吃！", "好吃", "很棒"], 1000, 300)
+        self.assertEqual(kept, ["好吃!", "很棒"])
+        self.assertEqual(report["duplicates_removed"], 1)
+
+    def test_budget(self):
+        reviews = [f"第{i}則評論內容很長很長很長" for i in range(10)]
+        kept, report = compact_reviews(reviews, 30, 300)
+        self.assertLess(len(kept), 10)
+        self.assertEqual(report["reviews_kept"] + report["dropped_over_budget"], 10)
+        self.assertLessEqual(report["tokens_after"], 30)
+
+    def test_trims_long_review(self):
+        kept, report = compact_reviews(["很好吃。" * 200], 10000, 50)
+        self.assertEqual(report["trimmed"], 1)
+        self.assertTrue(kept[0].endswith("…"))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,82 @@
+import os
+import sqlite3
+import tempfile
+import time
+import unittest
+
+from src.services.review import Review
+from src.services.review_store import ReviewStore, approximate_timestamp
+
+DAY = 86400
+OLD = 1_590_000_000  # 2020
+
+
+class ApproximateTimestampTest(unittest.TestCase):
+    def test_labels(self):
+        now = 1_000_000_000
+        self.assertEqual(approximate_timestamp("3 個月前", now), now - 90 * DAY)
+        self.assertEqual(approximate_timestamp("一週前", now), now - 7 * DAY)
+        self.assertEqual(approximate_timestamp("5 小時前", now), now - 5 * 3600)
+        self.assertEqual(approximate_timestamp("2 years ago", now), now - 730 * DAY)
+        self.assertEqual(approximate_timestamp("a day ago", now), now - DAY)
+        self.assertEqual(approximate_timestamp("已編輯 1 年前", now), now - 365 * DAY)
+
+    def test_not_a_relative_label(self):
+        self.assertIsNone(approximate_timestamp("", 0))
+        self.assertIsNone(approximate_timestamp("2024年3月", 0))
+
+
+class ReviewOrderTest(unittest.IsolatedAsyncioTestCase):
+    def setUp(self):
+        self.dir = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.dir.name, "reviews.sqlite3")
+        self.store = ReviewStore(self.path)
+
+    def tearDown(self):
+        self.store._conn.close()
+        self.dir.cleanup()
+
+    async def test_fresh_dom_review_sorts_before_old_rpc_reviews(self):
+        await self.store.upsert("p", [Review(id=f"rpc{i}", text="old", timestamp=OLD + i) for i in range(3)])
+        await self.store.upsert("p", [Review(id="dom", text="new", time="2 天前")])
+
+        reviews = await self.store.reviews("p", limit=2)
+        self.assertEqual([r.id for r in reviews], ["dom", "rpc2"])
+
+    async def test_dom_reviews_use_their_label(self):
+        now = time.time()
+        await self.store.upsert("p", [
+            Review(id="year", text="a", time="1 年前"),
+            Review(id="rpc", text="b", timestamp=int(now - 30 * DAY)),
+            Review(id="week", text="c", time="1 週前"),
+            Review(id="unlabelled", text="d"),
+        ])
+        self.assertEqual([r.id for r in await self.store.reviews("p")], ["unlabelled", "week", "rpc", "year"])
+
+    async def test_publish_timestamp_replaces_estimate(self):
+        await self.store.upsert("p", [Review(id="a", text="a", time="1 週前"), Review(id="b", text="b", timestamp=OLD)])
+        await self.store.upsert("p", [Review(id="a", timestamp=OLD - DAY)])
+        self.assertEqual([r.id for r in await self.store.reviews("p")], ["b", "a"])
+
+    async def test_existing_store_is_migrated(self):
+        self.store._conn.close()
+        os.remove(self.path)
+        conn = sqlite3.connect(self.path)
+        conn.execute(
+            "CREATE TABLE reviews (place_id TEXT NOT NULL, review_id TEXT NOT NULL, "
+            "author TEXT, rating REAL, time TEXT, timestamp INTEGER, language TEXT, text TEXT, reply TEXT, "
+            "first_seen REAL NOT NULL, last_seen REAL NOT NULL, PRIMARY KEY (place_id, review_id))"
+        )
+        conn.execute("INSERT INTO reviews (place_id, review_id, text, timestamp, first_seen, last_seen) "
+                     "VALUES ('p', 'old', 'x', ?, 0, 0)", (OLD,))
+        conn.execute("INSERT INTO reviews (place_id, review_id, text, first_seen, last_seen) "
+                     "VALUES ('p', 'dom', 'y', ?, ?)", (OLD + DAY, OLD + DAY))
+        conn.commit()
+        conn.close()
+
+        self.store = ReviewStore(self.path)
+        self.assertEqual([r.id for r in await self.store.reviews("p")], ["dom", "old"])
+
+
+if __name__ == "__main__":
+    unittest.main()